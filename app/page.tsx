@@ -42,44 +42,36 @@ export default function Home() {
       
       console.log(`🔄 Loading homepage data in ${selectedCurrency.code} currency...`);
       
-      // Fetch all data in parallel WITH CURRENCY SUPPORT
-      const [categoriesResponse, featuredResponse, electronicsResponse, bannersResponse] = await Promise.all([
-        apiClient.getCategories(),
-        apiClient.getFeaturedProducts(selectedCurrency.code), // Add currency
-        apiClient.getProductsByCategory('electronics', { 
-          limit: 6,
-          currency: selectedCurrency.code // Add currency
-        }),
-        apiClient.getBanners()
-      ]);
-
-      if (categoriesResponse.success) {
-        setCategories(categoriesResponse.data);
-      }
+      // One bundled request for every homepage section WITH CURRENCY SUPPORT
+      const homepageResponse = await apiClient.getHomepage(selectedCurrency.code);
 
-      if (featuredResponse.success) {
-        setFeaturedProducts(featuredResponse.data);
-        console.log(`✅ Loaded ${featuredResponse.data.length} featured products in ${selectedCurrency.code}`);
+      if (!homepageResponse.success) {
+        throw new Error(homepageResponse.message || 'Failed to load homepage data');
       }
 
-      if (electronicsResponse.success) {
-        setElectronicsProducts(electronicsResponse.data);
-        console.log(`✅ Loaded ${electronicsResponse.data.length} electronics products in ${selectedCurrency.code}`);
-      }
+      const sections = homepageResponse.data;
+
+      setCategories(sections.categories_section.categories);
+
+      setFeaturedProducts(sections.featured_section.products);
+      console.log(`✅ Loaded ${sections.featured_section.products.length} featured products in ${selectedCurrency.code}`);
+
+      setElectronicsProducts(sections.electronics_section.products);
+      console.log(`✅ Loaded ${sections.electronics_section.products.length} electronics products in ${selectedCurrency.code}`);
+
+      const apiHeroBanners = sections.hero_section.banners.map((banner: any) => ({
+        image: banner.image_url,
+        title: banner.title,
+        subtitle: banner.subtitle || '',
+        buttonText: banner.button_text || 'Shop Now',
+        buttonLink: banner.button_link || '/'
+      }));
 
-      // Handle banners API response
-      if (bannersResponse.success) {
-        const apiHeroBanners = bannersResponse.data.map((banner: any) => ({
-          image: banner.image_url,
-          title: banner.title,
-          subtitle: banner.subtitle || '',
-          buttonText: banner.button_text || 'Shop Now',
-          buttonLink: banner.button_link || '/'
-        }));
+      if (apiHeroBanners.length > 0) {
         setHeroBanners(apiHeroBanners);
       } else {
-        // Fallback to hardcoded banners if API fails
-        console.warn('Banners API failed, using fallback data');
+        // Fallback to hardcoded banners if none are configured
+        console.warn('No hero banners returned, using fallback data');
         setHeroBanners(fallbackHeroBanners);
       }
 
@@ -3,6 +3,7 @@
 // Centralized environment variable management using .env file
 
 require('dotenv').config({ path: '/app/backend/.env' });
+const path = require('path');
 
 const environment = {
   // ==============================================
@@ -12,6 +13,7 @@ const environment = {
     url: process.env.SUPABASE_URL,
     anonKey: process.env.SUPABASE_ANON_KEY,
     serviceRoleKey: process.env.SUPABASE_SERVICE_ROLE,
+    jwtSecret: process.env.SUPABASE_JWT_SECRET,
   },
 
   // ==============================================
@@ -40,6 +42,60 @@ const environment = {
     sessionSecret: process.env.SESSION_SECRET,
   },
 
+  // ==============================================
+  // 🎫 VERIFIED TOKEN CACHE
+  // ==============================================
+  authCache: {
+    maxEntries: parseInt(process.env.AUTH_TOKEN_CACHE_SIZE || '5000'),
+    ttlMs: parseInt(process.env.AUTH_TOKEN_CACHE_TTL || '300') * 1000,
+  },
+
+  // ==============================================
+  // 🗄️ PUBLIC CATALOG RESPONSE CACHE
+  // ==============================================
+  responseCache: {
+    enabled: process.env.RESPONSE_CACHE_ENABLED !== 'false',
+    maxEntries: parseInt(process.env.RESPONSE_CACHE_SIZE || '500'),
+    // Safety net for edits made outside the API (e.g. directly in Supabase)
+    ttlMs: parseInt(process.env.RESPONSE_CACHE_TTL || '300') * 1000,
+  },
+
+  // ==============================================
+  // 📊 ADMIN DASHBOARD
+  // ==============================================
+  dashboard: {
+    metricsRefreshIntervalMs: parseInt(process.env.DASHBOARD_METRICS_REFRESH_INTERVAL || '5') * 60 * 1000,
+  },
+
+  // ==============================================
+  // 💱 EXCHANGE RATE REFRESH
+  // ==============================================
+  currency: {
+    refreshIntervalMs: parseInt(process.env.CURRENCY_REFRESH_INTERVAL || '30') * 60 * 1000,
+    snapshotPath: process.env.CURRENCY_RATES_SNAPSHOT || path.join(__dirname, '..', '.cache', 'exchange-rates.json'),
+  },
+
+  // ==============================================
+  // 🖼️ IMAGE PROCESSING
+  // ==============================================
+  images: {
+    // Files processed at once by /api/images/upload-multiple
+    uploadConcurrency: parseInt(process.env.IMAGE_UPLOAD_CONCURRENCY || '3'),
+    // Upper bound on source + working buffers held by in-flight uploads
+    maxInFlightBytes: parseInt(process.env.IMAGE_UPLOAD_MAX_INFLIGHT_MB || '96') * 1024 * 1024,
+    // Downloaded sources and results of /api/images/from-url imports, keyed by source URL
+    importCacheDir: process.env.IMAGE_IMPORT_CACHE_DIR || path.join(__dirname, '..', '.cache', 'image-imports'),
+    importCacheMaxBytes: parseInt(process.env.IMAGE_IMPORT_CACHE_MB || '512') * 1024 * 1024,
+    // Output of /api/images/resize; the dot-directory is not exposed by the /uploads static route
+    resizeCacheDir: process.env.IMAGE_RESIZE_CACHE_DIR || path.join(__dirname, '..', 'uploads', '.resize-cache'),
+    resizeCacheMaxBytes: parseInt(process.env.IMAGE_RESIZE_CACHE_MB || '1024') * 1024 * 1024,
+    // Hosts /api/images/resize may fetch from, besides the Supabase project itself
+    resizeAllowedHosts: (process.env.IMAGE_RESIZE_ALLOWED_HOSTS || 'images.unsplash.com')
+      .split(',')
+      .map(host => host.trim().toLowerCase())
+      .filter(Boolean),
+  },
+
   // ==============================================
   // 🌐 SERVER CONFIGURATION
   // ==============================================
@@ -5,33 +5,31 @@
 
 const { getSupabaseClient } = require('../services/supabase-service');
 const { v4: uuidv4 } = require('uuid');
+const LRUCache = require('../utils/lru-cache');
+
+// ==============================================
+// 💾 KNOWN-SYNCED USERS
+// ==============================================
+// Users already present in public.users, keyed by Supabase user id
+const SYNCED_USERS_MAX = 10000;
+const SYNCED_USER_TTL = 10 * 60 * 1000; // 10 minutes in milliseconds
+const syncedUsers = new LRUCache({ maxSize: SYNCED_USERS_MAX, ttl: SYNCED_USER_TTL });
 
 class AutoSyncMiddleware {
   
   // Automatically sync Supabase Auth user to local database
   static async syncSupabaseUser(supabaseUserId, email, additionalData = {}) {
+    // Hot path: users already synced by this process cost no DB round-trip
+    const knownUser = syncedUsers.get(supabaseUserId);
+    if (knownUser) {
+      return { success: true, user: knownUser, action: 'exists' };
+    }
+
     try {
       console.log(`🔄 Auto-syncing user: ${email}`);
       const supabase = getSupabaseClient();
-      
-      // Check if user already exists in local database
-      const { data: existingUser, error: selectError } = await supabase
-        .from('users')
-        .select('*')
-        .eq('email', email)
-        .single();
-
-      if (selectError && selectError.code !== 'PGRST116') {
-        console.error('❌ Error checking existing user:', selectError);
-        return { success: false, error: selectError.message };
-      }
-
-      if (existingUser) {
-        console.log(`✅ User already synced: ${email}`);
-        return { success: true, user: existingUser, action: 'exists' };
-      }
 
-      // Create new user in local database
+      // First sighting: insert, leaving any existing row untouched
       const newUser = {
         id: supabaseUserId,
         email: email,
@@ -42,17 +40,38 @@ class AutoSyncMiddleware {
         ...additionalData
       };
 
-      const { data: createdUser, error: insertError } = await supabase
+      const { data: insertedUsers, error: insertError } = await supabase
         .from('users')
-        .insert([newUser])
-        .select()
-        .single();
+        .upsert([newUser], { onConflict: 'id', ignoreDuplicates: true })
+        .select();
 
-      if (insertError) {
+      // 23505 = row with this email already exists under another id
+      if (insertError && insertError.code !== '23505') {
         console.error('❌ Error creating user in local database:', insertError);
         return { success: false, error: insertError.message };
       }
 
+      const createdUser = insertedUsers && insertedUsers[0];
+
+      if (!createdUser) {
+        // Row already existed - look it up by email if it lives under a different id
+        let existingQuery = supabase.from('users').select('*');
+        existingQuery = insertError
+          ? existingQuery.eq('email', email)
+          : existingQuery.eq('id', supabaseUserId);
+
+        const { data: existingUser, error: selectError } = await existingQuery.single();
+
+        if (selectError || !existingUser) {
+          console.error('❌ Error checking existing user:', selectError);
+          return { success: false, error: selectError ? selectError.message : 'User not found' };
+        }
+
+        console.log(`✅ User already synced: ${email}`);
+        syncedUsers.set(supabaseUserId, existingUser);
+        return { success: true, user: existingUser, action: 'exists' };
+      }
+
       // Log successful sync
       await supabase
         .from('user_sync_log')
@@ -65,6 +84,7 @@ class AutoSyncMiddleware {
         }]);
 
       console.log(`✅ User successfully synced: ${email}`);
+      syncedUsers.set(supabaseUserId, createdUser);
       return { success: true, user: createdUser, action: 'created' };
 
     } catch (error) {
@@ -86,6 +106,11 @@ class AutoSyncMiddleware {
     }
   }
 
+  // Forget synced users so the next request re-reads them (call after admin updates/deletes)
+  static invalidateSyncedUsers(userIds) {
+    (Array.isArray(userIds) ? userIds : [userIds]).forEach(userId => syncedUsers.delete(userId));
+  }
+
   // Middleware to automatically sync authenticated users
   static async autoSyncUser(req, res, next) {
     try {
@@ -7,6 +7,7 @@
 const jwt = require('jsonwebtoken');
 const { createClient } = require('@supabase/supabase-js');
 const { environment } = require('../config/environment');
+const { verifySupabaseToken } = require('./supabase-auth');
 
 // =============================================
 // 🔧 SUPABASE CLIENT FOR AUTH
@@ -89,8 +90,7 @@ const authenticateToken = async (req, res, next) => {
   // TRY SUPABASE TOKEN FIRST
   // =============================================
   try {
-    const supabase = getAuthClient();
-    const { data: { user }, error } = await supabase.auth.getUser(token);
+    const { user, error } = await verifySupabaseToken(token);
     
     if (user && !error) {
       console.log('🔐 Supabase token authenticated for user:', user.email);
@@ -182,8 +182,7 @@ const optionalAuth = async (req, res, next) => {
 const validateToken = async (token) => {
   try {
     // Try Supabase first
-    const supabase = getAuthClient();
-    const { data: { user }, error } = await supabase.auth.getUser(token);
+    const { user, error } = await verifySupabaseToken(token);
     
     if (user && !error) {
       return {
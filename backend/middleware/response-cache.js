@@ -0,0 +1,122 @@
+// RitZone Response Cache Middleware
+// ==============================================
+// In-memory cache for public catalog GET endpoints with ETag support.
+// Entries are grouped by tag ('products', 'categories', 'banners', 'deals')
+// and dropped by invalidateResponseCache() whenever an admin mutation succeeds.
+
+const crypto = require('crypto');
+const LRUCache = require('../utils/lru-cache');
+const { environment } = require('../config/environment');
+
+// One LRU per tag so a tag can be invalidated without scanning other entries
+const caches = new Map();
+// Bumped on every invalidation so a response that was being built while the
+// data changed is never stored
+const generations = new Map();
+// Callbacks told about every invalidation (precomputed payloads outside the per-route LRUs)
+const invalidationListeners = [];
+
+const getTagCache = (tag) => {
+  if (!caches.has(tag)) {
+    caches.set(tag, new LRUCache({
+      maxSize: environment.responseCache.maxEntries,
+      ttl: environment.responseCache.ttlMs
+    }));
+  }
+  return caches.get(tag);
+};
+
+// Route + query string, including ?currency= (sorted, so ?a=1&b=2 and ?b=2&a=1 share an entry)
+const buildCacheKey = (req) => {
+  const query = Object.keys(req.query)
+    .sort()
+    .map(key => `${key}=${JSON.stringify(req.query[key])}`)
+    .join('&');
+
+  return `${req.baseUrl}${req.path}?${query}`;
+};
+
+const createCacheEntry = (payload) => {
+  const body = JSON.stringify(payload);
+  return {
+    body,
+    etag: `W/"${crypto.createHash('sha1').update(body).digest('base64url')}"`
+  };
+};
+
+const sendCached = (res, entry, status) => {
+  res.set('ETag', entry.etag);
+  res.set('Cache-Control', 'public, max-age=0, must-revalidate');
+  res.set('X-Cache', status);
+  // Express answers 304 itself when If-None-Match matches the ETag set above
+  return res.type('application/json').send(entry.body);
+};
+
+// ==============================================
+// 🗄️ CACHE MIDDLEWARE
+// ==============================================
+const cacheResponse = (tag) => (req, res, next) => {
+  if (!environment.responseCache.enabled || req.method !== 'GET') {
+    return next();
+  }
+
+  const cache = getTagCache(tag);
+  const key = buildCacheKey(req);
+  const cached = cache.get(key);
+
+  if (cached) {
+    return sendCached(res, cached, 'HIT');
+  }
+
+  const generation = generations.get(tag) || 0;
+  const originalJson = res.json.bind(res);
+
+  res.json = (payload) => {
+    // Only successful payloads are cached; errors always go back to the database
+    if (res.statusCode !== 200 || !payload || payload.success === false) {
+      return originalJson(payload);
+    }
+
+    const entry = createCacheEntry(payload);
+
+    if ((generations.get(tag) || 0) === generation) {
+      cache.set(key, entry);
+    }
+
+    return sendCached(res, entry, 'MISS');
+  };
+
+  next();
+};
+
+// ==============================================
+// 🧹 INVALIDATION
+// ==============================================
+const invalidateResponseCache = (...tags) => {
+  tags.forEach((tag) => {
+    generations.set(tag, (generations.get(tag) || 0) + 1);
+    if (caches.has(tag)) {
+      caches.get(tag).clear();
+    }
+  });
+
+  invalidationListeners.forEach((listener) => {
+    try {
+      listener(tags);
+    } catch (error) {
+      console.error('❌ Response cache invalidation listener failed:', error.message);
+    }
+  });
+};
+
+const onResponseCacheInvalidated = (listener) => {
+  invalidationListeners.push(listener);
+};
+
+module.exports = {
+  cacheResponse,
+  invalidateResponseCache,
+  onResponseCacheInvalidated,
+  createCacheEntry,
+  sendCached
+};
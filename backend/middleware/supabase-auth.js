@@ -0,0 +1,239 @@
+// RitZone Supabase Auth Middleware
+// ==============================================
+// Shared Supabase access-token verification with a bounded cache of validated tokens
+
+const crypto = require('crypto');
+const jwt = require('jsonwebtoken');
+const { environment } = require('../config/environment');
+const { getSupabaseClient } = require('../services/supabase-service');
+const AutoSyncMiddleware = require('./auto-sync-middleware');
+const LRUCache = require('../utils/lru-cache');
+
+// ==============================================
+// 💾 VERIFIED / REVOKED TOKEN CACHES
+// ==============================================
+// Keys are SHA-256 hashes so raw tokens never sit in memory longer than the request
+const verifiedTokens = new LRUCache({
+  maxSize: environment.authCache.maxEntries,
+  ttl: environment.authCache.ttlMs
+});
+// hash -> expiry (ms). Not an LRU: a revocation must hold until the token
+// expires, so entries are dropped by pruneRevokedTokens() and, only when the
+// map is full of live entries, soonest-expiring first. Only tokens that passed
+// verifySupabaseToken (valid signature and exp) are ever added.
+const revokedTokens = new Map();
+const REVOKED_PRUNE_INTERVAL_MS = 60 * 1000;
+let lastRevokedPrune = 0;
+
+const hashToken = (token) => crypto.createHash('sha256').update(token).digest('hex');
+
+// Milliseconds until the token's exp claim (signature is NOT checked here)
+const getTokenLifetime = (token) => {
+  const decoded = jwt.decode(token);
+  if (!decoded || !decoded.exp) {
+    return null;
+  }
+  return decoded.exp * 1000 - Date.now();
+};
+
+const pruneRevokedTokens = (force = false) => {
+  const now = Date.now();
+  if (!force && now - lastRevokedPrune < REVOKED_PRUNE_INTERVAL_MS) {
+    return;
+  }
+  lastRevokedPrune = now;
+
+  for (const [key, expiresAt] of revokedTokens) {
+    if (expiresAt <= now) {
+      revokedTokens.delete(key);
+    }
+  }
+};
+
+const isRevoked = (key) => {
+  const expiresAt = revokedTokens.get(key);
+  if (expiresAt === undefined) {
+    return false;
+  }
+  if (expiresAt <= Date.now()) {
+    revokedTokens.delete(key);
+    return false;
+  }
+  return true;
+};
+
+// Local verification only works for HS256 tokens signed with the project JWT secret
+const canVerifyLocally = (token) => {
+  if (!environment.supabase.jwtSecret) {
+    return false;
+  }
+  const decoded = jwt.decode(token, { complete: true });
+  return decoded?.header?.alg === 'HS256';
+};
+
+// Build a Supabase-shaped user object from verified access-token claims
+const userFromClaims = (claims) => ({
+  id: claims.sub,
+  email: claims.email,
+  phone: claims.phone,
+  role: claims.role,
+  app_metadata: claims.app_metadata || {},
+  user_metadata: claims.user_metadata || {}
+});
+
+// ==============================================
+// 🔍 VERIFY SUPABASE TOKEN
+// ==============================================
+// Returns { user, error } like client.auth.getUser(token)
+const verifySupabaseToken = async (token) => {
+  const key = hashToken(token);
+
+  if (isRevoked(key)) {
+    return { user: null, error: new Error('Token has been revoked') };
+  }
+
+  const cachedUser = verifiedTokens.get(key);
+  if (cachedUser) {
+    return { user: cachedUser, error: null };
+  }
+
+  const lifetime = getTokenLifetime(token);
+  if (lifetime !== null && lifetime <= 0) {
+    return { user: null, error: new Error('Token has expired') };
+  }
+
+  let user;
+
+  if (canVerifyLocally(token)) {
+    try {
+      const claims = jwt.verify(token, environment.supabase.jwtSecret, {
+        algorithms: ['HS256'],
+        audience: 'authenticated'
+      });
+      if (!claims.sub) {
+        return { user: null, error: new Error('Token has no subject') };
+      }
+      user = userFromClaims(claims);
+    } catch (error) {
+      return { user: null, error };
+    }
+  } else {
+    // No usable secret (or asymmetric signing keys) - ask Supabase Auth
+    const client = getSupabaseClient();
+    const { data, error } = await client.auth.getUser(token);
+    if (error || !data?.user) {
+      return { user: null, error: error || new Error('User not found') };
+    }
+    user = data.user;
+  }
+
+  // Never keep a token cached past its own expiry
+  if (lifetime !== null) {
+    verifiedTokens.set(key, user, Math.min(environment.authCache.ttlMs, lifetime));
+  }
+
+  return { user, error: null };
+};
+
+// ==============================================
+// 🚫 REVOKE TOKEN (LOGOUT)
+// ==============================================
+// Resolves to true when the token was valid and is now refused until it expires
+const revokeToken = async (token) => {
+  // Forged, expired or exp-less tokens are never stored, so anonymous callers
+  // cannot grow the revocation list
+  const { user } = await verifySupabaseToken(token).catch(() => ({ user: null }));
+  const lifetime = getTokenLifetime(token);
+  if (!user || lifetime === null || lifetime <= 0) {
+    return false;
+  }
+
+  const key = hashToken(token);
+  verifiedTokens.delete(key);
+  revokedTokens.set(key, Date.now() + lifetime);
+
+  pruneRevokedTokens();
+  if (revokedTokens.size > environment.authCache.maxEntries) {
+    pruneRevokedTokens(true);
+  }
+
+  // Still full of live revocations: give up the one that expires soonest
+  while (revokedTokens.size > environment.authCache.maxEntries) {
+    let soonestKey = null;
+    let soonestExpiry = Infinity;
+    for (const [candidate, expiresAt] of revokedTokens) {
+      if (expiresAt < soonestExpiry) {
+        soonestKey = candidate;
+        soonestExpiry = expiresAt;
+      }
+    }
+    console.warn('⚠️ Revoked token list is full; dropping the entry closest to expiry');
+    revokedTokens.delete(soonestKey);
+  }
+
+  return true;
+};
+
+// ==============================================
+// 🔒 SUPABASE AUTHENTICATION MIDDLEWARE
+// ==============================================
+async function authenticateSupabaseToken(req, res, next) {
+  try {
+    const authHeader = req.headers['authorization'];
+    const token = authHeader && authHeader.split(' ')[1];
+
+    if (!token) {
+      return res.status(401).json({
+        success: false,
+        message: 'Access token is required'
+      });
+    }
+
+    // Verify Supabase token and get user
+    const { user, error } = await verifySupabaseToken(token);
+
+    if (error || !user) {
+      return res.status(403).json({
+        success: false,
+        message: 'Invalid or expired token'
+      });
+    }
+
+    // Auto-sync user to local database
+    const syncResult = await AutoSyncMiddleware.syncSupabaseUser(
+      user.id,
+      user.email,
+      {
+        email_verified: user.email_confirmed_at || user.user_metadata?.email_verified ? true : false,
+        phone: user.phone,
+        user_metadata: user.user_metadata
+      }
+    );
+
+    if (syncResult.success) {
+      // Attach synced user to request object
+      req.user = { userId: user.id, email: user.email };
+      req.syncedUser = syncResult.user;
+      req.supabaseUser = user;
+    } else {
+      return res.status(500).json({
+        success: false,
+        message: 'User synchronization failed'
+      });
+    }
+
+    next();
+  } catch (error) {
+    console.error('❌ Supabase auth middleware error:', error);
+    return res.status(500).json({
+      success: false,
+      message: 'Authentication error'
+    });
+  }
+}
+
+module.exports = {
+  authenticateSupabaseToken,
+  verifySupabaseToken,
+  revokeToken
+};
@@ -24,7 +24,8 @@ router.get('/users', AutoSyncMiddleware.adminAuth, async (req, res) => {
       search = '',
       sortBy = 'created_at',
       sortOrder = 'desc',
-      status = 'all'
+      status = 'all',
+      cursor = null
     } = req.query;
 
     const result = await adminUsersService.getUsers({
@@ -33,7 +34,8 @@ router.get('/users', AutoSyncMiddleware.adminAuth, async (req, res) => {
       search,
       sortBy,
       sortOrder,
-      status
+      status,
+      cursor
     });
 
     if (!result.success) {
@@ -50,7 +52,9 @@ router.get('/users', AutoSyncMiddleware.adminAuth, async (req, res) => {
         currentPage: result.currentPage,
         totalPages: result.totalPages,
         totalUsers: result.totalUsers,
-        limit: result.limit
+        limit: result.limit,
+        nextCursor: result.nextCursor,
+        hasMore: result.hasMore
       }
     });
 
@@ -213,7 +217,8 @@ router.post('/users/bulk-delete', AutoSyncMiddleware.adminAuth, async (req, res)
       data: {
         deletedCount: result.deletedCount,
         failedCount: result.failedCount,
-        errors: result.errors
+        errors: result.errors,
+        results: result.results
       }
     });
 
@@ -261,7 +266,8 @@ router.post('/users/bulk-update', AutoSyncMiddleware.adminAuth, async (req, res)
       data: {
         updatedCount: result.updatedCount,
         failedCount: result.failedCount,
-        errors: result.errors
+        errors: result.errors,
+        results: result.results
       }
     });
 
@@ -428,7 +434,8 @@ router.post('/users/bulk-notify', AutoSyncMiddleware.adminAuth, async (req, res)
       data: {
         sentCount: result.sentCount,
         failedCount: result.failedCount,
-        errors: result.errors
+        errors: result.errors,
+        results: result.results
       }
     });
 
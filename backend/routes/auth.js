@@ -6,8 +6,8 @@ const express = require('express');
 const jwt = require('jsonwebtoken');
 const bcrypt = require('bcryptjs');
 const { environment } = require('../config/environment');
-const { userService, getSupabaseClient } = require('../services/supabase-service');
-const AutoSyncMiddleware = require('../middleware/auto-sync-middleware');
+const { userService } = require('../services/supabase-service');
+const { authenticateSupabaseToken, revokeToken } = require('../middleware/supabase-auth');
 
 const router = express.Router();
 
@@ -275,79 +275,9 @@ router.post('/refresh', async (req, res) => {
 // ==============================================
 // 🚪 LOGOUT
 // ==============================================
-router.post('/logout', authenticateToken, (req, res) => {
-  // In a production environment, you might want to blacklist the token
-  res.status(200).json({
-    success: true,
-    message: 'Logged out successfully'
-  });
-});
-
-// ==============================================
-// 🔒 AUTHENTICATION MIDDLEWARE
-// ==============================================
-// Supabase Token Authentication Middleware
-async function authenticateSupabaseToken(req, res, next) {
-  try {
-    const authHeader = req.headers['authorization'];
-    const token = authHeader && authHeader.split(' ')[1];
-
-    if (!token) {
-      return res.status(401).json({
-        success: false,
-        message: 'Access token is required'
-      });
-    }
-
-    const client = getSupabaseClient();
-    
-    // Verify Supabase token and get user
-    const { data: { user }, error } = await client.auth.getUser(token);
-    
-    if (error || !user) {
-      return res.status(403).json({
-        success: false,
-        message: 'Invalid or expired token'
-      });
-    }
-
-    // Auto-sync user to local database
-    const syncResult = await AutoSyncMiddleware.syncSupabaseUser(
-      user.id, 
-      user.email,
-      {
-        email_verified: user.email_confirmed_at ? true : false,
-        phone: user.phone,
-        user_metadata: user.user_metadata
-      }
-    );
-
-    if (syncResult.success) {
-      // Attach synced user to request object
-      req.user = { userId: user.id, email: user.email };
-      req.syncedUser = syncResult.user;
-      req.supabaseUser = user;
-    } else {
-      return res.status(500).json({
-        success: false,
-        message: 'User synchronization failed'
-      });
-    }
-
-    next();
-  } catch (error) {
-    console.error('❌ Supabase auth middleware error:', error);
-    return res.status(500).json({
-      success: false,
-      message: 'Authentication error'
-    });
-  }
-}
-
-// Legacy JWT Authentication Middleware (kept for backward compatibility)
-function authenticateToken(req, res, next) {
+router.post('/logout', async (req, res) => {
   const authHeader = req.headers['authorization'];
-  const token = authHeader && authHeader.split(' ')[1]; // Bearer TOKEN
+  const token = authHeader && authHeader.split(' ')[1];
 
   if (!token) {
     return res.status(401).json({
@@ -356,16 +286,14 @@ function authenticateToken(req, res, next) {
     });
   }
 
-  jwt.verify(token, environment.security.jwtSecret, (error, user) => {
-    if (error) {
-      return res.status(403).json({
-        success: false,
-        message: 'Invalid or expired token'
-      });
-    }
-    req.user = user;
-    next();
+  // Drop the token from the verified-token cache and refuse it until it expires
+  // (invalid or already expired tokens have nothing to revoke)
+  await revokeToken(token);
+
+  res.status(200).json({
+    success: true,
+    message: 'Logged out successfully'
   });
-}
+});
 
 module.exports = router;
\ No newline at end of file
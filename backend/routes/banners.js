@@ -5,13 +5,15 @@
 const express = require('express');
 const { environment } = require('../config/environment');
 const { bannerService } = require('../services/supabase-service');
+const { cacheResponse } = require('../middleware/response-cache');
+const { withBannerImageVariants } = require('../utils/image-variants');
 
 const router = express.Router();
 
 // ==============================================
 // 🎨 GET ALL HERO BANNERS
 // ==============================================
-router.get('/', async (req, res) => {
+router.get('/', cacheResponse('banners'), async (req, res) => {
   try {
     const result = await bannerService.getAllBanners();
 
@@ -25,7 +27,7 @@ router.get('/', async (req, res) => {
     res.status(200).json({
       success: true,
       message: 'Hero banners retrieved successfully',
-      data: result.banners,
+      data: result.banners.map(withBannerImageVariants),
       count: result.banners.length
     });
 
@@ -4,77 +4,18 @@
 
 const express = require('express');
 const { environment } = require('../config/environment');
-const { cartService, getSupabaseClient } = require('../services/supabase-service');
-const AutoSyncMiddleware = require('../middleware/auto-sync-middleware');
+const { cartService } = require('../services/supabase-service');
+const { authenticateSupabaseToken } = require('../middleware/supabase-auth');
 // NEW: Import currency service for dynamic currency conversion
 const { 
-  convertPrice, 
+  getCurrencyRates, 
+  convertMany, 
   getCurrencySymbol, 
   formatPrice 
 } = require('../services/currency-service');
 
 const router = express.Router();
 
-// ==============================================
-// 🔒 SUPABASE AUTHENTICATION MIDDLEWARE
-// ==============================================
-async function authenticateSupabaseToken(req, res, next) {
-  try {
-    const authHeader = req.headers['authorization'];
-    const token = authHeader && authHeader.split(' ')[1];
-
-    if (!token) {
-      return res.status(401).json({
-        success: false,
-        message: 'Access token is required'
-      });
-    }
-
-    const client = getSupabaseClient();
-    
-    // Verify Supabase token and get user
-    const { data: { user }, error } = await client.auth.getUser(token);
-    
-    if (error || !user) {
-      return res.status(403).json({
-        success: false,
-        message: 'Invalid or expired token'
-      });
-    }
-
-    // Auto-sync user to local database
-    const syncResult = await AutoSyncMiddleware.syncSupabaseUser(
-      user.id, 
-      user.email,
-      {
-        email_verified: user.email_confirmed_at ? true : false,
-        phone: user.phone,
-        user_metadata: user.user_metadata
-      }
-    );
-
-    if (syncResult.success) {
-      // Attach synced user to request object
-      req.user = { userId: user.id, email: user.email };
-      req.syncedUser = syncResult.user;
-      req.supabaseUser = user;
-    } else {
-      return res.status(500).json({
-        success: false,
-        message: 'User synchronization failed'
-      });
-    }
-
-    next();
-  } catch (error) {
-    console.error('❌ Supabase auth middleware error:', error);
-    return res.status(500).json({
-      success: false,
-      message: 'Authentication error'
-    });
-  }
-}
-
 // ==============================================
 // 💰 HELPER FUNCTION: CONVERT CART PRICES
 // ==============================================
@@ -91,37 +32,45 @@ async function convertCartPrices(cartData, targetCurrency = 'INR') {
   try {
     console.log(`💱 Converting cart prices to ${targetCurrency}`);
     
+    // Resolve the rate table once for the whole cart
+    const rates = await getCurrencyRates('INR');
+    
     // Convert cart items prices
-    const convertedCartItems = await Promise.all(
-      (cartData.cart_items || []).map(async (item) => {
-        const convertedItem = { ...item };
+    const convertedCartItems = (cartData.cart_items || []).map((item) => {
+      const convertedItem = { ...item };
+      
+      // Convert product price
+      if (item.products && item.products.price) {
+        const [price, originalPrice] = convertMany(
+          [item.products.price, item.products.original_price || null],
+          'INR',
+          targetCurrency,
+          rates
+        );
         
-        // Convert product price
-        if (item.products && item.products.price) {
-          convertedItem.products.price = await convertPrice(item.products.price, 'INR', targetCurrency);
-          convertedItem.products.original_price = item.products.original_price 
-            ? await convertPrice(item.products.original_price, 'INR', targetCurrency)
-            : null;
-          
+        convertedItem.products = {
+          ...item.products,
+          price,
+          original_price: originalPrice,
           // Add currency metadata to product
-          convertedItem.products.currency = targetCurrency;
-          convertedItem.products.currency_symbol = getCurrencySymbol(targetCurrency);
-          convertedItem.products.formatted_price = formatPrice(convertedItem.products.price, targetCurrency);
-          convertedItem.products.base_currency = 'INR';
-        }
-        
-        // Convert item total_price if exists
-        if (item.total_price) {
-          convertedItem.total_price = await convertPrice(item.total_price, 'INR', targetCurrency);
-        }
-        
-        return convertedItem;
-      })
-    );
+          currency: targetCurrency,
+          currency_symbol: getCurrencySymbol(targetCurrency),
+          formatted_price: formatPrice(price, targetCurrency),
+          base_currency: 'INR'
+        };
+      }
+      
+      // Convert item total_price if exists
+      if (item.total_price) {
+        [convertedItem.total_price] = convertMany([item.total_price], 'INR', targetCurrency, rates);
+      }
+      
+      return convertedItem;
+    });
     
     // Convert total amount
     const convertedTotalAmount = cartData.total_amount 
-      ? await convertPrice(cartData.total_amount, 'INR', targetCurrency)
+      ? convertMany([cartData.total_amount], 'INR', targetCurrency, rates)[0]
       : 0;
     
     return {
@@ -5,13 +5,14 @@
 const express = require('express');
 const { environment } = require('../config/environment');
 const { categoryService } = require('../services/supabase-service');
+const { cacheResponse } = require('../middleware/response-cache');
 
 const router = express.Router();
 
 // ==============================================
 // 🏷️ GET ALL CATEGORIES
 // ==============================================
-router.get('/', async (req, res) => {
+router.get('/', cacheResponse('categories'), async (req, res) => {
   try {
     const result = await categoryService.getAllCategories();
 
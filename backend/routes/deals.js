@@ -5,13 +5,14 @@
 const express = require('express');
 const { environment } = require('../config/environment');
 const { dealsService } = require('../services/supabase-service');
+const { cacheResponse } = require('../middleware/response-cache');
 
 const router = express.Router();
 
 // ==============================================
 // 🏷️ GET ALL DEALS
 // ==============================================
-router.get('/', async (req, res) => {
+router.get('/', cacheResponse('deals'), async (req, res) => {
   try {
     const result = await dealsService.getAllDeals();
 
@@ -0,0 +1,180 @@
+// RitZone Homepage Routes
+// ==============================================
+// Public homepage bundle: hero banners, categories, featured and electronics
+// products in one response, precomputed per currency and rebuilt whenever
+// the catalog data behind it changes
+
+const express = require('express');
+const { environment } = require('../config/environment');
+const { bannerService, categoryService, productService } = require('../services/supabase-service');
+const { SUPPORTED_CURRENCIES } = require('../services/currency-service');
+const { convertProductsPrices } = require('../utils/product-currency');
+const { withProductImageVariants, withBannerImageVariants } = require('../utils/image-variants');
+const { onResponseCacheInvalidated, createCacheEntry, sendCached } = require('../middleware/response-cache');
+
+const router = express.Router();
+
+// Response-cache tags the bundle is built from
+const HOMEPAGE_TAGS = ['products', 'categories', 'banners'];
+const FEATURED_LIMIT = 20;
+const ELECTRONICS_LIMIT = 6;
+// Admin edits tend to arrive in bursts; rebuild once they settle
+const REBUILD_DELAY_MS = 1000;
+
+// currency -> { entry, builtAt }
+const bundles = new Map();
+// currency -> Promise<entry> for the build in progress
+const pendingBuilds = new Map();
+// Bumped on every relevant invalidation so a build that raced a mutation is not kept
+let generation = 0;
+const rebuildQueue = new Set();
+let rebuildTimer = null;
+
+// ==============================================
+// 🏗️ BUNDLE BUILDER
+// ==============================================
+const buildHomepage = async (currency) => {
+  const [bannersResult, categoriesResult, featuredResult, electronicsResult] = await Promise.all([
+    bannerService.getAllBanners(),
+    categoryService.getAllCategories(),
+    productService.getFeaturedProducts(FEATURED_LIMIT),
+    productService.getProductsByCategory('electronics', 1, ELECTRONICS_LIMIT)
+  ]);
+
+  const [featuredProducts, electronicsProducts] = await Promise.all([
+    convertProductsPrices(featuredResult.success ? featuredResult.products : [], currency),
+    convertProductsPrices(electronicsResult.success ? electronicsResult.products : [], currency)
+  ]);
+
+  const payload = {
+    success: true,
+    message: `Homepage data retrieved successfully${currency !== 'INR' ? ` with prices in ${currency}` : ''}`,
+    data: {
+      hero_section: {
+        banners: bannersResult.success ? bannersResult.banners.map(withBannerImageVariants) : []
+      },
+      categories_section: {
+        categories: categoriesResult.success ? categoriesResult.categories : []
+      },
+      featured_section: {
+        products: featuredProducts.map(withProductImageVariants)
+      },
+      electronics_section: {
+        products: electronicsProducts.map(withProductImageVariants)
+      }
+    },
+    currency: currency,
+    generated_at: new Date().toISOString()
+  };
+
+  const complete = [bannersResult, categoriesResult, featuredResult, electronicsResult]
+    .every(result => result.success);
+
+  return { payload, complete };
+};
+
+// Single-flight per currency: concurrent misses share one build
+const loadBundle = (currency) => {
+  if (pendingBuilds.has(currency)) {
+    return pendingBuilds.get(currency);
+  }
+
+  const startedGeneration = generation;
+  const build = buildHomepage(currency)
+    .then(({ payload, complete }) => {
+      const entry = createCacheEntry(payload);
+
+      // A bundle with a failed section is served once but never kept
+      if (complete && startedGeneration === generation && environment.responseCache.enabled) {
+        bundles.set(currency, { entry, builtAt: Date.now() });
+      }
+
+      return entry;
+    })
+    .finally(() => {
+      if (pendingBuilds.get(currency) === build) {
+        pendingBuilds.delete(currency);
+      }
+    });
+
+  pendingBuilds.set(currency, build);
+  return build;
+};
+
+const getFreshBundle = (currency) => {
+  const bundle = bundles.get(currency);
+  if (bundle && Date.now() - bundle.builtAt < environment.responseCache.ttlMs) {
+    return bundle;
+  }
+  return null;
+};
+
+// ==============================================
+// 🔄 REBUILD ON CATALOG CHANGES
+// ==============================================
+const scheduleRebuild = (currencies) => {
+  currencies.forEach(currency => rebuildQueue.add(currency));
+
+  if (rebuildQueue.size === 0) {
+    return;
+  }
+
+  if (rebuildTimer) {
+    clearTimeout(rebuildTimer);
+  }
+
+  rebuildTimer = setTimeout(() => {
+    rebuildTimer = null;
+    const queued = [...rebuildQueue];
+    rebuildQueue.clear();
+
+    queued.forEach((currency) => {
+      loadBundle(currency).catch((error) => {
+        console.error(`❌ Homepage rebuild failed for ${currency}:`, error.message);
+      });
+    });
+  }, REBUILD_DELAY_MS);
+
+  rebuildTimer.unref();
+};
+
+onResponseCacheInvalidated((tags) => {
+  if (!tags.some(tag => HOMEPAGE_TAGS.includes(tag))) {
+    return;
+  }
+
+  generation++;
+  // Every currency served so far is rebuilt, so the next visitor still gets a hit
+  const currencies = [...bundles.keys()];
+  bundles.clear();
+  pendingBuilds.clear();
+  scheduleRebuild(currencies);
+});
+
+// ==============================================
+// 🏠 GET HOMEPAGE BUNDLE (WITH DYNAMIC CURRENCY)
+// ==============================================
+router.get('/', async (req, res) => {
+  try {
+    // Unknown codes fall back to INR so the cache holds at most one bundle per supported currency
+    const currency = SUPPORTED_CURRENCIES[req.query.currency] ? req.query.currency : 'INR';
+
+    const bundle = getFreshBundle(currency);
+    if (bundle) {
+      return sendCached(res, bundle.entry, 'HIT');
+    }
+
+    const entry = await loadBundle(currency);
+    return sendCached(res, entry, 'MISS');
+
+  } catch (error) {
+    console.error('❌ Get homepage error:', error.message);
+    res.status(500).json({
+      success: false,
+      message: 'Failed to retrieve homepage data',
+      error: environment.isDevelopment() ? error.message : undefined
+    });
+  }
+});
+
+module.exports = router;
@@ -1,6 +1,7 @@
 const express = require('express');
 const router = express.Router();
 const imageUploadService = require('../services/image-upload-service');
+const { VARIANT_PRESETS, VARIANT_FORMATS } = require('../utils/image-variants');
 
 // ==============================================
 // 🖼️ IMAGE UPLOAD ROUTES
@@ -8,6 +9,7 @@ const imageUploadService = require('../services/image-upload-service');
 
 // Configure multer middleware
 const upload = imageUploadService.getMulterConfig();
+const uploadToDisk = imageUploadService.getMulterConfig({ diskStorage: true });
 
 // 📤 UPLOAD IMAGE FILE
 router.post('/upload', upload.single('image'), async (req, res) => {
@@ -54,12 +56,18 @@ router.post('/upload', upload.single('image'), async (req, res) => {
 });
 
 // 📤 UPLOAD MULTIPLE IMAGE FILES
-router.post('/upload-multiple', upload.array('images', 10), async (req, res) => {
+// Files are spooled to temp storage and processed concurrently (see
+// IMAGE_UPLOAD_CONCURRENCY / IMAGE_UPLOAD_MAX_INFLIGHT_MB). Clients sending
+// `Accept: application/x-ndjson` get one JSON line per file as it finishes,
+// followed by a summary line; everyone else gets the usual single response.
+router.post('/upload-multiple', uploadToDisk.array('images', 10), async (req, res) => {
+  const files = req.files || [];
+  const streamResults = (req.get('Accept') || '').includes('application/x-ndjson');
+
   try {
     const { imageType, width, height } = req.body;
-    const files = req.files;
 
-    if (!files || files.length === 0) {
+    if (files.length === 0) {
       return res.status(400).json({
         success: false,
         message: 'No image files provided'
@@ -75,27 +83,29 @@ router.post('/upload-multiple', upload.array('images', 10), async (req, res) =>
       };
     }
 
-    // Process all files
-    const results = [];
-    const errors = [];
-
-    for (const file of files) {
-      try {
-        const result = await imageUploadService.handleFileUpload(
-          file, 
-          imageType || 'banner', 
-          customDimensions
-        );
-        results.push(result);
-      } catch (error) {
-        errors.push({
-          fileName: file.originalname,
-          error: error.message
-        });
-      }
+    if (streamResults) {
+      res.status(200);
+      res.type('application/x-ndjson');
+      res.flushHeaders();
     }
 
-    res.status(200).json({
+    const fileResults = await imageUploadService.handleMultipleFileUploads(
+      files,
+      imageType || 'banner',
+      customDimensions,
+      (fileResult) => {
+        if (streamResults) {
+          res.write(JSON.stringify({ type: 'file', ...fileResult }) + '\n');
+        }
+      }
+    );
+
+    const results = fileResults.filter(result => result.success).map(result => result.data);
+    const errors = fileResults
+      .filter(result => !result.success)
+      .map(result => ({ fileName: result.fileName, error: result.error }));
+
+    const summary = {
       success: true,
       message: `Processed ${results.length} of ${files.length} images`,
       data: {
@@ -104,9 +114,22 @@ router.post('/upload-multiple', upload.array('images', 10), async (req, res) =>
         totalProcessed: results.length,
         totalFailed: errors.length
       }
-    });
+    };
+
+    if (streamResults) {
+      res.write(JSON.stringify({ type: 'summary', ...summary }) + '\n');
+      return res.end();
+    }
+
+    res.status(200).json(summary);
   } catch (error) {
     console.error('❌ Multiple image upload error:', error);
+
+    if (res.headersSent) {
+      res.write(JSON.stringify({ type: 'error', success: false, message: 'Failed to upload images', error: error.message }) + '\n');
+      return res.end();
+    }
+
     res.status(500).json({
       success: false,
       message: 'Failed to upload images',
@@ -127,16 +150,6 @@ router.post('/from-url', async (req, res) => {
       });
     }
 
-    // Validate URL first
-    const validation = await imageUploadService.validateImageUrl(imageUrl);
-    if (!validation.valid) {
-      return res.status(400).json({
-        success: false,
-        message: 'Invalid image URL or unsupported image type',
-        details: validation
-      });
-    }
-
     // Parse custom dimensions if provided
     let customDimensions = null;
     if (width && height) {
@@ -146,6 +159,19 @@ router.post('/from-url', async (req, res) => {
       };
     }
 
+    // Validate URL first (cached imports need no network round-trip at all)
+    const cached = await imageUploadService.isUrlImportCached(imageUrl, imageType || 'banner', customDimensions);
+    if (!cached) {
+      const validation = await imageUploadService.validateImageUrl(imageUrl);
+      if (!validation.valid) {
+        return res.status(400).json({
+          success: false,
+          message: 'Invalid image URL or unsupported image type',
+          details: validation
+        });
+      }
+    }
+
     // Process image from URL
     const result = await imageUploadService.handleImageFromUrl(
       imageUrl, 
@@ -234,6 +260,81 @@ router.delete('/delete', async (req, res) => {
   }
 });
 
+// 📐 RESIZE IMAGE ON DEMAND
+// GET /api/images/resize?src=<image url>&w=<width>&fmt=<avif|webp|jpeg|auto>
+// Only successful responses are cacheable; every error goes out as no-store
+const RESIZE_CACHE_CONTROL = 'public, max-age=31536000, immutable';
+
+router.get('/resize', async (req, res) => {
+  res.set('Cache-Control', 'no-store');
+
+  try {
+    const { src } = req.query;
+    const requestedWidth = parseInt(req.query.w);
+    const requestedFormat = (req.query.fmt || 'auto').toLowerCase();
+
+    if (!src || !imageUploadService.isResizeSourceAllowed(src)) {
+      return res.status(400).json({
+        success: false,
+        message: 'A src URL from an allowed image host is required'
+      });
+    }
+
+    if (!Number.isInteger(requestedWidth) || requestedWidth < 1) {
+      return res.status(400).json({
+        success: false,
+        message: 'w must be a positive integer'
+      });
+    }
+
+    let format = requestedFormat === 'jpg' ? 'jpeg' : requestedFormat;
+    if (format === 'auto') {
+      // Best format the browser accepts; the response then varies by Accept
+      const accept = req.get('Accept') || '';
+      format = ['avif', 'webp'].find(candidate => accept.includes(`image/${candidate}`)) || 'jpeg';
+      res.set('Vary', 'Accept');
+    } else if (!VARIANT_FORMATS[format]) {
+      return res.status(400).json({
+        success: false,
+        message: `Unsupported format: ${requestedFormat}. Use one of: ${Object.keys(VARIANT_FORMATS).join(', ')}, auto`
+      });
+    }
+
+    // The same (src, w, fmt) always yields the same bytes
+    const etag = `"${imageUploadService.getResizeKey(src, requestedWidth, format).key}"`;
+
+    if (req.get('If-None-Match') === etag) {
+      res.set('Cache-Control', RESIZE_CACHE_CONTROL);
+      res.set('ETag', etag);
+      return res.status(304).end();
+    }
+
+    const resized = await imageUploadService.openResizedImage(src, requestedWidth, format);
+    res.set('Cache-Control', RESIZE_CACHE_CONTROL);
+    res.set('ETag', etag);
+    res.set('X-Cache', resized.cached ? 'HIT' : 'MISS');
+    res.set('Content-Length', String(resized.size));
+    res.type(resized.contentType);
+
+    // Streams from the open handle (closed when the stream ends or fails)
+    const stream = resized.handle.createReadStream();
+    stream.on('error', (error) => {
+      console.error('❌ Resized image send error:', error.message);
+      res.destroy(error);
+    });
+    // A client that goes away must not leave the handle open
+    res.on('close', () => stream.destroy());
+    stream.pipe(res);
+  } catch (error) {
+    console.error('❌ Image resize error:', error.message);
+    res.status(502).json({
+      success: false,
+      message: 'Failed to resize image',
+      error: error.message
+    });
+  }
+});
+
 // 📊 GET UPLOAD INFO
 router.get('/info', (req, res) => {
   try {
@@ -254,7 +355,9 @@ router.get('/info', (req, res) => {
         maxFileSize: imageUploadService.maxFileSize,
         maxFileSizeMB: Math.round(imageUploadService.maxFileSize / 1024 / 1024),
         optimalDimensions: dimensions,
-        supportedImageTypes: ['banner', 'hero', 'category', 'product', 'thumbnail', 'featured']
+        supportedImageTypes: ['banner', 'hero', 'category', 'product', 'thumbnail', 'featured'],
+        variantPresets: VARIANT_PRESETS,
+        variantFormats: Object.keys(VARIANT_FORMATS)
       }
     });
   } catch (error) {
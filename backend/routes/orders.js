@@ -6,71 +6,11 @@ const express = require('express');
 const jwt = require('jsonwebtoken');
 const { v4: uuidv4 } = require('uuid');
 const { environment } = require('../config/environment');
-const { orderService, getSupabaseClient } = require('../services/supabase-service');
-const AutoSyncMiddleware = require('../middleware/auto-sync-middleware');
+const { orderService } = require('../services/supabase-service');
+const { authenticateSupabaseToken } = require('../middleware/supabase-auth');
 
 const router = express.Router();
 
-// ==============================================
-// 🔒 SUPABASE AUTHENTICATION MIDDLEWARE
-// ==============================================
-async function authenticateSupabaseToken(req, res, next) {
-  try {
-    const authHeader = req.headers['authorization'];
-    const token = authHeader && authHeader.split(' ')[1];
-
-    if (!token) {
-      return res.status(401).json({
-        success: false,
-        message: 'Access token is required'
-      });
-    }
-
-    const client = getSupabaseClient();
-    
-    // Verify Supabase token and get user
-    const { data: { user }, error } = await client.auth.getUser(token);
-    
-    if (error || !user) {
-      return res.status(403).json({
-        success: false,
-        message: 'Invalid or expired token'
-      });
-    }
-
-    // Auto-sync user to local database
-    const syncResult = await AutoSyncMiddleware.syncSupabaseUser(
-      user.id, 
-      user.email,
-      {
-        email_verified: user.email_confirmed_at ? true : false,
-        phone: user.phone,
-        user_metadata: user.user_metadata
-      }
-    );
-
-    if (syncResult.success) {
-      // Attach synced user to request object
-      req.user = { userId: user.id, email: user.email };
-      req.syncedUser = syncResult.user;
-      req.supabaseUser = user;
-    } else {
-      return res.status(500).json({
-        success: false,
-        message: 'User synchronization failed'
-      });
-    }
-
-    next();
-  } catch (error) {
-    console.error('❌ Supabase auth middleware error:', error);
-    return res.status(500).json({
-      success: false,
-      message: 'Authentication error'
-    });
-  }
-}
-
 // ==============================================
 // 📋 GET USER'S ORDERS
 // ==============================================
@@ -79,8 +19,9 @@ router.get('/', authenticateSupabaseToken, async (req, res) => {
     const userId = req.user.userId;
     const page = parseInt(req.query.page) || 1;
     const limit = parseInt(req.query.limit) || 10;
+    const cursor = req.query.cursor || null; // Keyset pagination (takes precedence over page)
 
-    const result = await orderService.getUserOrders(userId, page, limit);
+    const result = await orderService.getUserOrders(userId, page, limit, cursor);
 
     if (!result.success) {
       return res.status(400).json({
@@ -97,7 +38,9 @@ router.get('/', authenticateSupabaseToken, async (req, res) => {
         currentPage: result.currentPage,
         totalPages: result.totalPages,
         totalCount: result.totalCount,
-        limit: limit
+        limit: limit,
+        nextCursor: result.nextCursor,
+        hasMore: result.hasMore
       }
     });
 
@@ -157,7 +100,8 @@ router.post('/', authenticateSupabaseToken, async (req, res) => {
     if (!result.success) {
       return res.status(400).json({
         success: false,
-        message: result.error
+        message: result.error,
+        ...(result.itemErrors && { itemErrors: result.itemErrors })
       });
     }
 
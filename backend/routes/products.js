@@ -6,91 +6,23 @@
 const express = require('express');
 const { environment } = require('../config/environment');
 const { productService } = require('../services/supabase-service');
-const { convertPrice, getCurrencySymbol, formatPrice } = require('../services/currency-service');
+const { convertProductPrices, convertProductsPrices } = require('../utils/product-currency');
+const { withProductImageVariants } = require('../utils/image-variants');
+const { cacheResponse } = require('../middleware/response-cache');
 
 const router = express.Router();
 
-// ==============================================
-// 💰 HELPER FUNCTION: CONVERT PRODUCT PRICES
-// ==============================================
-async function convertProductPrices(product, targetCurrency = 'INR') {
-  if (!product) {
-    return product;
-  }
-  
-  // Handle INR currency (base currency) - add metadata without conversion
-  if (targetCurrency === 'INR') {
-    return {
-      ...product,
-      currency: 'INR',
-      currency_symbol: getCurrencySymbol('INR'),
-      formatted_price: formatPrice(product.price, 'INR'),
-      base_currency: 'INR',
-      base_price: product.price
-    };
-  }
-  
-  try {
-    const convertedProduct = { ...product };
-    
-    // Convert main price fields
-    if (product.price) {
-      convertedProduct.price = await convertPrice(product.price, 'INR', targetCurrency);
-    }
-    
-    if (product.original_price) {
-      convertedProduct.original_price = await convertPrice(product.original_price, 'INR', targetCurrency);
-    }
-    
-    // Add currency metadata
-    convertedProduct.currency = targetCurrency;
-    convertedProduct.currency_symbol = getCurrencySymbol(targetCurrency);
-    convertedProduct.formatted_price = formatPrice(convertedProduct.price, targetCurrency);
-    convertedProduct.base_currency = 'INR';
-    convertedProduct.base_price = product.price;
-    
-    return convertedProduct;
-  } catch (error) {
-    console.error('❌ Error converting product prices:', error);
-    // Return original product with error note if conversion fails
-    return {
-      ...product,
-      currency_conversion_error: 'Unable to convert to requested currency',
-      currency: 'INR'
-    };
-  }
-}
-
-// ==============================================
-// 💰 HELPER FUNCTION: CONVERT MULTIPLE PRODUCTS
-// ==============================================
-async function convertProductsPrices(products, targetCurrency = 'INR') {
-  if (!products || !Array.isArray(products)) {
-    return products;
-  }
-  
-  try {
-    const convertedProducts = await Promise.all(
-      products.map(product => convertProductPrices(product, targetCurrency))
-    );
-    
-    return convertedProducts;
-  } catch (error) {
-    console.error('❌ Error converting multiple products prices:', error);
-    return products; // Return original products if conversion fails
-  }
-}
-
 // ==============================================
 // 📦 GET ALL PRODUCTS (WITH DYNAMIC CURRENCY)
 // ==============================================
-router.get('/', async (req, res) => {
+router.get('/', cacheResponse('products'), async (req, res) => {
   try {
     const page = parseInt(req.query.page) || 1;
     const limit = parseInt(req.query.limit) || 20;
     const currency = req.query.currency || 'INR'; // NEW: Support currency parameter
+    const cursor = req.query.cursor || null; // Keyset pagination (takes precedence over page)
 
-    const result = await productService.getAllProducts(page, limit);
+    const result = await productService.getAllProducts(page, limit, cursor);
 
     if (!result.success) {
       return res.status(400).json({
@@ -105,13 +37,15 @@ router.get('/', async (req, res) => {
     res.status(200).json({
       success: true,
       message: `Products retrieved successfully${currency !== 'INR' ? ` with prices in ${currency}` : ''}`,
-      data: convertedProducts,
+      data: convertedProducts.map(withProductImageVariants),
       currency: currency, // NEW: Include currency info
       pagination: {
         currentPage: result.currentPage,
         totalPages: result.totalPages,
         totalCount: result.totalCount,
-        limit: limit
+        limit: limit,
+        nextCursor: result.nextCursor,
+        hasMore: result.hasMore
       }
     });
 
@@ -148,7 +82,7 @@ router.get('/:id', async (req, res) => {
     res.status(200).json({
       success: true,
       message: `Product retrieved successfully${currency !== 'INR' ? ` with prices in ${currency}` : ''}`,
-      data: convertedProduct,
+      data: withProductImageVariants(convertedProduct),
       currency: currency // NEW: Include currency info
     });
 
@@ -171,8 +105,9 @@ router.get('/category/:slug', async (req, res) => {
     const page = parseInt(req.query.page) || 1;
     const limit = parseInt(req.query.limit) || 20;
     const currency = req.query.currency || 'INR'; // NEW: Support currency parameter
+    const cursor = req.query.cursor || null; // Keyset pagination (takes precedence over page)
 
-    const result = await productService.getProductsByCategory(categorySlug, page, limit);
+    const result = await productService.getProductsByCategory(categorySlug, page, limit, cursor);
 
     if (!result.success) {
       return res.status(404).json({
@@ -187,14 +122,16 @@ router.get('/category/:slug', async (req, res) => {
     res.status(200).json({
       success: true,
       message: `Products for category '${categorySlug}' retrieved successfully${currency !== 'INR' ? ` with prices in ${currency}` : ''}`,
-      data: convertedProducts,
+      data: convertedProducts.map(withProductImageVariants),
       category: result.category,
       currency: currency, // NEW: Include currency info
       pagination: {
         currentPage: result.currentPage,
         totalPages: result.totalPages,
         totalCount: result.totalCount,
-        limit: limit
+        limit: limit,
+        nextCursor: result.nextCursor,
+        hasMore: result.hasMore
       }
     });
 
@@ -219,13 +156,15 @@ router.get('/search/:query', async (req, res) => {
     const category = req.query.category;
     const sortBy = req.query.sortBy;
     const currency = req.query.currency || 'INR';
+    const cursor = req.query.cursor || null; // Keyset pagination, newest-first
 
     // Use the new search method from productService
     const result = await productService.searchProducts(searchQuery, {
       page,
       limit,
       category,
-      sortBy
+      sortBy,
+      cursor
     });
 
     if (!result.success) {
@@ -237,33 +176,11 @@ router.get('/search/:query', async (req, res) => {
     }
 
     // Apply currency conversion if needed
-    const convertedProducts = await Promise.all(
-      result.products.map(async (product) => {
-        try {
-          if (currency !== 'INR') {
-            const convertedPrice = await currencyService.convertPrice(product.price, 'INR', currency);
-            const convertedOriginalPrice = product.original_price 
-              ? await currencyService.convertPrice(product.original_price, 'INR', currency)
-              : null;
-
-            return {
-              ...product,
-              price: convertedPrice,
-              original_price: convertedOriginalPrice,
-              currency: currency
-            };
-          }
-          return { ...product, currency: 'INR' };
-        } catch (conversionError) {
-          console.warn(`⚠️ Currency conversion failed for product ${product.id}:`, conversionError.message);
-          return { ...product, currency: 'INR' };
-        }
-      })
-    );
+    const convertedProducts = await convertProductsPrices(result.products, currency);
 
     res.status(200).json({
       success: true,
-      data: convertedProducts,
+      data: convertedProducts.map(withProductImageVariants),
       searchQuery: result.searchQuery,
       category: result.category,
       sortBy: result.sortBy,
@@ -285,7 +202,7 @@ router.get('/search/:query', async (req, res) => {
 // ==============================================
 // ⭐ GET FEATURED PRODUCTS (WITH DYNAMIC CURRENCY)
 // ==============================================
-router.get('/featured/list', async (req, res) => {
+router.get('/featured/list', cacheResponse('products'), async (req, res) => {
   try {
     const limit = parseInt(req.query.limit) || 10;
     const currency = req.query.currency || 'INR'; // NEW: Support currency parameter
@@ -308,7 +225,7 @@ router.get('/featured/list', async (req, res) => {
     res.status(200).json({
       success: true,
       message: `Featured products retrieved successfully${currency !== 'INR' ? ` with prices in ${currency}` : ''}`,
-      data: convertedProducts,
+      data: convertedProducts.map(withProductImageVariants),
       currency: currency, // NEW: Include currency info
       limit: limit
     });
@@ -464,7 +381,7 @@ router.get('/:id/related', async (req, res) => {
     res.status(200).json({
       success: true,
       message: `Related products retrieved successfully${currency !== 'INR' ? ` with prices in ${currency}` : ''}`,
-      data: convertedProducts,
+      data: convertedProducts.map(withProductImageVariants),
       currency: currency,
       total: result.products.length
     });
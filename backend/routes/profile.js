@@ -12,144 +12,22 @@ const {
   cartService,
   getSupabaseClient 
 } = require('../services/supabase-service');
-const AutoSyncMiddleware = require('../middleware/auto-sync-middleware');
+const { authenticateSupabaseToken } = require('../middleware/supabase-auth');
 
 const router = express.Router();
 
-// ==============================================
-// 🔒 SUPABASE AUTHENTICATION MIDDLEWARE
-// ==============================================
-async function authenticateSupabaseToken(req, res, next) {
-  try {
-    const authHeader = req.headers['authorization'];
-    const token = authHeader && authHeader.split(' ')[1];
-
-    if (!token) {
-      return res.status(401).json({
-        success: false,
-        message: 'Access token is required'
-      });
-    }
-
-    const client = getSupabaseClient();
-    
-    // Verify Supabase token and get user
-    const { data: { user }, error } = await client.auth.getUser(token);
-    
-    if (error || !user) {
-      return res.status(403).json({
-        success: false,
-        message: 'Invalid or expired token'
-      });
-    }
-
-    // Auto-sync user to local database
-    const syncResult = await AutoSyncMiddleware.syncSupabaseUser(
-      user.id, 
-      user.email,
-      {
-        email_verified: user.email_confirmed_at ? true : false,
-        phone: user.phone,
-        user_metadata: user.user_metadata
-      }
-    );
-
-    if (syncResult.success) {
-      // Attach synced user to request object
-      req.user = { userId: user.id, email: user.email };
-      req.syncedUser = syncResult.user;
-      req.supabaseUser = user;
-    } else {
-      return res.status(500).json({
-        success: false,
-        message: 'User synchronization failed'
-      });
-    }
-
-    next();
-  } catch (error) {
-    console.error('❌ Supabase auth middleware error:', error);
-    return res.status(500).json({
-      success: false,
-      message: 'Authentication error'
-    });
-  }
-}
-
 // ==============================================
 // 📊 DASHBOARD STATISTICS
 // ==============================================
 router.get('/dashboard', authenticateSupabaseToken, async (req, res) => {
   try {
     const userId = req.user.userId;
-    const client = getSupabaseClient();
-
-    // Get user info
-    const { data: user, error: userError } = await client
-      .from('users')
-      .select('full_name, created_at')
-      .eq('id', userId)
-      .single();
-
-    if (userError) throw userError;
-
-    // Get order statistics
-    const { data: orders, error: ordersError } = await client
-      .from('orders')
-      .select('status, total_amount')
-      .eq('user_id', userId);
-
-    if (ordersError) throw ordersError;
-
-    // Get cart items count
-    const { data: cartItems, error: cartError } = await client
-      .from('cart_items')
-      .select('id, carts!inner(user_id)')
-      .eq('carts.user_id', userId);
-
-    if (cartError) {
-      console.warn('Cart items fetch failed:', cartError.message);
-    }
-
-    // Get wishlist count
-    const { data: wishlistItems, error: wishlistError } = await client
-      .from('user_wishlist')
-      .select('id')
-      .eq('user_id', userId);
 
-    if (wishlistError) {
-      console.warn('Wishlist fetch failed:', wishlistError.message);
-    }
-
-    // Calculate statistics
-    const totalOrders = orders?.length || 0;
-    const activeDeliveries = orders?.filter(o => ['processing', 'shipped'].includes(o.status)).length || 0;
-    const completedOrders = orders?.filter(o => o.status === 'delivered').length || 0;
-    const totalSpent = orders?.reduce((sum, order) => sum + parseFloat(order.total_amount || 0), 0) || 0;
-    const cartItemsCount = cartItems?.length || 0;
-    const wishlistCount = wishlistItems?.length || 0;
-
-    // Get recent orders
-    const { data: recentOrders, error: recentOrdersError } = await client
-      .from('orders')
-      .select(`
-        id,
-        order_number,
-        status,
-        total_amount,
-        created_at,
-        order_items!inner (
-          product_name,
-          quantity,
-          unit_price
-        )
-      `)
-      .eq('user_id', userId)
-      .order('created_at', { ascending: false })
-      .limit(5);
+    // Counts, total spent and recent orders are aggregated in one database call
+    const result = await userService.getDashboardSummary(userId);
 
-    if (recentOrdersError) {
-      console.warn('Recent orders fetch failed:', recentOrdersError.message);
+    if (!result.success) {
+      throw new Error(result.error);
     }
 
     res.status(200).json({
@@ -157,18 +35,11 @@ router.get('/dashboard', authenticateSupabaseToken, async (req, res) => {
       message: 'Dashboard data retrieved successfully',
       data: {
         user: {
-          name: user?.full_name || 'User',
-          memberSince: user?.created_at || new Date().toISOString()
-        },
-        stats: {
-          totalOrders,
-          activeDeliveries,
-          completedOrders,
-          totalSpent: Math.round(totalSpent * 100) / 100,
-          cartItems: cartItemsCount,
-          wishlistItems: wishlistCount
+          name: result.user?.full_name || 'User',
+          memberSince: result.user?.created_at || new Date().toISOString()
         },
-        recentOrders: recentOrders || []
+        stats: result.stats,
+        recentOrders: result.recentOrders
       }
     });
 
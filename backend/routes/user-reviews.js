@@ -61,8 +61,9 @@ router.get('/product/:productId', async (req, res) => {
     const productId = req.params.productId;
     const page = parseInt(req.query.page) || 1;
     const limit = parseInt(req.query.limit) || 10;
+    const cursor = req.query.cursor || null; // Keyset pagination (takes precedence over page)
 
-    const result = await userReviewService.getReviewsByProduct(productId, page, limit);
+    const result = await userReviewService.getReviewsByProduct(productId, page, limit, cursor);
 
     if (!result.success) {
       return res.status(400).json({
@@ -79,7 +80,9 @@ router.get('/product/:productId', async (req, res) => {
         currentPage: result.currentPage,
         totalPages: result.totalPages,
         totalCount: result.totalCount,
-        limit: limit
+        limit: limit,
+        nextCursor: result.nextCursor,
+        hasMore: result.hasMore
       },
       stats: result.stats
     });
@@ -0,0 +1,45 @@
+// RitZone Image Garbage Collection Job
+// ==============================================
+// Deletes stored image variant sets that no product, banner, category or
+// review has referenced for longer than the grace period
+// Usage: node scripts/gc-images.js [--grace-hours=24] [--batch-size=50]
+
+const imageUploadService = require('../services/image-upload-service');
+
+const readOption = (name, fallback) => {
+  const arg = process.argv.find(value => value.startsWith(`--${name}=`));
+  const parsed = arg ? parseInt(arg.split('=')[1], 10) : NaN;
+  return Number.isFinite(parsed) && parsed >= 0 ? parsed : fallback;
+};
+
+async function gcImages({ graceHours = 24, batchSize = 50 } = {}) {
+  console.log(`🧹 Collecting images unreferenced for more than ${graceHours}h...`);
+
+  const result = await imageUploadService.collectOrphanedImages({ graceHours, batchSize });
+
+  if (!result.success) {
+    throw new Error(result.error);
+  }
+
+  if (result.errors.length > 0) {
+    console.warn(`⚠️ ${result.errors.length} storage error(s):`, result.errors);
+  }
+
+  console.log(`✅ Removed ${result.deletedImages} image set(s) (${result.deletedFiles} file(s))`);
+  return result;
+}
+
+// Run the job if this file is executed directly
+if (require.main === module) {
+  gcImages({
+    graceHours: readOption('grace-hours', 24),
+    batchSize: Math.max(1, readOption('batch-size', 50))
+  })
+    .then(() => process.exit(0))
+    .catch((error) => {
+      console.error('❌ Image garbage collection failed:', error.message);
+      process.exit(1);
+    });
+}
+
+module.exports = { gcImages };
@@ -0,0 +1,35 @@
+// RitZone Related Products Refresh Job
+// ==============================================
+// Recomputes the precomputed product_related neighbour lists
+// Usage: node scripts/refresh-related-products.js [--full]
+//   (default) only products queued by the products trigger since the last run
+//   --full    every active product (initial population / nightly rebuild)
+
+const { productService } = require('../services/supabase-service');
+
+async function refreshRelatedProducts(full = false) {
+  console.log(`🔗 Refreshing related products${full ? ' (full rebuild)' : ' (queued products)'}...`);
+
+  const result = await productService.refreshRelatedProducts({ full });
+
+  if (!result.success) {
+    throw new Error(result.error);
+  }
+
+  console.log(`✅ Wrote ${result.written} related product row(s)`);
+  return result;
+}
+
+// Run the job if this file is executed directly
+if (require.main === module) {
+  const full = process.argv.includes('--full');
+
+  refreshRelatedProducts(full)
+    .then(() => process.exit(0))
+    .catch((error) => {
+      console.error('❌ Related products refresh failed:', error.message);
+      process.exit(1);
+    });
+}
+
+module.exports = { refreshRelatedProducts };
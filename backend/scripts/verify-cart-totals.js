@@ -0,0 +1,51 @@
+// RitZone Cart Total Consistency Checker
+// ==============================================
+// Compares carts.total_amount with the sum of each cart's items
+// Usage: node scripts/verify-cart-totals.js [--repair]
+
+const { cartService } = require('../services/supabase-service');
+
+async function verifyCartTotals(repair = false) {
+  console.log(`🔍 Checking cart totals${repair ? ' (repair mode)' : ''}...`);
+
+  const result = await cartService.verifyCartTotals(repair);
+
+  if (!result.success) {
+    throw new Error(result.error);
+  }
+
+  if (result.mismatches.length === 0) {
+    console.log('✅ All cart totals are consistent');
+    return result;
+  }
+
+  console.log(`⚠️  Found ${result.mismatches.length} cart(s) with inconsistent totals:`);
+  result.mismatches.forEach(mismatch => {
+    console.log(`   - ${mismatch.cart_id}: stored ${mismatch.stored_total}, items sum ${mismatch.computed_total}`);
+  });
+
+  if (repair) {
+    console.log(`🔧 Repaired ${result.mismatches.length} cart total(s)`);
+  } else {
+    console.log('💡 Run with --repair to fix them');
+  }
+
+  return result;
+}
+
+// Run the check if this file is executed directly
+if (require.main === module) {
+  const repair = process.argv.includes('--repair');
+
+  verifyCartTotals(repair)
+    .then((result) => {
+      // Non-zero exit in check mode lets this run as a scheduled health check
+      process.exit(!repair && result.mismatches.length > 0 ? 2 : 0);
+    })
+    .catch((error) => {
+      console.error('❌ Cart total check failed:', error.message);
+      process.exit(1);
+    });
+}
+
+module.exports = { verifyCartTotals };
@@ -11,7 +11,9 @@ const path = require('path');
 
 // Import environment configuration
 const { environment, validateEnvironment, getEnvironmentInfo } = require('./config/environment');
-const { initializeSupabase, testConnection } = require('./services/supabase-service');
+const { initializeSupabase, testConnection, categoryService } = require('./services/supabase-service');
+const { startExchangeRateRefresher } = require('./services/currency-service');
+const { adminDashboardService } = require('./services/admin-service');
 
 // Import route handlers
 const authRoutes = require('./routes/auth');
@@ -29,6 +31,7 @@ const adminHomepageRoutes = require('./routes/admin-homepage');
 const autoSyncRoutes = require('./routes/auto-sync');
 const imageUploadRoutes = require('./routes/image-upload');
 const userReviewRoutes = require('./routes/user-reviews');
+const homepageRoutes = require('./routes/homepage');
 
 // Import auto-sync middleware
 const AutoSyncMiddleware = require('./middleware/auto-sync-middleware');
@@ -126,6 +129,7 @@ app.use('/api/admin/homepage', adminHomepageRoutes);
 app.use('/api/auto-sync', autoSyncRoutes);
 app.use('/api/images', imageUploadRoutes);
 app.use('/api/reviews', userReviewRoutes);
+app.use('/api/homepage', homepageRoutes);
 
 // ==============================================
 // 🔍 ROOT ENDPOINT
@@ -215,6 +219,15 @@ const startServer = async () => {
       throw new Error(`Database connection failed: ${connectionResult.message}`);
     }
 
+    // Warm the category index used by category pages and filtered search
+    await categoryService.refreshCategoryIndex();
+
+    // Keep exchange rates warm so requests never wait on the rate APIs
+    startExchangeRateRefresher();
+
+    // Dashboard metrics are recomputed on a schedule, not per dashboard load
+    adminDashboardService.startMetricsRefresher();
+
     // Start server
     const server = app.listen(environment.server.port, environment.server.host, () => {
       console.log('\n' + '='.repeat(60));
@@ -4,7 +4,7 @@
 
 const bcrypt = require('bcryptjs');
 const jwt = require('jsonwebtoken');
-const { getSupabaseClient } = require('./supabase-service');
+const { getSupabaseClient, getAdminSupabaseClient, isMissingFunctionError } = require('./supabase-service');
 const { environment } = require('../config/environment');
 
 // ==============================================
@@ -289,26 +289,40 @@ const adminAuthService = {
 // ==============================================
 // 📊 ADMIN DASHBOARD SERVICE
 // ==============================================
+const DASHBOARD_METRIC_NAMES = [
+  'total_users', 'total_products', 'total_orders',
+  'monthly_revenue', 'pending_orders', 'low_stock_products'
+];
+
+let metricsRefreshTimer = null;
+
 const adminDashboardService = {
   // Get dashboard stats
   getDashboardStats: async () => {
     try {
       const client = getSupabaseClient();
       
-      // Refresh metrics first
-      await client.rpc('refresh_dashboard_metrics');
-      
-      // Get dashboard metrics
-      const { data: metrics, error: metricsError } = await client
+      // Metrics are refreshed by startMetricsRefresher, not on every dashboard load.
+      // Read the most recent snapshot of each metric (today's, or the last one written).
+      const { data: rows, error: metricsError } = await client
         .from('dashboard_analytics')
         .select('*')
-        .eq('metric_date', new Date().toISOString().split('T')[0])
-        .order('metric_name');
+        .order('metric_date', { ascending: false })
+        .limit(DASHBOARD_METRIC_NAMES.length * 2);
 
       if (metricsError) {
         console.warn('⚠️ Failed to fetch dashboard metrics:', metricsError.message);
       }
 
+      const seen = new Set();
+      const metrics = (rows || []).filter(metric => {
+        if (seen.has(metric.metric_name)) {
+          return false;
+        }
+        seen.add(metric.metric_name);
+        return true;
+      });
+
       // Transform metrics into dashboard format
       const stats = {
         totalUsers: 0,
@@ -408,6 +422,37 @@ const adminDashboardService = {
 
   // Get sales chart data
   getSalesChart: async (days = 30) => {
+    try {
+      const client = getAdminSupabaseClient();
+
+      // Served from the daily_sales rollup, zero-filled per day in SQL
+      const { data: rows, error } = await client.rpc('get_sales_chart', { p_days: days });
+
+      if (error) {
+        if (isMissingFunctionError(error)) {
+          console.warn('⚠️  get_sales_chart RPC not installed, using fallback:', error.message);
+          return await adminDashboardService.getSalesChartFallback(days);
+        }
+        throw error;
+      }
+
+      const chartData = (rows || []).map(row => ({
+        date: row.sales_date,
+        sales: parseFloat(row.sales),
+        orders: row.order_count,
+        cancelled: row.cancelled_count
+      }));
+
+      return { success: true, chartData };
+
+    } catch (error) {
+      console.error('❌ Get sales chart failed:', error.message);
+      return { success: false, error: error.message };
+    }
+  },
+
+  // Legacy chart grouped from raw orders (used until migration-daily-sales.sql is applied)
+  getSalesChartFallback: async (days = 30) => {
     try {
       const client = getSupabaseClient();
       
@@ -439,6 +484,36 @@ const adminDashboardService = {
       console.error('❌ Get sales chart failed:', error.message);
       return { success: false, error: error.message };
     }
+  },
+
+  // Recompute dashboard_analytics (run on a timer, see startMetricsRefresher)
+  refreshDashboardMetrics: async () => {
+    try {
+      const client = getAdminSupabaseClient();
+      const { error } = await client.rpc('refresh_dashboard_metrics');
+
+      if (error) throw error;
+      return { success: true };
+
+    } catch (error) {
+      console.error('❌ Refresh dashboard metrics failed:', error.message);
+      return { success: false, error: error.message };
+    }
+  },
+
+  // Refresh dashboard metrics in the background instead of on every dashboard load
+  startMetricsRefresher: () => {
+    if (metricsRefreshTimer) {
+      return;
+    }
+
+    const intervalMs = environment.dashboard.metricsRefreshIntervalMs;
+    adminDashboardService.refreshDashboardMetrics();
+    metricsRefreshTimer = setInterval(adminDashboardService.refreshDashboardMetrics, intervalMs);
+    // Don't keep the process alive just for the refresher
+    metricsRefreshTimer.unref();
+
+    console.log(`⏱️ Dashboard metrics refresher started (every ${Math.round(intervalMs / 60000)} minutes)`);
   }
 };
 
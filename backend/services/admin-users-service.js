@@ -3,8 +3,32 @@
 // Service layer for advanced user management and order tracking
 
 const { v4: uuidv4 } = require('uuid');
-const { getSupabaseClient } = require('./supabase-service');
+const { getSupabaseClient, getAdminSupabaseClient, isMissingFunctionError } = require('./supabase-service');
 const { adminActivityService } = require('./admin-service');
+const AutoSyncMiddleware = require('../middleware/auto-sync-middleware');
+const { applyCursor, buildPage } = require('../utils/pagination');
+
+// Fields an admin may change on a user (single and bulk updates)
+const USER_UPDATABLE_FIELDS = [
+  'full_name', 'phone', 'address', 'city', 'state', 'country', 'postal_code',
+  'is_active', 'email_verified', 'profile_image_url'
+];
+
+// Ids per `in('id', …)` statement in bulk operations (keeps request URLs well under proxy limits)
+const BULK_BATCH_SIZE = 150;
+
+const chunkIds = (ids) => {
+  const chunks = [];
+  for (let i = 0; i < ids.length; i += BULK_BATCH_SIZE) {
+    chunks.push(ids.slice(i, i + BULK_BATCH_SIZE));
+  }
+  return chunks;
+};
+
+// The stats cards are polled by every open admin panel; a short TTL keeps
+// them to one aggregate query per window
+const USER_STATS_TTL_MS = 30 * 1000;
+let userStatsCache = null;
 
 // ==============================================
 // 👥 USER MANAGEMENT SERVICE
@@ -19,9 +43,15 @@ const adminUsersService = {
         search = '',
         sortBy = 'created_at',
         sortOrder = 'desc',
-        status = 'all'
+        status = 'all',
+        cursor = null
       } = options;
 
+      // Cursors are (created_at, id) positions, so they only apply to the created_at sort
+      if (cursor && sortBy !== 'created_at') {
+        return { success: false, error: 'Cursor pagination requires sortBy=created_at' };
+      }
+
       const client = getSupabaseClient();
       const offset = (page - 1) * limit;
 
@@ -39,7 +69,7 @@ const adminUsersService = {
           email_verified,
           last_login_at,
           profile_image_url
-        `, { count: 'exact' });
+        `, { count: cursor ? 'planned' : 'estimated' });
 
       // Apply search filter
       if (search) {
@@ -59,38 +89,25 @@ const adminUsersService = {
         }
       }
 
-      // Apply sorting and pagination
-      query = query
-        .order(sortBy, { ascending: sortOrder === 'asc' })
-        .range(offset, offset + limit - 1);
+      // Apply sorting and pagination (id breaks created_at ties so pages stay stable)
+      if (cursor) {
+        query = applyCursor(query, cursor, limit, sortOrder === 'asc');
+      } else {
+        query = query
+          .order(sortBy, { ascending: sortOrder === 'asc' })
+          .order('id', { ascending: sortOrder === 'asc' })
+          .range(offset, offset + limit - 1);
+      }
 
-      const { data: users, error: usersError, count } = await query;
+      const { data: rows, error: usersError, count } = await query;
 
       if (usersError) throw usersError;
 
-      // Get order counts for each user
-      const userIds = users.map(user => user.id);
-      const { data: orderCounts, error: orderError } = await client
-        .from('orders')
-        .select('user_id, status')
-        .in('user_id', userIds);
-
-      if (orderError) {
-        console.warn('Failed to fetch order counts:', orderError.message);
-      }
+      const pageInfo = buildPage(rows, { page, limit, cursor, count });
+      const users = pageInfo.items;
 
-      // Aggregate order counts
-      const orderStats = {};
-      if (orderCounts) {
-        orderCounts.forEach(order => {
-          if (!orderStats[order.user_id]) {
-            orderStats[order.user_id] = { total: 0, pending: 0, completed: 0 };
-          }
-          orderStats[order.user_id].total++;
-          if (order.status === 'pending') orderStats[order.user_id].pending++;
-          if (order.status === 'delivered') orderStats[order.user_id].completed++;
-        });
-      }
+      // Get order counts for each user (grouped in the database)
+      const orderStats = await adminUsersService.getOrderCountsByUser(users.map(user => user.id));
 
       // Attach order stats to users
       const enrichedUsers = users.map(user => ({
@@ -101,10 +118,12 @@ const adminUsersService = {
       return {
         success: true,
         users: enrichedUsers,
-        currentPage: page,
-        totalPages: Math.ceil(count / limit),
-        totalUsers: count,
-        limit
+        currentPage: pageInfo.currentPage,
+        totalPages: pageInfo.totalPages,
+        totalUsers: pageInfo.totalCount,
+        limit,
+        nextCursor: sortBy === 'created_at' ? pageInfo.nextCursor : null,
+        hasMore: pageInfo.hasMore
       };
 
     } catch (error) {
@@ -113,6 +132,54 @@ const adminUsersService = {
     }
   },
 
+  // Order totals per user as { [userId]: { total, pending, completed } }
+  getOrderCountsByUser: async (userIds) => {
+    if (!userIds || userIds.length === 0) {
+      return {};
+    }
+
+    const orderStats = {};
+    const { data: counts, error } = await getAdminSupabaseClient()
+      .rpc('admin_user_order_counts', { p_user_ids: userIds });
+
+    if (!error) {
+      (counts || []).forEach(row => {
+        orderStats[row.user_id] = {
+          total: Number(row.total),
+          pending: Number(row.pending),
+          completed: Number(row.completed)
+        };
+      });
+      return orderStats;
+    }
+
+    if (!isMissingFunctionError(error)) {
+      console.warn('Failed to fetch order counts:', error.message);
+      return orderStats;
+    }
+
+    // Legacy path until migration-admin-user-order-counts.sql is applied
+    const { data: orders, error: orderError } = await getSupabaseClient()
+      .from('orders')
+      .select('user_id, status')
+      .in('user_id', userIds);
+
+    if (orderError) {
+      console.warn('Failed to fetch order counts:', orderError.message);
+    }
+
+    (orders || []).forEach(order => {
+      if (!orderStats[order.user_id]) {
+        orderStats[order.user_id] = { total: 0, pending: 0, completed: 0 };
+      }
+      orderStats[order.user_id].total++;
+      if (order.status === 'pending') orderStats[order.user_id].pending++;
+      if (order.status === 'delivered') orderStats[order.user_id].completed++;
+    });
+
+    return orderStats;
+  },
+
   // Get detailed user information with order history
   getUserDetails: async (userId) => {
     try {
@@ -325,6 +392,7 @@ const adminUsersService = {
           .from('users')
           .delete()
           .eq('id', authUser.user.id);
+        AutoSyncMiddleware.invalidateSyncedUsers(authUser.user.id);
       }
 
       // Create corresponding record in users table
@@ -359,6 +427,8 @@ const adminUsersService = {
         return { success: false, error: `Failed to create user record: ${userError.message}` };
       }
 
+      userStatsCache = null;
+
       // Log activity
       await adminActivityService.logActivity(
         adminUserId,
@@ -380,15 +450,11 @@ const adminUsersService = {
   updateUser: async (userId, updateData, adminUserId) => {
     try {
       const client = getSupabaseClient();
-      const allowedFields = [
-        'full_name', 'phone', 'address', 'city', 'state', 'country', 'postal_code',
-        'is_active', 'email_verified', 'profile_image_url'
-      ];
 
       // Filter update data to only allowed fields
       const filteredData = {};
       Object.keys(updateData).forEach(key => {
-        if (allowedFields.includes(key)) {
+        if (USER_UPDATABLE_FIELDS.includes(key)) {
           filteredData[key] = updateData[key];
         }
       });
@@ -413,6 +479,10 @@ const adminUsersService = {
         return { success: false, error: 'User not found' };
       }
 
+      AutoSyncMiddleware.invalidateSyncedUsers(userId);
+
+      userStatsCache = null;
+
       // Log activity
       await adminActivityService.logActivity(
         adminUserId,
@@ -454,6 +524,10 @@ const adminUsersService = {
 
       if (deleteError) throw deleteError;
 
+      AutoSyncMiddleware.invalidateSyncedUsers(userId);
+
+      userStatsCache = null;
+
       // Log activity
       await adminActivityService.logActivity(
         adminUserId,
@@ -475,35 +549,67 @@ const adminUsersService = {
   bulkDeleteUsers: async (userIds, adminUserId) => {
     try {
       const client = getSupabaseClient();
-      let deletedCount = 0;
-      let failedCount = 0;
-      const errors = [];
+      const ids = [...new Set(userIds)];
+      const results = {};
 
-      for (const userId of userIds) {
-        try {
-          const result = await adminUsersService.deleteUser(userId, adminUserId);
-          if (result.success) {
-            deletedCount++;
-          } else {
-            failedCount++;
-            errors.push({ userId, error: result.error });
+      for (const batch of chunkIds(ids)) {
+        // One statement per batch; cascades handle related records
+        const { data: deleted, error } = await client
+          .from('users')
+          .delete()
+          .in('id', batch)
+          .select('id');
+
+        if (error) {
+          // A single blocked row fails the whole statement - retry the batch row by row
+          // so the other users are still deleted and the failure is attributed correctly
+          console.warn(`⚠️ Bulk delete batch failed (${error.message}), retrying individually`);
+          for (const userId of batch) {
+            const { data: row, error: rowError } = await client
+              .from('users')
+              .delete()
+              .eq('id', userId)
+              .select('id')
+              .maybeSingle();
+
+            results[userId] = rowError
+              ? { success: false, error: rowError.message }
+              : row ? { success: true } : { success: false, error: 'User not found' };
           }
-        } catch (error) {
-          failedCount++;
-          errors.push({ userId, error: error.message });
+          continue;
         }
+
+        const deletedIds = new Set((deleted || []).map(row => row.id));
+        batch.forEach(userId => {
+          results[userId] = deletedIds.has(userId) ? { success: true } : { success: false, error: 'User not found' };
+        });
       }
 
-      // Log bulk activity
+      const deletedIds = ids.filter(userId => results[userId].success);
+      const errors = ids
+        .filter(userId => !results[userId].success)
+        .map(userId => ({ userId, error: results[userId].error }));
+
+      AutoSyncMiddleware.invalidateSyncedUsers(deletedIds);
+
+      userStatsCache = null;
+
+      // One summarising activity log row for the whole operation
       await adminActivityService.logActivity(
         adminUserId,
         'bulk_delete_users',
         'user',
         null,
-        { deletedCount, failedCount, totalAttempted: userIds.length }
+        { deletedCount: deletedIds.length, failedCount: errors.length, totalAttempted: ids.length, userIds: deletedIds }
       );
 
-      return { success: true, deletedCount, failedCount, errors };
+      return {
+        success: true,
+        deletedCount: deletedIds.length,
+        failedCount: errors.length,
+        errors,
+        results: ids.map(userId => ({ userId, ...results[userId] }))
+      };
 
     } catch (error) {
       console.error('❌ Bulk delete users failed:', error.message);
@@ -515,35 +621,74 @@ const adminUsersService = {
   bulkUpdateUsers: async (userIds, updateData, adminUserId) => {
     try {
       const client = getSupabaseClient();
-      let updatedCount = 0;
-      let failedCount = 0;
-      const errors = [];
+      const ids = [...new Set(userIds)];
+      const results = {};
 
-      for (const userId of userIds) {
-        try {
-          const result = await adminUsersService.updateUser(userId, updateData, adminUserId);
-          if (result.success) {
-            updatedCount++;
-          } else {
-            failedCount++;
-            errors.push({ userId, error: result.error });
-          }
-        } catch (error) {
-          failedCount++;
-          errors.push({ userId, error: error.message });
+      // Filter update data to only allowed fields
+      const filteredData = {};
+      Object.keys(updateData).forEach(key => {
+        if (USER_UPDATABLE_FIELDS.includes(key)) {
+          filteredData[key] = updateData[key];
         }
+      });
+
+      if (Object.keys(filteredData).length === 0) {
+        return { success: false, error: 'No valid fields to update' };
+      }
+
+      filteredData.updated_at = new Date().toISOString();
+
+      for (const batch of chunkIds(ids)) {
+        const { data: updated, error } = await client
+          .from('users')
+          .update(filteredData)
+          .in('id', batch)
+          .select('id');
+
+        if (error) {
+          batch.forEach(userId => {
+            results[userId] = { success: false, error: error.message };
+          });
+          continue;
+        }
+
+        const updatedIds = new Set((updated || []).map(row => row.id));
+        batch.forEach(userId => {
+          results[userId] = updatedIds.has(userId) ? { success: true } : { success: false, error: 'User not found' };
+        });
       }
 
-      // Log bulk activity
+      const updatedIds = ids.filter(userId => results[userId].success);
+      const errors = ids
+        .filter(userId => !results[userId].success)
+        .map(userId => ({ userId, error: results[userId].error }));
+
+      AutoSyncMiddleware.invalidateSyncedUsers(updatedIds);
+
+      userStatsCache = null;
+
+      // One summarising activity log row for the whole operation
       await adminActivityService.logActivity(
         adminUserId,
         'bulk_update_users',
         'user',
         null,
-        { updatedCount, failedCount, totalAttempted: userIds.length, updateFields: Object.keys(updateData) }
+        {
+          updatedCount: updatedIds.length,
+          failedCount: errors.length,
+          totalAttempted: ids.length,
+          updateFields: Object.keys(filteredData),
+          userIds: updatedIds
+        }
       );
 
-      return { success: true, updatedCount, failedCount, errors };
+      return {
+        success: true,
+        updatedCount: updatedIds.length,
+        failedCount: errors.length,
+        errors,
+        results: ids.map(userId => ({ userId, ...results[userId] }))
+      };
 
     } catch (error) {
       console.error('❌ Bulk update users failed:', error.message);
@@ -726,35 +871,78 @@ const adminUsersService = {
   bulkSendNotifications: async (userIds, notificationData, adminUserId) => {
     try {
       const client = getSupabaseClient();
-      let sentCount = 0;
-      let failedCount = 0;
-      const errors = [];
+      const { type, title, message, orderId } = notificationData;
+      const ids = [...new Set(userIds)];
+      const results = {};
 
-      for (const userId of userIds) {
-        try {
-          const result = await adminUsersService.sendUserNotification(userId, notificationData, adminUserId);
-          if (result.success) {
-            sentCount++;
-          } else {
-            failedCount++;
-            errors.push({ userId, error: result.error });
-          }
-        } catch (error) {
-          failedCount++;
-          errors.push({ userId, error: error.message });
+      // Resolve which recipients exist so one bad id can't fail the batched insert
+      const existingIds = new Set();
+      for (const batch of chunkIds(ids)) {
+        const { data: users, error } = await client
+          .from('users')
+          .select('id')
+          .in('id', batch);
+
+        if (error) throw error;
+        (users || []).forEach(user => existingIds.add(user.id));
+      }
+
+      ids.forEach(userId => {
+        if (!existingIds.has(userId)) {
+          results[userId] = { success: false, error: 'User not found' };
+        }
+      });
+
+      const recipients = ids.filter(userId => existingIds.has(userId));
+
+      if (recipients.length > 0) {
+        // Single batched insert for every recipient
+        const { data: notifications, error: insertError } = await client
+          .from('user_notifications')
+          .insert(recipients.map(userId => ({
+            id: uuidv4(),
+            user_id: userId,
+            type: type || 'general',
+            title,
+            message,
+            order_id: orderId || null,
+            is_read: false,
+            sent_by_admin: adminUserId
+          })))
+          .select('id, user_id');
+
+        if (insertError) {
+          recipients.forEach(userId => {
+            results[userId] = { success: false, error: insertError.message };
+          });
+        } else {
+          (notifications || []).forEach(notification => {
+            results[notification.user_id] = { success: true, notificationId: notification.id };
+          });
         }
       }
 
-      // Log bulk activity
+      const sentIds = ids.filter(userId => results[userId] && results[userId].success);
+      const errors = ids
+        .filter(userId => !results[userId] || !results[userId].success)
+        .map(userId => ({ userId, error: results[userId] ? results[userId].error : 'Notification not created' }));
+
+      // One summarising activity log row for the whole operation
       await adminActivityService.logActivity(
         adminUserId,
         'bulk_send_notifications',
         'notification',
         null,
-        { sentCount, failedCount, totalAttempted: userIds.length, type: notificationData.type }
+        { sentCount: sentIds.length, failedCount: errors.length, totalAttempted: ids.length, type, title }
       );
 
-      return { success: true, sentCount, failedCount, errors };
+      return {
+        success: true,
+        sentCount: sentIds.length,
+        failedCount: errors.length,
+        errors,
+        results: ids.map(userId => ({ userId, ...(results[userId] || { success: false, error: 'Notification not created' }) }))
+      };
 
     } catch (error) {
       console.error('❌ Bulk send notifications failed:', error.message);
@@ -764,6 +952,42 @@ const adminUsersService = {
 
   // Get user statistics
   getUserStats: async () => {
+    if (userStatsCache && userStatsCache.expiresAt > Date.now()) {
+      return { success: true, stats: userStatsCache.stats };
+    }
+
+    try {
+      const { data, error } = await getAdminSupabaseClient().rpc('admin_user_stats');
+
+      if (error) {
+        if (isMissingFunctionError(error)) {
+          // Legacy path until migration-admin-user-stats.sql is applied
+          return adminUsersService.getUserStatsFallback();
+        }
+        throw error;
+      }
+
+      const row = (Array.isArray(data) ? data[0] : data) || {};
+      const stats = {
+        totalUsers: Number(row.total_users) || 0,
+        activeUsers: Number(row.active_users) || 0,
+        verifiedUsers: Number(row.verified_users) || 0,
+        newUsersThisMonth: Number(row.new_users_this_month) || 0,
+        uniqueCustomers: Number(row.unique_customers) || 0
+      };
+
+      userStatsCache = { stats, expiresAt: Date.now() + USER_STATS_TTL_MS };
+
+      return { success: true, stats };
+
+    } catch (error) {
+      console.error('❌ Get user stats failed:', error.message);
+      return { success: false, error: error.message };
+    }
+  },
+
+  // Legacy per-card count queries (used until migration-admin-user-stats.sql is applied)
+  getUserStatsFallback: async () => {
     try {
       const client = getSupabaseClient();
 
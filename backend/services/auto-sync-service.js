@@ -3,89 +3,89 @@
 // Handles automatic synchronization between Frontend, Backend, and Database
 // Eliminates the need for manual RLS policy creation
 
-const { getSupabaseClient } = require('./supabase-service');
+const { getSupabaseClient, getAdminSupabaseClient } = require('./supabase-service');
 const bcrypt = require('bcryptjs');
 const jwt = require('jsonwebtoken');
 const { v4: uuidv4 } = require('uuid');
 
+// Auth users fetched per listUsers() page, and rows per users insert statement
+const SYNC_PAGE_SIZE = 1000;
+const SYNC_BATCH_SIZE = 500;
+
+// Promise of the full sync currently running, if any
+let activeUserSync = null;
+
+const toLocalUser = (authUser) => ({
+  id: authUser.id,
+  email: authUser.email,
+  full_name: authUser.user_metadata?.full_name || authUser.email.split('@')[0],
+  email_verified: authUser.email_confirmed_at ? true : false,
+  phone: authUser.phone,
+  created_at: authUser.created_at,
+  updated_at: authUser.updated_at
+});
+
 class AutoSyncService {
   
   // =======================================================================
   // 🔄 USER SYNCHRONIZATION METHODS
   // =======================================================================
 
-  // Automatically sync all Supabase Auth users to local database
-  static async syncAllUsers() {
+  // Automatically sync all Supabase Auth users to local database.
+  // Auth users are read page by page and inserted in batches, so memory stays
+  // bounded by one page regardless of how many accounts exist.
+  static syncAllUsers(options = {}) {
+    // A second request while a sync is running joins the one in flight
+    if (!activeUserSync) {
+      activeUserSync = AutoSyncService.runUserSync(options)
+        .finally(() => { activeUserSync = null; });
+    }
+    return activeUserSync;
+  }
+
+  static async runUserSync({ perPage = SYNC_PAGE_SIZE, batchSize = SYNC_BATCH_SIZE, onProgress } = {}) {
     try {
       console.log('🔄 Starting full user synchronization...');
-      
-      const supabase = getSupabaseClient();
-      
-      // Get all Supabase Auth users (requires service role key)
-      const { data: authUsers, error: authError } = await supabase.auth.admin.listUsers();
-      
-      if (authError) {
-        console.error('❌ Error fetching Supabase Auth users:', authError);
-        return { success: false, error: authError.message };
-      }
-
-      // Get all local users
-      const { data: localUsers, error: localError } = await supabase
-        .from('users')
-        .select('id, email');
 
-      if (localError) {
-        console.error('❌ Error fetching local users:', localError);
-        return { success: false, error: localError.message };
-      }
-
-      const localUserEmails = new Set(localUsers.map(u => u.email));
+      // Listing auth users requires the service role key
+      const supabase = getAdminSupabaseClient();
+      const startedAt = Date.now();
       const syncResults = {
-        total: authUsers.users.length,
+        total: 0,
         synced: 0,
         existing: 0,
+        pages: 0,
         errors: []
       };
 
-      // Sync each Supabase user to local database
-      for (const authUser of authUsers.users) {
-        if (localUserEmails.has(authUser.email)) {
-          syncResults.existing++;
-          continue;
+      for (let page = 1; ; page++) {
+        const { data, error: authError } = await supabase.auth.admin.listUsers({ page, perPage });
+
+        if (authError) {
+          console.error('❌ Error fetching Supabase Auth users:', authError);
+          return { success: false, error: authError.message, results: syncResults };
         }
 
-        const newUser = {
-          id: authUser.id,
-          email: authUser.email,
-          full_name: authUser.user_metadata?.full_name || authUser.email.split('@')[0],
-          email_verified: authUser.email_confirmed_at ? true : false,
-          phone: authUser.phone,
-          created_at: authUser.created_at,
-          updated_at: authUser.updated_at
-        };
-
-        const { error: insertError } = await supabase
-          .from('users')
-          .insert([newUser]);
+        const authUsers = data?.users || [];
+        syncResults.pages++;
+        syncResults.total += authUsers.length;
 
-        if (insertError) {
-          syncResults.errors.push({ email: authUser.email, error: insertError.message });
-        } else {
-          syncResults.synced++;
-          
-          // Log successful sync
-          await supabase
-            .from('user_sync_log')
-            .insert([{
-              supabase_user_id: authUser.id,
-              local_user_id: authUser.id,
-              email: authUser.email,
-              sync_status: 'completed'
-            }]);
+        for (let i = 0; i < authUsers.length; i += batchSize) {
+          await AutoSyncService.syncUserBatch(supabase, authUsers.slice(i, i + batchSize), syncResults);
+        }
+
+        console.log(`🔄 User sync page ${page}: ${syncResults.total} processed, ${syncResults.synced} synced, ${syncResults.existing} existing, ${syncResults.errors.length} errors`);
+        if (onProgress) {
+          onProgress({ ...syncResults, errors: syncResults.errors.length });
+        }
+
+        if (authUsers.length < perPage) {
+          break;
         }
       }
 
-      console.log(`✅ User sync completed: ${syncResults.synced} synced, ${syncResults.existing} existing`);
+      syncResults.durationMs = Date.now() - startedAt;
+      console.log(`✅ User sync completed: ${syncResults.synced} synced, ${syncResults.existing} existing in ${syncResults.durationMs}ms`);
       return { success: true, results: syncResults };
 
     } catch (error) {
@@ -94,6 +94,65 @@ class AutoSyncService {
     }
   }
 
+  // Insert one batch of auth users, leaving rows that already exist untouched
+  static async syncUserBatch(supabase, authUsers, syncResults) {
+    const rows = authUsers.filter(authUser => authUser.email).map(toLocalUser);
+    syncResults.errors.push(...authUsers
+      .filter(authUser => !authUser.email)
+      .map(authUser => ({ id: authUser.id, error: 'Auth user has no email' })));
+
+    if (rows.length === 0) {
+      return;
+    }
+
+    let inserted;
+    const { data, error } = await supabase
+      .from('users')
+      .upsert(rows, { onConflict: 'id', ignoreDuplicates: true })
+      .select('id, email');
+
+    if (!error) {
+      inserted = data || [];
+      syncResults.existing += rows.length - inserted.length;
+    } else {
+      // Usually an email already stored under another id (23505): retry row by row
+      // so one conflicting account does not block the rest of the batch
+      inserted = [];
+      for (const row of rows) {
+        const { data: rowData, error: rowError } = await supabase
+          .from('users')
+          .upsert([row], { onConflict: 'id', ignoreDuplicates: true })
+          .select('id, email');
+
+        if (rowError && rowError.code !== '23505') {
+          syncResults.errors.push({ email: row.email, error: rowError.message });
+        } else if (rowData && rowData.length > 0) {
+          inserted.push(rowData[0]);
+        } else {
+          syncResults.existing++;
+        }
+      }
+    }
+
+    syncResults.synced += inserted.length;
+
+    if (inserted.length > 0) {
+      // Log successful syncs
+      const { error: logError } = await supabase
+        .from('user_sync_log')
+        .insert(inserted.map(user => ({
+          supabase_user_id: user.id,
+          local_user_id: user.id,
+          email: user.email,
+          sync_status: 'completed'
+        })));
+
+      if (logError) {
+        console.warn('⚠️ Failed to write user sync log:', logError.message);
+      }
+    }
+  }
+
   // =======================================================================
   // 🔐 ADMIN AUTHENTICATION METHODS
   // =======================================================================
@@ -2,7 +2,10 @@
 // ==============================================
 // Handles REAL-TIME currency conversion rates and operations
 
+const fs = require('fs');
+const path = require('path');
 const axios = require('axios');
+const { environment } = require('../config/environment');
 
 // ==============================================
 // 💰 SUPPORTED CURRENCIES
@@ -88,7 +91,13 @@ const EXCHANGE_RATE_APIs = [
 // ==============================================
 let CACHED_RATES = null;
 let CACHE_TIMESTAMP = null;
-const CACHE_DURATION = 30 * 60 * 1000; // 30 minutes in milliseconds
+let RATES_SOURCE = null; // 'live' | 'snapshot'
+let REFRESH_PROMISE = null; // In-flight refresh shared by all callers
+let REFRESH_TIMER = null;
+let LAST_REFRESH_ERROR = null;
+let SNAPSHOT_CHECKED = false;
+const CACHE_DURATION = environment.currency.refreshIntervalMs;
+const SNAPSHOT_PATH = environment.currency.snapshotPath;
 
 // ==============================================
 // 🌍 GET SUPPORTED CURRENCIES
@@ -175,40 +184,147 @@ async function fetchBackupExchangeRates(baseCurrency = 'INR') {
 }
 
 // ==============================================
-// 📊 GET CACHED OR FRESH EXCHANGE RATES
+// 💽 PERSISTED RATE SNAPSHOT
 // ==============================================
-async function getCurrencyRates(baseCurrency = 'INR') {
+// The last good rates are written to disk so a cold start can serve
+// immediately instead of waiting on the exchange-rate APIs
+function loadRatesSnapshot() {
+  SNAPSHOT_CHECKED = true;
+
   try {
-    const now = Date.now();
-    
-    // Check if cache is valid
-    if (CACHED_RATES && CACHE_TIMESTAMP && (now - CACHE_TIMESTAMP) < CACHE_DURATION) {
-      console.log('✅ Using cached exchange rates');
-      return CACHED_RATES;
+    const snapshot = JSON.parse(fs.readFileSync(SNAPSHOT_PATH, 'utf8'));
+
+    if (!snapshot || !snapshot.rates || !snapshot.timestamp) {
+      return false;
     }
-    
-    console.log('🔄 Cache expired or empty, fetching fresh rates...');
-    
-    // Fetch fresh rates
-    const freshRates = await fetchLiveExchangeRates(baseCurrency);
-    
-    // Update cache
-    CACHED_RATES = freshRates;
-    CACHE_TIMESTAMP = now;
-    
-    console.log('✅ Exchange rates updated and cached');
-    console.log(`💱 Current rates (${baseCurrency} base):`, freshRates);
-    
-    return freshRates;
+
+    CACHED_RATES = snapshot.rates;
+    CACHE_TIMESTAMP = snapshot.timestamp;
+    RATES_SOURCE = 'snapshot';
+    console.log(`💽 Loaded exchange rate snapshot from ${new Date(snapshot.timestamp).toISOString()}`);
+    return true;
   } catch (error) {
-    console.error('❌ Error getting currency rates:', error);
-    
-    // If we have cached rates, use them even if expired
-    if (CACHED_RATES) {
-      console.warn('⚠️ Using expired cached rates due to API failure');
-      return CACHED_RATES;
+    if (error.code !== 'ENOENT') {
+      console.warn('⚠️ Could not read exchange rate snapshot:', error.message);
     }
-    
+    return false;
+  }
+}
+
+async function saveRatesSnapshot(rates, timestamp) {
+  try {
+    await fs.promises.mkdir(path.dirname(SNAPSHOT_PATH), { recursive: true });
+
+    // Write then rename so a crash mid-write never leaves a truncated snapshot
+    const tempPath = `${SNAPSHOT_PATH}.${process.pid}.tmp`;
+    await fs.promises.writeFile(tempPath, JSON.stringify({ baseCurrency: 'INR', rates, timestamp }));
+    await fs.promises.rename(tempPath, SNAPSHOT_PATH);
+  } catch (error) {
+    console.warn('⚠️ Could not persist exchange rate snapshot:', error.message);
+  }
+}
+
+// ==============================================
+// 🔁 REFRESH EXCHANGE RATES (SINGLE-FLIGHT)
+// ==============================================
+// Concurrent callers share one fetch; the previous rates stay in place
+// (and keep being served) until the new ones arrive
+function refreshExchangeRates() {
+  if (REFRESH_PROMISE) {
+    return REFRESH_PROMISE;
+  }
+
+  REFRESH_PROMISE = (async () => {
+    try {
+      const freshRates = await fetchLiveExchangeRates('INR');
+      const now = Date.now();
+
+      CACHED_RATES = freshRates;
+      CACHE_TIMESTAMP = now;
+      RATES_SOURCE = 'live';
+      LAST_REFRESH_ERROR = null;
+
+      console.log('✅ Exchange rates updated and cached');
+      await saveRatesSnapshot(freshRates, now);
+
+      return freshRates;
+    } catch (error) {
+      LAST_REFRESH_ERROR = error.message;
+      throw error;
+    } finally {
+      REFRESH_PROMISE = null;
+    }
+  })();
+
+  return REFRESH_PROMISE;
+}
+
+function refreshInBackground() {
+  refreshExchangeRates().catch((error) => {
+    console.warn('⚠️ Background exchange rate refresh failed, serving last good rates:', error.message);
+  });
+}
+
+function isCacheFresh() {
+  return Boolean(CACHED_RATES && CACHE_TIMESTAMP && (Date.now() - CACHE_TIMESTAMP) < CACHE_DURATION);
+}
+
+// ==============================================
+// ⏱️ BACKGROUND REFRESHER
+// ==============================================
+function startExchangeRateRefresher() {
+  if (REFRESH_TIMER) {
+    return;
+  }
+
+  if (!SNAPSHOT_CHECKED) {
+    loadRatesSnapshot();
+  }
+
+  if (!isCacheFresh()) {
+    refreshInBackground();
+  }
+
+  REFRESH_TIMER = setInterval(refreshInBackground, CACHE_DURATION);
+  // Don't keep the process alive just for the refresher
+  REFRESH_TIMER.unref();
+
+  console.log(`⏱️ Exchange rate refresher started (every ${Math.round(CACHE_DURATION / 60000)} minutes)`);
+}
+
+function stopExchangeRateRefresher() {
+  if (REFRESH_TIMER) {
+    clearInterval(REFRESH_TIMER);
+    REFRESH_TIMER = null;
+  }
+}
+
+// ==============================================
+// 📊 GET CACHED OR FRESH EXCHANGE RATES
+// ==============================================
+// Stale-while-revalidate: once any rates are known they are returned
+// immediately and an expired table is refreshed in the background.
+// Rates are always INR-based; baseCurrency is kept for API compatibility.
+async function getCurrencyRates(baseCurrency = 'INR') {
+  if (!CACHED_RATES && !SNAPSHOT_CHECKED) {
+    loadRatesSnapshot();
+  }
+
+  if (CACHED_RATES) {
+    if (!isCacheFresh()) {
+      console.log('🔄 Exchange rates expired, refreshing in background...');
+      refreshInBackground();
+    }
+    return CACHED_RATES;
+  }
+
+  // Nothing to serve yet - wait for the (shared) first fetch
+  try {
+    console.log('🔄 Cache empty, fetching fresh rates...');
+    return await refreshExchangeRates();
+  } catch (error) {
+    console.error('❌ Error getting currency rates:', error.message);
+
     // Last resort - use emergency fallback rates
     console.warn('⚠️ Using emergency fallback rates');
     return getEmergencyFallbackRates();
@@ -233,6 +349,18 @@ function getEmergencyFallbackRates() {
   };
 }
 
+// ==============================================
+// 🧮 CONVERT AMOUNT WITH A RESOLVED RATE TABLE
+// ==============================================
+function convertWithRates(amount, fromCurrency, toCurrency, rates) {
+  // Convert from source currency to INR, then to target currency
+  const amountInINR = fromCurrency === 'INR' ? amount : amount / rates[fromCurrency];
+  const convertedAmount = toCurrency === 'INR' ? amountInINR : amountInINR * rates[toCurrency];
+
+  // Round to 2 decimal places
+  return Math.round(convertedAmount * 100) / 100;
+}
+
 // ==============================================
 // 🔄 CONVERT PRICE WITH LIVE RATES
 // ==============================================
@@ -253,12 +381,7 @@ async function convertPrice(amount, fromCurrency, toCurrency) {
       throw new Error(`Unsupported currency: ${fromCurrency} or ${toCurrency}`);
     }
     
-    // Convert from source currency to INR, then to target currency
-    const amountInINR = fromCurrency === 'INR' ? amount : amount / rates[fromCurrency];
-    const convertedAmount = toCurrency === 'INR' ? amountInINR : amountInINR * rates[toCurrency];
-    
-    // Round to 2 decimal places
-    const finalAmount = Math.round(convertedAmount * 100) / 100;
+    const finalAmount = convertWithRates(amount, fromCurrency, toCurrency, rates);
     
     console.log(`💱 Converted ${amount} ${fromCurrency} = ${finalAmount} ${toCurrency}`);
     return finalAmount;
@@ -268,6 +391,25 @@ async function convertPrice(amount, fromCurrency, toCurrency) {
   }
 }
 
+// ==============================================
+// ⚡ CONVERT MANY PRICES WITH ONE RATE TABLE
+// ==============================================
+// Synchronous: resolve rates once per request with getCurrencyRates('INR')
+// and pass them in. Non-numeric entries (null, undefined) are returned as-is.
+function convertMany(prices, fromCurrency, toCurrency, rates) {
+  if (fromCurrency === toCurrency) {
+    return prices.slice();
+  }
+
+  if (!rates || !rates[fromCurrency] || !rates[toCurrency]) {
+    throw new Error(`Unsupported currency: ${fromCurrency} or ${toCurrency}`);
+  }
+
+  return prices.map(amount => (
+    typeof amount === 'number' ? convertWithRates(amount, fromCurrency, toCurrency, rates) : amount
+  ));
+}
+
 // ==============================================
 // 💰 GET CURRENCY SYMBOL
 // ==============================================
@@ -304,15 +446,14 @@ function formatPrice(amount, currencyCode = 'INR') {
 // ==============================================
 async function convertPrices(prices, fromCurrency, toCurrency) {
   try {
-    const convertedPrices = {};
+    const rates = fromCurrency === toCurrency ? null : await getCurrencyRates('INR');
+    const keys = Object.keys(prices);
+    const converted = convertMany(keys.map(key => prices[key]), fromCurrency, toCurrency, rates);
     
-    for (const [key, value] of Object.entries(prices)) {
-      if (typeof value === 'number') {
-        convertedPrices[key] = await convertPrice(value, fromCurrency, toCurrency);
-      } else {
-        convertedPrices[key] = value;
-      }
-    }
+    const convertedPrices = {};
+    keys.forEach((key, index) => {
+      convertedPrices[key] = converted[index];
+    });
     
     return convertedPrices;
   } catch (error) {
@@ -328,18 +469,14 @@ async function updateExchangeRates() {
   try {
     console.log('🔄 Force updating exchange rates...');
     
-    // Clear cache to force fresh fetch
-    CACHED_RATES = null;
-    CACHE_TIMESTAMP = null;
-    
-    // Fetch fresh rates
-    const rates = await getCurrencyRates('INR');
+    // Last good rates stay in place if the fetch fails
+    const rates = await refreshExchangeRates();
     
     console.log('✅ Exchange rates force updated successfully');
     return rates;
   } catch (error) {
-    console.error('❌ Error force updating exchange rates:', error);
-    throw error;
+    console.error('❌ Error force updating exchange rates:', error.message);
+    return getCurrencyRates('INR');
   }
 }
 
@@ -354,6 +491,11 @@ async function getExchangeRateInfo() {
       rates: rates,
       lastUpdated: CACHE_TIMESTAMP ? new Date(CACHE_TIMESTAMP).toISOString() : null,
       nextUpdate: CACHE_TIMESTAMP ? new Date(CACHE_TIMESTAMP + CACHE_DURATION).toISOString() : null,
+      ageSeconds: CACHE_TIMESTAMP ? Math.round((Date.now() - CACHE_TIMESTAMP) / 1000) : null,
+      stale: !isCacheFresh(),
+      ratesSource: CACHED_RATES ? RATES_SOURCE : 'fallback',
+      refreshInProgress: Boolean(REFRESH_PROMISE),
+      lastRefreshError: LAST_REFRESH_ERROR,
       source: 'Live Internet APIs',
       supportedCurrencies: Object.keys(SUPPORTED_CURRENCIES)
     };
@@ -369,10 +511,14 @@ module.exports = {
   getCurrencies,
   getCurrencyRates,
   convertPrice,
+  convertMany,
   getCurrencySymbol,
   formatPrice,
   convertPrices,
   updateExchangeRates,
+  refreshExchangeRates,
+  startExchangeRateRefresher,
+  stopExchangeRateRefresher,
   getExchangeRateInfo,
   fetchLiveExchangeRates,
   SUPPORTED_CURRENCIES
@@ -1,9 +1,48 @@
 const multer = require('multer');
 const sharp = require('sharp');
+const os = require('os');
 const path = require('path');
+const crypto = require('crypto');
 const fs = require('fs').promises;
+const { createReadStream, createWriteStream } = require('fs');
+const { Readable, Transform } = require('stream');
+const { pipeline } = require('stream/promises');
 const { v4: uuidv4 } = require('uuid');
-const { getAdminSupabaseClient } = require('./supabase-service');
+const { environment } = require('../config/environment');
+const { getAdminSupabaseClient, isMissingFunctionError, isMissingRelationError } = require('./supabase-service');
+const { runBounded } = require('../utils/bounded-runner');
+const DiskCache = require('../utils/disk-cache');
+const {
+  VARIANT_SCHEME_VERSION,
+  VARIANT_FORMATS,
+  VARIANT_FOLDER,
+  MANIFEST_FILE_NAME,
+  getVariantDimensions,
+  getVariantFileName,
+  getPrimaryFileName,
+  getImageVariants,
+  getImageHash
+} = require('../utils/image-variants');
+
+// Variant paths are named by content hash, so they never change once written
+const VARIANT_CACHE_CONTROL = '31536000';
+
+// /api/images/resize snaps requested widths up to one of these, so the
+// cache holds a bounded number of variants per source
+const RESIZE_WIDTHS = [64, 128, 256, 384, 512, 640, 750, 828, 1080, 1200, 1920, 2048];
+// Part of the resize cache key: bump when encoder options change
+const RESIZE_VERSION = 1;
+
+// Redirect hops followed (and checked one by one) when downloading a source
+const MAX_SOURCE_REDIRECTS = 5;
+
+// Variant encodes run per upload in processImageVariants
+const VARIANT_ENCODE_CONCURRENCY = 3;
+
+// "image/jpeg; charset=binary" -> "image/jpeg"
+const normalizeContentType = (contentType) => {
+  return (contentType || '').split(';')[0].trim().toLowerCase();
+};
 
 // ==============================================
 // 🖼️ IMAGE UPLOAD SERVICE
@@ -12,11 +51,32 @@ const { getAdminSupabaseClient } = require('./supabase-service');
 class ImageUploadService {
   constructor() {
     this.uploadDir = path.join(__dirname, '../uploads');
+    // Spooled multi-file uploads; kept out of uploads/, which is served publicly
+    this.tempDir = path.join(os.tmpdir(), 'ritzone-uploads');
+    this.importCache = new DiskCache({
+      dir: environment.images.importCacheDir,
+      maxBytes: environment.images.importCacheMaxBytes
+    });
     this.allowedMimeTypes = [
       'image/jpeg', 'image/jpg', 'image/png', 'image/gif', 
       'image/webp', 'image/svg+xml', 'image/bmp', 'image/tiff'
     ];
+    // Everything written to the bucket: inputs are re-encoded, plus AVIF variants and manifests
+    this.storedMimeTypes = [...this.allowedMimeTypes, 'image/avif', 'application/json'];
     this.maxFileSize = 50 * 1024 * 1024; // 50MB
+    // bucket name -> Promise of the one-time existence / mime-type check
+    this.bucketChecks = new Map();
+    // content hash -> Promise of the store in progress (same image uploaded twice at once)
+    this.pendingStores = new Map();
+    // false once image_objects turns out to be missing (migration-image-store.sql not applied)
+    this.imageStoreInstalled = true;
+    this.resizeCache = new DiskCache({
+      dir: environment.images.resizeCacheDir,
+      maxBytes: environment.images.resizeCacheMaxBytes
+    });
+    // cache key -> Promise of the download / resize in progress
+    this.pendingDownloads = new Map();
+    this.pendingResizes = new Map();
     this.initializeUploadDirectory();
   }
 
@@ -24,16 +84,20 @@ class ImageUploadService {
   async initializeUploadDirectory() {
     try {
       await fs.mkdir(this.uploadDir, { recursive: true });
+      await fs.mkdir(this.tempDir, { recursive: true });
       console.log('📁 Upload directory initialized:', this.uploadDir);
     } catch (error) {
       console.error('❌ Error creating upload directory:', error);
     }
   }
 
-  // Configure multer for memory storage
-  getMulterConfig() {
+  // Configure multer for memory storage, or for temp-file storage when
+  // `diskStorage` is set so large batches are not held in memory while queued
+  getMulterConfig({ diskStorage = false } = {}) {
     return multer({
-      storage: multer.memoryStorage(),
+      storage: diskStorage
+        ? multer.diskStorage({ destination: this.tempDir })
+        : multer.memoryStorage(),
       limits: {
         fileSize: this.maxFileSize,
         files: 10 // Max 10 files per request
@@ -48,28 +112,87 @@ class ImageUploadService {
     });
   }
 
-  // Process and resize image based on type
-  async processImage(buffer, imageType = 'banner', customDimensions = null) {
-    try {
-      let width, height, quality = 85;
+  // Presets for a source: everything up to detail, plus the larger presets the
+  // source can fill without being upscaled
+  getProducedVariantSizes(dimensions, metadata) {
+    // EXIF orientations 5-8 are rotated by 90 degrees
+    const rotated = metadata.orientation >= 5;
+    const sourceWidth = (rotated ? metadata.height : metadata.width) || 0;
+    const sourceHeight = (rotated ? metadata.width : metadata.height) || 0;
+
+    const sizes = getVariantDimensions(dimensions);
+    const detailIndex = sizes.findIndex(size => size.name === 'detail');
 
-      // Define optimal dimensions for different image types
+    return sizes.filter((size, index) => index <= detailIndex
+      || (size.width <= sourceWidth && size.height <= sourceHeight));
+  }
+
+  // Process an image into its responsive variants: thumbnail/card/detail sizes
+  // (relative to the requested dimensions) plus zoom when the source is large
+  // enough for it, each in AVIF, WebP and JPEG
+  async processImageVariants(buffer, imageType = 'banner', customDimensions = null) {
+    try {
       const dimensions = customDimensions || this.getOptimalDimensions(imageType);
-      width = dimensions.width;
-      height = dimensions.height;
 
-      // Process image with sharp
-      const processedBuffer = await sharp(buffer)
-        .resize(width, height, {
+      const source = sharp(buffer);
+      const metadata = await source.metadata();
+
+      const sizes = this.getProducedVariantSizes(dimensions, metadata);
+      const largest = sizes[sizes.length - 1];
+      const primaryFileName = getPrimaryFileName(dimensions, largest.name);
+
+      // Decode, orient and crop once at the largest size produced (never above
+      // the source's own resolution, except detail for small sources); every
+      // smaller size is downscaled from that raw buffer
+      const { data, info } = await source
+        .rotate()
+        .resize(largest.width, largest.height, {
           fit: 'cover', // Crop to exact dimensions while maintaining aspect ratio
           position: 'center'
         })
-        .jpeg({ quality }) // Convert to JPEG for optimal compression
-        .toBuffer();
+        .raw()
+        .toBuffer({ resolveWithObject: true });
+
+      const raw = { raw: { width: info.width, height: info.height, channels: info.channels } };
+
+      const jobs = sizes.flatMap(size => Object.keys(VARIANT_FORMATS).map(format => ({ size, format })));
+
+      // A few encodes at a time: each holds its own resized copy plus output
+      const settled = await runBounded(jobs, { concurrency: VARIANT_ENCODE_CONCURRENCY },
+        async ({ size, format }) => {
+          let pipeline = sharp(data, raw).resize(size.width, size.height);
+          if (format === 'jpeg') {
+            pipeline = pipeline.flatten({ background: '#ffffff' });
+          }
 
-      return processedBuffer;
+          const variantBuffer = await pipeline[format](VARIANT_FORMATS[format].options).toBuffer();
+
+          return {
+            name: size.name,
+            format,
+            width: size.width,
+            height: size.height,
+            fileName: size.name === 'detail' && format === 'jpeg'
+              ? primaryFileName
+              : getVariantFileName(size.width, size.height, format),
+            contentType: VARIANT_FORMATS[format].contentType,
+            buffer: variantBuffer
+          };
+        });
+
+      const failed = settled.find(result => result.status === 'rejected');
+      if (failed) {
+        throw failed.reason;
+      }
+      const files = settled.map(result => result.value);
+
+      return {
+        dimensions: { width: dimensions.width, height: dimensions.height },
+        source: { width: metadata.width, height: metadata.height, format: metadata.format },
+        files
+      };
     } catch (error) {
-      console.error('❌ Image processing error:', error);
+      console.error('❌ Image variant processing error:', error);
       throw new Error('Failed to process image: ' + error.message);
     }
   }
@@ -88,53 +211,101 @@ class ImageUploadService {
     return dimensionsMap[imageType] || dimensionsMap['banner'];
   }
 
-  // Upload processed image to Supabase Storage
-  async uploadToSupabase(processedBuffer, fileName, bucketName = 'images') {
-    try {
-      // Ensure bucket exists
-      await this.ensureBucketExists(bucketName);
-
-      // Generate unique file name
-      const uniqueFileName = `${Date.now()}-${uuidv4()}-${fileName}`;
-      const filePath = `uploads/${uniqueFileName}`;
+  // Upload a processed variant set plus its manifest to Supabase Storage
+  async uploadVariantsToSupabase(processed, { imageType, originalName, contentHash = uuidv4() }, bucketName = 'images') {
+    await this.ensureBucketExists(bucketName);
 
-      // Get admin Supabase client for storage operations
-      const supabase = getAdminSupabaseClient();
+    const supabase = getAdminSupabaseClient();
+    const imageId = contentHash;
+    const folder = `${VARIANT_FOLDER}/${imageId}`;
+    const uploadedPaths = [];
 
-      // Upload to Supabase Storage
-      const { data, error } = await supabase.storage
+    const uploadFile = async (fileName, body, contentType) => {
+      const filePath = `${folder}/${fileName}`;
+      const { error } = await supabase.storage
         .from(bucketName)
-        .upload(filePath, processedBuffer, {
-          contentType: 'image/jpeg',
-          cacheControl: '3600',
-          upsert: false
+        .upload(filePath, body, {
+          contentType,
+          cacheControl: VARIANT_CACHE_CONTROL,
+          // Same hash means same bytes, so retrying over a partial set is safe
+          upsert: true
         });
 
       if (error) {
-        console.error('❌ Supabase upload error:', error);
-        throw new Error('Failed to upload to Supabase: ' + error.message);
+        throw new Error(`Failed to upload ${fileName} to Supabase: ${error.message}`);
       }
 
-      // Get public URL
-      const { data: publicData } = supabase.storage
-        .from(bucketName)
-        .getPublicUrl(filePath);
+      uploadedPaths.push(filePath);
+      return supabase.storage.from(bucketName).getPublicUrl(filePath).data.publicUrl;
+    };
+
+    try {
+      const primary = processed.files.find(file => file.name === 'detail' && file.format === 'jpeg');
+
+      await Promise.all(processed.files.map(file => uploadFile(file.fileName, file.buffer, file.contentType)));
+
+      const publicUrl = supabase.storage.from(bucketName).getPublicUrl(`${folder}/${primary.fileName}`).data.publicUrl;
+      const variantMap = getImageVariants(publicUrl);
+
+      const manifest = {
+        version: 2,
+        id: imageId,
+        imageType,
+        originalName,
+        createdAt: new Date().toISOString(),
+        source: processed.source,
+        dimensions: processed.dimensions,
+        // Sizes actually produced (zoom is skipped for sources smaller than it)
+        presets: [...new Set(processed.files.map(file => file.name))],
+        files: processed.files.map(file => ({
+          name: file.name,
+          format: file.format,
+          width: file.width,
+          height: file.height,
+          fileName: file.fileName,
+          bytes: file.buffer.length
+        })),
+        variants: variantMap.variants,
+        srcset: variantMap.srcset
+      };
+
+      const manifestUrl = await uploadFile(MANIFEST_FILE_NAME, Buffer.from(JSON.stringify(manifest)), 'application/json');
 
       return {
         success: true,
-        fileName: uniqueFileName,
-        filePath: filePath,
-        publicUrl: publicData.publicUrl,
-        supabaseData: data
+        fileName: `${imageId}/${primary.fileName}`,
+        filePath: `${folder}/${primary.fileName}`,
+        publicUrl,
+        fileSize: primary.buffer.length,
+        variants: variantMap.variants,
+        srcset: variantMap.srcset,
+        manifestUrl
       };
     } catch (error) {
-      console.error('❌ Upload to Supabase failed:', error);
+      console.error('❌ Variant upload to Supabase failed:', error);
+      // Do not leave a partial variant set behind
+      if (uploadedPaths.length > 0) {
+        await supabase.storage.from(bucketName).remove(uploadedPaths);
+      }
       throw error;
     }
   }
 
-  // Ensure Supabase bucket exists
-  async ensureBucketExists(bucketName) {
+  // Ensure Supabase bucket exists and accepts every type we store (checked once per process;
+  // concurrent uploads share the check, and a failed check is retried by the next upload)
+  ensureBucketExists(bucketName) {
+    if (!this.bucketChecks.has(bucketName)) {
+      const check = this.verifyBucket(bucketName).then((verified) => {
+        if (!verified) {
+          this.bucketChecks.delete(bucketName);
+        }
+      });
+      this.bucketChecks.set(bucketName, check);
+    }
+    return this.bucketChecks.get(bucketName);
+  }
+
+  async verifyBucket(bucketName) {
     try {
       // Get admin Supabase client for storage operations
       const supabase = getAdminSupabaseClient();
@@ -144,34 +315,269 @@ class ImageUploadService {
       
       if (listError) {
         console.error('❌ Error listing buckets:', listError);
-        return;
+        return false;
       }
 
-      const bucketExists = buckets.some(bucket => bucket.name === bucketName);
+      const bucket = buckets.find(existing => existing.name === bucketName);
       
-      if (!bucketExists) {
+      if (!bucket) {
         // Create bucket if it doesn't exist
         const { data, error } = await supabase.storage.createBucket(bucketName, {
           public: true,
-          allowedMimeTypes: this.allowedMimeTypes,
+          allowedMimeTypes: this.storedMimeTypes,
           fileSizeLimit: this.maxFileSize
         });
 
         if (error) {
           console.error('❌ Error creating bucket:', error);
-        } else {
-          console.log('✅ Created Supabase bucket:', bucketName);
+          return false;
+        }
+        console.log('✅ Created Supabase bucket:', bucketName);
+      } else if (bucket.allowed_mime_types &&
+                 !this.storedMimeTypes.every(type => bucket.allowed_mime_types.includes(type))) {
+        // Buckets created before AVIF variants and manifests need the extra types
+        const { error } = await supabase.storage.updateBucket(bucketName, {
+          public: bucket.public,
+          allowedMimeTypes: this.storedMimeTypes,
+          fileSizeLimit: bucket.file_size_limit || this.maxFileSize
+        });
+
+        if (error) {
+          console.error('❌ Error updating bucket mime types:', error);
+          return false;
         }
+        console.log('✅ Updated Supabase bucket mime types:', bucketName);
       }
+
+      return true;
     } catch (error) {
       console.error('❌ Error ensuring bucket exists:', error);
+      return false;
     }
   }
 
+  // ==============================================
+  // 🧬 CONTENT-ADDRESSED STORE
+  // ==============================================
+
+  // sha256 over the variant scheme, target size and source bytes (buffer or file path)
+  async computeContentHash(input, dimensions) {
+    const hash = crypto.createHash('sha256');
+    hash.update(`v${VARIANT_SCHEME_VERSION}:${dimensions.width}x${dimensions.height}:`);
+
+    if (Buffer.isBuffer(input)) {
+      hash.update(input);
+    } else {
+      await pipeline(createReadStream(input), hash);
+    }
+
+    return hash.digest('hex');
+  }
+
+  // image_objects row for a hash, or null (also when migration-image-store.sql is not applied)
+  async findStoredImage(contentHash) {
+    const { data, error } = await getAdminSupabaseClient()
+      .from('image_objects')
+      .select('*')
+      .eq('hash', contentHash)
+      .maybeSingle();
+
+    if (error) {
+      if (isMissingRelationError(error)) {
+        this.imageStoreInstalled = false;
+      } else {
+        console.warn('⚠️ Image store lookup failed:', error.message);
+      }
+      return null;
+    }
+
+    return data;
+  }
+
+  // Registers (or re-registers) a set and returns its image_objects row; a row
+  // with gc_started_at set is being collected and must not be reused
+  async registerStoredImage(contentHash, uploadResult, bucketName) {
+    const { data, error } = await getAdminSupabaseClient().rpc('register_image_object', {
+      p_hash: contentHash,
+      p_bucket: bucketName,
+      p_storage_prefix: `${VARIANT_FOLDER}/${contentHash}`,
+      p_public_url: uploadResult.publicUrl,
+      p_bytes: uploadResult.fileSize
+    });
+
+    if (error) {
+      if (!isMissingFunctionError(error)) {
+        console.warn('⚠️ Failed to register stored image:', error.message);
+      }
+      return null;
+    }
+
+    return Array.isArray(data) ? data[0] || null : data;
+  }
+
+  // Process and upload an image unless identical content was stored before,
+  // in which case the existing variant set is returned without any sharp work
+  storeImage(input, { imageType = 'banner', customDimensions = null, originalName }, bucketName = 'images') {
+    const dimensions = customDimensions || this.getOptimalDimensions(imageType);
+
+    return this.computeContentHash(input, dimensions).then((contentHash) => {
+      if (this.pendingStores.has(contentHash)) {
+        return this.pendingStores.get(contentHash);
+      }
+
+      const store = (async () => {
+        const stored = await this.findStoredImage(contentHash);
+
+        // Restarts the GC grace period if nothing references the set yet. The
+        // update is atomic with the GC's claim, so a set that comes back
+        // unclaimed here is safe to hand out.
+        const reused = stored && !stored.gc_started_at
+          ? await this.registerStoredImage(contentHash, { publicUrl: stored.public_url, fileSize: stored.bytes }, stored.bucket) || stored
+          : stored;
+
+        if (reused && !reused.gc_started_at) {
+          const variantMap = getImageVariants(reused.public_url);
+          const filePath = new URL(reused.public_url).pathname.split('/').slice(-4).join('/');
+
+          return {
+            fileName: filePath.split('/').slice(-2).join('/'),
+            filePath,
+            publicUrl: reused.public_url,
+            fileSize: Number(reused.bytes),
+            dimensions: { width: dimensions.width, height: dimensions.height },
+            variants: variantMap.variants,
+            srcset: variantMap.srcset,
+            manifestUrl: variantMap.manifest,
+            contentHash,
+            deduplicated: true
+          };
+        }
+
+        const processed = await this.processImageVariants(input, imageType, customDimensions);
+
+        if (reused) {
+          // The GC is deleting this hash's folder right now: store a one-off
+          // copy under a random id rather than race it for the same paths
+          const uploadResult = await this.uploadVariantsToSupabase(processed, { imageType, originalName }, bucketName);
+          return {
+            ...uploadResult,
+            dimensions: processed.dimensions,
+            contentHash: null,
+            deduplicated: false
+          };
+        }
+
+        const uploadResult = await this.uploadVariantsToSupabase(
+          processed,
+          { imageType, originalName, contentHash },
+          bucketName
+        );
+
+        await this.registerStoredImage(contentHash, uploadResult, bucketName);
+
+        return {
+          ...uploadResult,
+          dimensions: processed.dimensions,
+          contentHash,
+          deduplicated: false
+        };
+      })().finally(() => {
+        this.pendingStores.delete(contentHash);
+      });
+
+      this.pendingStores.set(contentHash, store);
+      return store;
+    });
+  }
+
+  // Delete unreferenced variant sets in batches. Sets stay for graceHours after
+  // their last reference goes away, which covers uploads not yet saved on a row.
+  // Rows are claimed first, files removed next, and rows dropped last, so an
+  // upload of the same content meanwhile never reuses a half-deleted set.
+  async collectOrphanedImages({ batchSize = 50, graceHours = 24, maxBatches = Infinity } = {}) {
+    const supabase = getAdminSupabaseClient();
+    const summary = { success: true, deletedImages: 0, deletedFiles: 0, batches: 0, errors: [] };
+
+    while (summary.batches < maxBatches) {
+      const { data: orphans, error } = await supabase.rpc('claim_orphaned_images', {
+        p_grace_hours: graceHours,
+        p_limit: batchSize
+      });
+
+      if (error) {
+        if (isMissingFunctionError(error)) {
+          return { success: false, error: 'Image store is not installed (run migration-image-store.sql)' };
+        }
+        return { ...summary, success: false, error: error.message };
+      }
+
+      if (!orphans || orphans.length === 0) {
+        break;
+      }
+
+      summary.batches++;
+
+      // One list per set (at most 13 files each), then one remove per bucket
+      const byBucket = new Map();
+      await Promise.all(orphans.map(async (orphan) => {
+        const { data: files, error: listError } = await supabase.storage
+          .from(orphan.bucket)
+          .list(orphan.storage_prefix);
+
+        if (listError) {
+          summary.errors.push({ hash: orphan.hash, error: listError.message });
+          return;
+        }
+
+        const group = byBucket.get(orphan.bucket) || { orphans: [], paths: [] };
+        group.orphans.push(orphan);
+        (files || []).forEach(file => group.paths.push(`${orphan.storage_prefix}/${file.name}`));
+        byBucket.set(orphan.bucket, group);
+      }));
+
+      // Sets whose files are gone; the rest stay claimed and are retried by a later run
+      const collected = [];
+      for (const [bucket, group] of byBucket) {
+        if (group.paths.length > 0) {
+          const { error: removeError } = await supabase.storage.from(bucket).remove(group.paths);
+          if (removeError) {
+            summary.errors.push({ bucket, error: removeError.message });
+            continue;
+          }
+          summary.deletedFiles += group.paths.length;
+        }
+        collected.push(...group.orphans);
+      }
+
+      if (collected.length > 0) {
+        const { error: finishError } = await supabase.rpc('finish_image_collection', {
+          p_hashes: collected.map(orphan => orphan.hash)
+        });
+
+        if (finishError) {
+          summary.errors.push({ error: finishError.message });
+        }
+
+        // Cached URL imports must not hand back a collected set
+        await Promise.all(collected.map(orphan => this.forgetUrlImport(orphan.public_url)));
+        summary.deletedImages += collected.length;
+      }
+
+      console.log(`🧹 Image GC batch ${summary.batches}: ${collected.length} image(s), ${summary.deletedFiles} file(s) removed so far`);
+
+      if (orphans.length < batchSize) {
+        break;
+      }
+    }
+
+    return summary;
+  }
+
   // Process file upload from request
   async handleFileUpload(file, imageType = 'banner', customDimensions = null) {
     try {
-      if (!file || !file.buffer) {
+      // Memory-stored uploads carry a buffer, disk-stored ones a temp file path
+      if (!file || (!file.buffer && !file.path)) {
         throw new Error('No file provided or invalid file format');
       }
 
@@ -181,24 +587,26 @@ class ImageUploadService {
         mimetype: file.mimetype
       });
 
-      // Process image
-      const processedBuffer = await this.processImage(file.buffer, imageType, customDimensions);
-      
-      // Upload to Supabase
-      const uploadResult = await this.uploadToSupabase(
-        processedBuffer, 
-        file.originalname, 
+      // Process into responsive variants and upload (or reuse an identical stored image)
+      const uploadResult = await this.storeImage(
+        file.buffer || file.path,
+        { imageType, customDimensions, originalName: file.originalname },
         'images'
       );
 
-      console.log('✅ Image upload successful:', uploadResult.publicUrl);
+      console.log(`✅ Image upload successful${uploadResult.deduplicated ? ' (deduplicated)' : ''}:`, uploadResult.publicUrl);
 
       return {
         success: true,
         imageUrl: uploadResult.publicUrl,
         fileName: uploadResult.fileName,
-        fileSize: processedBuffer.length,
-        dimensions: this.getOptimalDimensions(imageType),
+        fileSize: uploadResult.fileSize,
+        dimensions: uploadResult.dimensions,
+        variants: uploadResult.variants,
+        srcset: uploadResult.srcset,
+        manifestUrl: uploadResult.manifestUrl,
+        contentHash: uploadResult.contentHash,
+        deduplicated: uploadResult.deduplicated,
         originalFile: {
           name: file.originalname,
           size: file.size,
@@ -211,56 +619,378 @@ class ImageUploadService {
     }
   }
 
-  // Fetch and process image from URL
-  async handleImageFromUrl(imageUrl, imageType = 'banner', customDimensions = null) {
+  // Rough peak memory for one upload: the compressed source, the decoded source
+  // (read from the header, so nothing is decoded here), the raw zoom-size working
+  // buffer processImageVariants crops into, and one resized copy per concurrent encode
+  async estimateProcessingBytes(file, imageType = 'banner', customDimensions = null) {
+    const sizes = getVariantDimensions(customDimensions || this.getOptimalDimensions(imageType));
+    const largest = sizes[sizes.length - 1];
+    const workingBytes = largest.width * largest.height * 4;
+
+    let decodedBytes = 0;
     try {
-      if (!imageUrl || typeof imageUrl !== 'string') {
-        throw new Error('Invalid image URL provided');
+      const { width = 0, height = 0, channels = 4 } = await sharp(file.buffer || file.path).metadata();
+      decodedBytes = width * height * channels;
+    } catch (error) {
+      // Unreadable header: the upload itself fails with a proper error later
+    }
+
+    return (file.size || 0) + decodedBytes + workingBytes * (1 + VARIANT_ENCODE_CONCURRENCY);
+  }
+
+  // Process several uploads concurrently, bounded by IMAGE_UPLOAD_CONCURRENCY
+  // and IMAGE_UPLOAD_MAX_INFLIGHT_MB. onResult(result, index) fires as each
+  // file finishes; resolves to the per-file results in upload order.
+  async handleMultipleFileUploads(files, imageType = 'banner', customDimensions = null, onResult = () => {}) {
+    const toFileResult = (settled, index) => {
+      const file = files[index];
+      return settled.status === 'fulfilled'
+        ? { index, fileName: file.originalname, success: true, data: settled.value }
+        : { index, fileName: file.originalname, success: false, error: settled.reason.message };
+    };
+
+    try {
+      const costs = new Map(await Promise.all(files.map(async file => [
+        file,
+        await this.estimateProcessingBytes(file, imageType, customDimensions)
+      ])));
+
+      const settledResults = await runBounded(files, {
+        concurrency: environment.images.uploadConcurrency,
+        maxCost: environment.images.maxInFlightBytes,
+        cost: file => costs.get(file),
+        onSettled: (settled, index) => onResult(toFileResult(settled, index), index)
+      }, file => this.handleFileUpload(file, imageType, customDimensions));
+
+      return settledResults.map(toFileResult);
+    } finally {
+      // Disk-stored uploads leave temp files behind whether or not they succeeded
+      await Promise.all(files
+        .filter(file => file.path)
+        .map(file => fs.unlink(file.path).catch(() => {})));
+    }
+  }
+
+  // Cache keys for URL imports: the downloaded source, and the upload result per target size
+  getUrlImportKeys(imageUrl, imageType = 'banner', customDimensions = null) {
+    const dimensions = customDimensions || this.getOptimalDimensions(imageType);
+    const urlHash = crypto.createHash('sha256').update(imageUrl).digest('hex');
+
+    return {
+      sourceKey: `${urlHash}.src`,
+      resultKey: `${urlHash}-${imageType}-${dimensions.width}x${dimensions.height}.json`
+    };
+  }
+
+  // Uploaded image URL -> result key, so deleteImage can drop a stale import result
+  getImportReferenceKey(uploadedImageUrl) {
+    return `${crypto.createHash('sha1').update(uploadedImageUrl).digest('hex')}.ref`;
+  }
+
+  // Cached import result, or null when there is none or its stored set has
+  // since been deleted or collected (e.g. by the GC job on another host)
+  async readUrlImport(resultKey) {
+    const cachedResult = await this.importCache.read(resultKey);
+    if (!cachedResult) {
+      return null;
+    }
+
+    const result = JSON.parse(cachedResult.toString('utf8'));
+    if (result.contentHash) {
+      const stored = await this.findStoredImage(result.contentHash);
+      if ((!stored && this.imageStoreInstalled) || (stored && stored.gc_started_at)) {
+        await this.forgetUrlImport(result.imageUrl);
+        return null;
       }
+    }
 
-      console.log(`🌐 Processing image from URL (${imageType}):`, imageUrl);
+    return result;
+  }
+
+  // Drop the cached import result that produced an uploaded image URL
+  async forgetUrlImport(uploadedImageUrl) {
+    const referenceKey = this.getImportReferenceKey(uploadedImageUrl);
+    const resultKey = await this.importCache.read(referenceKey);
+    if (resultKey) {
+      await this.importCache.delete(resultKey.toString('utf8'));
+    }
+    await this.importCache.delete(referenceKey);
+  }
+
+  async isUrlImportCached(imageUrl, imageType = 'banner', customDimensions = null) {
+    const { resultKey } = this.getUrlImportKeys(imageUrl, imageType, customDimensions);
+    return Boolean(await this.readUrlImport(resultKey));
+  }
+
+  // Download an image into the import cache without buffering it in memory.
+  // Aborts before reading the body when the content type is not an image or
+  // the declared length is too large, and mid-stream once maxFileSize is exceeded.
+  // Concurrent callers for the same source share one download. Redirects are
+  // followed by hand so every hop is checked against isAllowed(url).
+  downloadImageSource(imageUrl, sourceKey, { isAllowed = () => true } = {}) {
+    if (this.pendingDownloads.has(sourceKey)) {
+      return this.pendingDownloads.get(sourceKey);
+    }
+
+    const download = this.fetchImageSource(imageUrl, sourceKey, isAllowed).finally(() => {
+      this.pendingDownloads.delete(sourceKey);
+    });
+
+    this.pendingDownloads.set(sourceKey, download);
+    return download;
+  }
+
+  async fetchImageSource(imageUrl, sourceKey, isAllowed) {
+    const cachedPath = await this.importCache.get(sourceKey);
+    if (cachedPath) {
+      const { size } = await fs.stat(cachedPath);
+      return { path: cachedPath, size, cached: true };
+    }
+
+    const controller = new AbortController();
+    let currentUrl = imageUrl;
+    let response;
+
+    try {
+      for (let redirects = 0; ; redirects++) {
+        const { protocol } = new URL(currentUrl);
+        if ((protocol !== 'http:' && protocol !== 'https:') || !isAllowed(currentUrl)) {
+          throw new Error(`Image URL not allowed: ${currentUrl}`);
+        }
+
+        response = await fetch(currentUrl, { signal: controller.signal, redirect: 'manual' });
+
+        const location = response.headers.get('location');
+        if (response.status < 300 || response.status >= 400 || !location) {
+          break;
+        }
+
+        if (redirects >= MAX_SOURCE_REDIRECTS) {
+          throw new Error(`Too many redirects fetching ${imageUrl}`);
+        }
+
+        await response.body?.cancel();
+        currentUrl = new URL(location, currentUrl).toString();
+      }
 
-      // Fetch image from URL
-      const response = await fetch(imageUrl);
-      
       if (!response.ok) {
         throw new Error(`Failed to fetch image: ${response.status} ${response.statusText}`);
       }
 
-      const contentType = response.headers.get('content-type');
+      const contentType = normalizeContentType(response.headers.get('content-type'));
       if (!this.allowedMimeTypes.includes(contentType)) {
         throw new Error(`Unsupported image type: ${contentType}`);
       }
 
-      // Get image buffer
-      const arrayBuffer = await response.arrayBuffer();
-      const buffer = Buffer.from(arrayBuffer);
+      const declaredLength = parseInt(response.headers.get('content-length'));
+      if (declaredLength > this.maxFileSize) {
+        throw new Error(`Image too large: ${declaredLength} bytes (limit ${this.maxFileSize})`);
+      }
+    } catch (error) {
+      controller.abort();
+      throw error;
+    }
+
+    const maxFileSize = this.maxFileSize;
+    let received = 0;
+    const sizeLimit = new Transform({
+      transform(chunk, encoding, callback) {
+        received += chunk.length;
+        if (received > maxFileSize) {
+          callback(new Error(`Image too large: exceeded ${maxFileSize} bytes`));
+        } else {
+          callback(null, chunk);
+        }
+      }
+    });
+
+    const tempFilePath = this.importCache.tempPath(sourceKey);
+    try {
+      await pipeline(Readable.fromWeb(response.body), sizeLimit, createWriteStream(tempFilePath));
+    } catch (error) {
+      controller.abort();
+      await fs.unlink(tempFilePath).catch(() => {});
+      throw error;
+    }
+
+    const sourcePath = await this.importCache.commit(sourceKey, tempFilePath);
+    return { path: sourcePath, size: received, cached: false };
+  }
+
+  // ==============================================
+  // 📐 ON-DEMAND RESIZE
+  // ==============================================
+
+  // Smallest allowed width >= the requested one (the largest when above every step)
+  getResizeWidth(requestedWidth) {
+    return RESIZE_WIDTHS.find(width => width >= requestedWidth) || RESIZE_WIDTHS[RESIZE_WIDTHS.length - 1];
+  }
+
+  // Only our own storage and configured image hosts can be proxied
+  isResizeSourceAllowed(sourceUrl) {
+    let url;
+    try {
+      url = new URL(sourceUrl);
+    } catch (error) {
+      return false;
+    }
+
+    if (!['http:', 'https:'].includes(url.protocol)) {
+      return false;
+    }
+
+    const host = url.hostname.toLowerCase();
+    const supabaseHost = environment.supabase.url ? new URL(environment.supabase.url).hostname.toLowerCase() : null;
+
+    return host === supabaseHost || environment.images.resizeAllowedHosts.includes(host);
+  }
+
+  // Cache key of a resized variant; also its ETag, so conditional requests
+  // can be answered before any download or transform
+  getResizeKey(sourceUrl, requestedWidth, format) {
+    const width = this.getResizeWidth(requestedWidth);
+    const key = `${crypto.createHash('sha256')
+      .update(`v${RESIZE_VERSION}:${sourceUrl}`)
+      .digest('hex')}-${width}.${VARIANT_FORMATS[format].extension}`;
+
+    return { key, width };
+  }
+
+  // Resize a remote image to the given width and format (a VARIANT_FORMATS key).
+  // Each (source, width, format) is transformed once and then served from the
+  // resize cache; concurrent requests for the same variant share one transform.
+  getResizedImage(sourceUrl, requestedWidth, format) {
+    const { key, width } = this.getResizeKey(sourceUrl, requestedWidth, format);
+    const { contentType, options } = VARIANT_FORMATS[format];
+
+    if (this.pendingResizes.has(key)) {
+      return this.pendingResizes.get(key);
+    }
+
+    const resize = (async () => {
+      const cachedPath = await this.resizeCache.get(key);
+      if (cachedPath) {
+        return { path: cachedPath, key, width, contentType, cached: true };
+      }
+
+      // Kept apart from /from-url sources, which may have followed redirects
+      // to hosts this endpoint must not proxy
+      const { sourceKey } = this.getUrlImportKeys(sourceUrl);
+      const source = await this.downloadImageSource(sourceUrl, `resize-${sourceKey}`, {
+        isAllowed: url => this.isResizeSourceAllowed(url)
+      });
+
+      let pipelineImage = sharp(source.path)
+        .rotate()
+        .resize({ width, withoutEnlargement: true });
+
+      if (format === 'jpeg') {
+        pipelineImage = pipelineImage.flatten({ background: '#ffffff' });
+      }
+
+      const tempFilePath = this.resizeCache.tempPath(key);
+      try {
+        await pipelineImage.toFormat(format, options).toFile(tempFilePath);
+      } catch (error) {
+        await fs.unlink(tempFilePath).catch(() => {});
+        throw error;
+      }
+
+      const resizedPath = await this.resizeCache.commit(key, tempFilePath);
+      return { path: resizedPath, key, width, contentType, cached: false };
+    })().finally(() => {
+      this.pendingResizes.delete(key);
+    });
+
+    this.pendingResizes.set(key, resize);
+    return resize;
+  }
+
+  // getResizedImage with the file already open: a commit for another key can
+  // evict (unlink) a cached file at any time, but an open handle keeps it
+  // readable. A file evicted between lookup and open is resized again.
+  async openResizedImage(sourceUrl, requestedWidth, format) {
+    for (let attempt = 0; ; attempt++) {
+      const resized = await this.getResizedImage(sourceUrl, requestedWidth, format);
+      try {
+        const handle = await fs.open(resized.path, 'r');
+        try {
+          const { size } = await handle.stat();
+          return { ...resized, handle, size };
+        } catch (statError) {
+          await handle.close();
+          throw statError;
+        }
+      } catch (error) {
+        if (error.code !== 'ENOENT' || attempt > 0) {
+          throw error;
+        }
+      }
+    }
+  }
+
+  // Fetch and process image from URL
+  async handleImageFromUrl(imageUrl, imageType = 'banner', customDimensions = null) {
+    try {
+      if (!imageUrl || typeof imageUrl !== 'string') {
+        throw new Error('Invalid image URL provided');
+      }
+
+      const { protocol } = new URL(imageUrl);
+      if (protocol !== 'http:' && protocol !== 'https:') {
+        throw new Error(`Unsupported URL protocol: ${protocol}`);
+      }
+
+      const { sourceKey, resultKey } = this.getUrlImportKeys(imageUrl, imageType, customDimensions);
+
+      // Same URL imported at the same size before: no download, transform or upload
+      const cachedResult = await this.readUrlImport(resultKey);
+      if (cachedResult) {
+        console.log('✅ Image from URL served from import cache:', cachedResult.imageUrl);
+        return { ...cachedResult, cached: true };
+      }
+
+      console.log(`🌐 Processing image from URL (${imageType}):`, imageUrl);
+
+      // Stream the source to disk; sharp reads it from there
+      const source = await this.downloadImageSource(imageUrl, sourceKey);
 
-      // Process image
-      const processedBuffer = await this.processImage(buffer, imageType, customDimensions);
-      
       // Generate filename from URL
       const urlPath = new URL(imageUrl).pathname;
       const fileName = path.basename(urlPath) || 'image-from-url.jpg';
       
-      // Upload to Supabase
-      const uploadResult = await this.uploadToSupabase(
-        processedBuffer, 
-        fileName, 
+      // Process into responsive variants and upload (or reuse an identical stored image)
+      const uploadResult = await this.storeImage(
+        source.path,
+        { imageType, customDimensions, originalName: fileName },
         'images'
       );
 
-      console.log('✅ Image from URL processed successfully:', uploadResult.publicUrl);
+      console.log(`✅ Image from URL processed successfully${uploadResult.deduplicated ? ' (deduplicated)' : ''}:`, uploadResult.publicUrl);
 
-      return {
+      const result = {
         success: true,
         imageUrl: uploadResult.publicUrl,
         fileName: uploadResult.fileName,
-        fileSize: processedBuffer.length,
-        dimensions: this.getOptimalDimensions(imageType),
+        fileSize: uploadResult.fileSize,
+        dimensions: uploadResult.dimensions,
+        variants: uploadResult.variants,
+        srcset: uploadResult.srcset,
+        manifestUrl: uploadResult.manifestUrl,
+        contentHash: uploadResult.contentHash,
+        deduplicated: uploadResult.deduplicated,
         originalUrl: imageUrl,
-        originalSize: buffer.length
+        originalSize: source.size
       };
+
+      try {
+        await this.importCache.write(resultKey, JSON.stringify(result));
+        await this.importCache.write(this.getImportReferenceKey(result.imageUrl), resultKey);
+      } catch (cacheError) {
+        console.warn('⚠️ Failed to cache image import:', cacheError.message);
+      }
+
+      return result;
     } catch (error) {
       console.error('❌ Image URL processing error:', error);
       throw error;
@@ -271,7 +1001,7 @@ class ImageUploadService {
   async validateImageUrl(imageUrl) {
     try {
       const response = await fetch(imageUrl, { method: 'HEAD' });
-      const contentType = response.headers.get('content-type');
+      const contentType = normalizeContentType(response.headers.get('content-type'));
       
       return {
         valid: response.ok && this.allowedMimeTypes.includes(contentType),
@@ -292,22 +1022,82 @@ class ImageUploadService {
       // Extract file path from public URL
       const url = new URL(imageUrl);
       const pathSegments = url.pathname.split('/');
-      const filePath = pathSegments.slice(-2).join('/'); // Get last 2 segments (uploads/filename)
 
       // Get admin Supabase client for storage operations
       const supabase = getAdminSupabaseClient();
 
+      // Content-addressed sets can be shared by several products/banners. The
+      // set is claimed (like the GC does) before its files go, so no upload can
+      // deduplicate onto it and no row can start referencing it meanwhile.
+      const contentHash = getImageHash(imageUrl);
+      let claimed = null;
+      if (contentHash) {
+        const { data, error: claimError } = await supabase.rpc('claim_stored_image', { p_hash: contentHash });
+
+        if (claimError && !isMissingFunctionError(claimError)) {
+          return { success: false, error: claimError.message };
+        }
+
+        claimed = claimError ? null : (Array.isArray(data) ? data[0] : data) || null;
+
+        if (!claimed) {
+          const stored = await this.findStoredImage(contentHash);
+          if (stored && stored.ref_count > 0) {
+            return {
+              success: false,
+              error: `Image is still referenced by ${stored.ref_count} item(s)`
+            };
+          }
+          if (stored && !claimError) {
+            return { success: false, error: 'Image is already being deleted' };
+          }
+        }
+      }
+
+      let filePaths;
+      let filePath;
+      if (getImageVariants(imageUrl)) {
+        // Variant set: remove every size/format and the manifest
+        filePath = pathSegments.slice(-4, -1).join('/'); // uploads/variants/<id>
+        const { data: files, error: listError } = await supabase.storage
+          .from(bucketName)
+          .list(filePath);
+
+        if (listError) {
+          console.error('❌ Error listing image variants:', listError);
+          return { success: false, error: listError.message };
+        }
+
+        filePaths = (files || []).map(file => `${filePath}/${file.name}`);
+      } else {
+        filePath = pathSegments.slice(-2).join('/'); // Get last 2 segments (uploads/filename)
+        filePaths = [filePath];
+      }
+
       const { error } = await supabase.storage
         .from(bucketName)
-        .remove([filePath]);
+        .remove(filePaths);
 
       if (error) {
         console.error('❌ Error deleting image:', error);
         return { success: false, error: error.message };
       }
 
+      if (claimed) {
+        const { error: rowError } = await supabase.rpc('finish_image_collection', {
+          p_hashes: [contentHash]
+        });
+
+        if (rowError) {
+          console.warn('⚠️ Failed to remove image store entry:', rowError.message);
+        }
+      }
+
+      // Re-importing the same source URL must not hand back the deleted image
+      await this.forgetUrlImport(imageUrl);
+
       console.log('✅ Image deleted successfully:', filePath);
-      return { success: true, deletedPath: filePath };
+      return { success: true, deletedPath: filePath, deletedFiles: filePaths.length };
     } catch (error) {
       console.error('❌ Delete image error:', error);
       return { success: false, error: error.message };
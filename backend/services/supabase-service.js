@@ -4,6 +4,8 @@
 
 const { createClient } = require('@supabase/supabase-js');
 const { environment } = require('../config/environment');
+const { applyPagination, buildPage, buildCursorPage, decodeCursor, encodeCursor } = require('../utils/pagination');
+const { invalidateResponseCache } = require('../middleware/response-cache');
 
 // ==============================================
 // 🔧 SUPABASE CLIENT INITIALIZATION
@@ -97,6 +99,19 @@ const getAdminSupabaseClient = () => {
   }
 };
 
+// ==============================================
+// 🔍 RPC HELPERS
+// ==============================================
+// True when a database function has not been installed yet (PostgREST or Postgres error)
+const isMissingFunctionError = (error) => {
+  return !!error && (error.code === 'PGRST202' || error.code === '42883');
+};
+
+// True when a table/view has not been created yet (PostgREST or Postgres error)
+const isMissingRelationError = (error) => {
+  return !!error && (error.code === 'PGRST205' || error.code === '42P01');
+};
+
 // ==============================================
 // 🧪 CONNECTION TEST
 // ==============================================
@@ -241,6 +256,130 @@ const userService = {
       console.error('❌ Update user profile failed:', error.message);
       return { success: false, error: error.message };
     }
+  },
+
+  // Profile dashboard (counts, total spent, recent orders) in one round-trip
+  getDashboardSummary: async (userId) => {
+    try {
+      const client = getAdminSupabaseClient();
+
+      const { data: summary, error } = await client.rpc('user_dashboard_summary', {
+        p_user_id: userId
+      });
+
+      if (error) {
+        if (isMissingFunctionError(error)) {
+          console.warn('⚠️  user_dashboard_summary RPC not installed, using fallback:', error.message);
+          return await userService.getDashboardSummaryFallback(userId);
+        }
+        throw error;
+      }
+
+      const stats = summary.stats || {};
+      return {
+        success: true,
+        user: summary.user,
+        stats: {
+          totalOrders: Number(stats.total_orders || 0),
+          activeDeliveries: Number(stats.active_deliveries || 0),
+          completedOrders: Number(stats.completed_orders || 0),
+          totalSpent: Number(stats.total_spent || 0),
+          cartItems: Number(stats.cart_items || 0),
+          wishlistItems: Number(stats.wishlist_items || 0)
+        },
+        recentOrders: summary.recent_orders || []
+      };
+    } catch (error) {
+      console.error('❌ Get dashboard summary failed:', error.message);
+      return { success: false, error: error.message };
+    }
+  },
+
+  // Legacy per-table dashboard queries (used until migration-user-dashboard-summary.sql is applied)
+  getDashboardSummaryFallback: async (userId) => {
+    try {
+      const client = getSupabaseClient();
+
+      // Get user info
+      const { data: user, error: userError } = await client
+        .from('users')
+        .select('full_name, created_at')
+        .eq('id', userId)
+        .single();
+
+      if (userError) throw userError;
+
+      // Get order statistics
+      const { data: orders, error: ordersError } = await client
+        .from('orders')
+        .select('status, total_amount')
+        .eq('user_id', userId);
+
+      if (ordersError) throw ordersError;
+
+      // Get cart items count
+      const { data: cartItems, error: cartError } = await client
+        .from('cart_items')
+        .select('id, carts!inner(user_id, status)')
+        .eq('carts.user_id', userId)
+        .eq('carts.status', 'active');
+
+      if (cartError) {
+        console.warn('Cart items fetch failed:', cartError.message);
+      }
+
+      // Get wishlist count
+      const { data: wishlistItems, error: wishlistError } = await client
+        .from('user_wishlist')
+        .select('id')
+        .eq('user_id', userId);
+
+      if (wishlistError) {
+        console.warn('Wishlist fetch failed:', wishlistError.message);
+      }
+
+      // Get recent orders
+      const { data: recentOrders, error: recentOrdersError } = await client
+        .from('orders')
+        .select(`
+          id,
+          order_number,
+          status,
+          total_amount,
+          created_at,
+          order_items (
+            product_name,
+            quantity,
+            unit_price
+          )
+        `)
+        .eq('user_id', userId)
+        .order('created_at', { ascending: false })
+        .limit(5);
+
+      if (recentOrdersError) {
+        console.warn('Recent orders fetch failed:', recentOrdersError.message);
+      }
+
+      const totalSpent = orders?.reduce((sum, order) => sum + parseFloat(order.total_amount || 0), 0) || 0;
+
+      return {
+        success: true,
+        user,
+        stats: {
+          totalOrders: orders?.length || 0,
+          activeDeliveries: orders?.filter(o => ['processing', 'shipped'].includes(o.status)).length || 0,
+          completedOrders: orders?.filter(o => o.status === 'delivered').length || 0,
+          totalSpent: Math.round(totalSpent * 100) / 100,
+          cartItems: cartItems?.length || 0,
+          wishlistItems: wishlistItems?.length || 0
+        },
+        recentOrders: recentOrders || []
+      };
+    } catch (error) {
+      console.error('❌ Get dashboard summary fallback failed:', error.message);
+      return { success: false, error: error.message };
+    }
   }
 };
 
@@ -249,25 +388,29 @@ const userService = {
 // ==============================================
 const productService = {
   // Get all products
-  getAllProducts: async (page = 1, limit = 20) => {
+  getAllProducts: async (page = 1, limit = 20, cursor = null) => {
     try {
       const client = getSupabaseClient();
-      const offset = (page - 1) * limit;
       
-      const { data, error, count } = await client
+      // Planner estimates keep deep pages from paying for an exact COUNT(*)
+      const query = client
         .from('products')
-        .select('*', { count: 'exact' })
-        .eq('is_active', true)
-        .range(offset, offset + limit - 1)
-        .order('created_at', { ascending: false });
+        .select('*', { count: cursor ? 'planned' : 'estimated' })
+        .eq('is_active', true);
+
+      const { data, error, count } = await applyPagination(query, { page, limit, cursor });
 
       if (error) throw error;
+
+      const pageInfo = buildPage(data, { page, limit, cursor, count });
       return { 
         success: true, 
-        products: data, 
-        totalCount: count,
-        currentPage: page,
-        totalPages: Math.ceil(count / limit)
+        products: pageInfo.items, 
+        totalCount: pageInfo.totalCount,
+        currentPage: pageInfo.currentPage,
+        totalPages: pageInfo.totalPages,
+        nextCursor: pageInfo.nextCursor,
+        hasMore: pageInfo.hasMore
       };
     } catch (error) {
       console.error('❌ Get products failed:', error.message);
@@ -295,38 +438,36 @@ const productService = {
   },
 
   // Get products by category
-  getProductsByCategory: async (categorySlug, page = 1, limit = 20) => {
+  getProductsByCategory: async (categorySlug, page = 1, limit = 20, cursor = null) => {
     try {
       const client = getSupabaseClient();
-      const offset = (page - 1) * limit;
       
-      // First get category ID
-      const { data: category } = await client
-        .from('categories')
-        .select('id')
-        .eq('slug', categorySlug)
-        .single();
+      const category = await categoryService.getCategoryBySlug(categorySlug);
 
       if (!category) {
         throw new Error('Category not found');
       }
 
-      const { data, error, count } = await client
+      const query = client
         .from('products')
-        .select('*', { count: 'exact' })
+        .select('*', { count: cursor ? 'planned' : 'estimated' })
         .eq('category_id', category.id)
-        .eq('is_active', true)
-        .range(offset, offset + limit - 1)
-        .order('created_at', { ascending: false });
+        .eq('is_active', true);
+
+      const { data, error, count } = await applyPagination(query, { page, limit, cursor });
 
       if (error) throw error;
+
+      const pageInfo = buildPage(data, { page, limit, cursor, count });
       return { 
         success: true, 
-        products: data,
+        products: pageInfo.items,
         category: categorySlug, 
-        totalCount: count,
-        currentPage: page,
-        totalPages: Math.ceil(count / limit)
+        totalCount: pageInfo.totalCount,
+        currentPage: pageInfo.currentPage,
+        totalPages: pageInfo.totalPages,
+        nextCursor: pageInfo.nextCursor,
+        hasMore: pageInfo.hasMore
       };
     } catch (error) {
       console.error('❌ Get products by category failed:', error.message);
@@ -345,6 +486,9 @@ const productService = {
         .single();
 
       if (error) throw error;
+
+      invalidateResponseCache('products', 'deals');
+
       return { success: true, product: data };
     } catch (error) {
       console.error('❌ Create product failed:', error.message);
@@ -466,6 +610,8 @@ const productService = {
         total_reviews: data.total_reviews
       };
 
+      invalidateResponseCache('products', 'deals');
+
       return { 
         success: true, 
         product: transformedProduct
@@ -554,6 +700,8 @@ const productService = {
         reviews: data.reviews
       };
 
+      invalidateResponseCache('products', 'deals');
+
       return { 
         success: true, 
         product: transformedProduct
@@ -594,6 +742,8 @@ const productService = {
 
       if (error) throw error;
 
+      invalidateResponseCache('products', 'deals');
+
       return { 
         success: true, 
         message: `Product "${existingProduct.name}" has been deleted successfully`,
@@ -727,6 +877,8 @@ const productService = {
         total_reviews: data.total_reviews
       };
 
+      invalidateResponseCache('products', 'deals');
+
       return { 
         success: true, 
         product: transformedProduct
@@ -737,8 +889,54 @@ const productService = {
     }
   },
 
-  // Get related products based on category and description similarity
+  // Get related products from the precomputed product_related table (one indexed lookup)
   getRelatedProducts: async (productId, limit = 10) => {
+    try {
+      const client = getSupabaseClient();
+
+      const { data, error } = await client.rpc('get_related_products', {
+        p_product_id: productId,
+        p_limit: limit
+      });
+
+      if (error) {
+        if (isMissingFunctionError(error)) {
+          console.warn('⚠️  get_related_products RPC not installed, using fallback:', error.message);
+          return await productService.getRelatedProductsFallback(productId, limit);
+        }
+        throw error;
+      }
+
+      // Products added since the last refresh job have no neighbours yet
+      if (!data || data.length === 0) {
+        return await productService.getRelatedProductsFallback(productId, limit);
+      }
+
+      return {
+        success: true,
+        products: data.map(product => ({
+          id: product.id,
+          name: product.name,
+          slug: product.slug,
+          price: product.price,
+          original_price: product.original_price,
+          images: product.images,
+          brand: product.brand,
+          category_name: product.category_name,
+          stock_quantity: product.stock_quantity,
+          rating_average: product.rating_average,
+          total_reviews: product.total_reviews,
+          is_active: true
+        }))
+      };
+    } catch (error) {
+      console.error('❌ Get related products failed:', error.message);
+      return { success: false, error: error.message };
+    }
+  },
+
+  // Legacy multi-query related products (used until migration-product-related.sql is applied)
+  getRelatedProductsFallback: async (productId, limit = 10) => {
     try {
       const client = getSupabaseClient();
       
@@ -845,8 +1043,127 @@ const productService = {
     }
   },
 
+  // Recompute product_related (queued products only unless full = true)
+  refreshRelatedProducts: async ({ full = false, limit = 20 } = {}) => {
+    try {
+      const client = getAdminSupabaseClient();
+
+      const { data: written, error } = full
+        ? await client.rpc('refresh_product_related', { p_product_ids: null, p_limit: limit })
+        : await client.rpc('refresh_product_related_queue', { p_limit: limit });
+
+      if (error) throw error;
+
+      return { success: true, written: written || 0, full };
+    } catch (error) {
+      console.error('❌ Refresh related products failed:', error.message);
+      return { success: false, error: error.message };
+    }
+  },
+
   // Search products by query
   searchProducts: async (query, options = {}) => {
+    try {
+      const client = getSupabaseClient();
+      const { 
+        page = 1, 
+        limit = 20, 
+        category = null, 
+        cursor = null
+      } = options;
+      // Cursor pagination walks results newest-first on (created_at, id)
+      const sortBy = cursor ? 'newest' : (options.sortBy || 'relevance');
+      
+      const offset = (page - 1) * limit;
+
+      const position = cursor ? decodeCursor(cursor) : null;
+      if (cursor && !position) {
+        throw new Error('Invalid pagination cursor');
+      }
+
+      // Ranked full-text + trigram search in one round-trip
+      const { data: rows, error } = await client.rpc('search_products', {
+        p_query: query || '',
+        p_category: category,
+        p_sort: sortBy,
+        p_limit: cursor ? limit + 1 : limit,
+        p_offset: cursor ? 0 : offset,
+        p_after_created_at: position ? position.createdAt : null,
+        p_after_id: position ? position.id : null
+      });
+
+      if (error) {
+        if (isMissingFunctionError(error)) {
+          console.warn('⚠️  search_products RPC not installed, using fallback:', error.message);
+          return await productService.searchProductsFallback(query, options);
+        }
+        throw error;
+      }
+
+      const count = rows && rows.length > 0 ? Number(rows[0].total_count) : 0;
+      let cursorPage;
+      if (cursor) {
+        cursorPage = buildCursorPage(rows, limit);
+      } else {
+        const hasMore = offset + (rows || []).length < count;
+        cursorPage = {
+          items: rows || [],
+          hasMore,
+          // Only newest-first results line up with the (created_at, id) cursor
+          nextCursor: hasMore && sortBy === 'newest' ? encodeCursor(rows[rows.length - 1]) : null
+        };
+      }
+      const data = cursorPage.items;
+
+      // Transform the data to match expected format
+      const transformedProducts = (data || []).map(product => ({
+        id: product.id,
+        name: product.name,
+        description: product.description,
+        slug: product.slug,
+        price: product.price,
+        original_price: product.original_price,
+        images: product.images,
+        brand: product.brand,
+        category_name: product.category_name,
+        category_slug: product.category_slug,
+        stock_quantity: product.stock_quantity,
+        rating_average: product.rating_average || 0,
+        total_reviews: product.total_reviews || 0,
+        is_active: product.is_active,
+        is_featured: product.is_featured,
+        created_at: product.created_at,
+        relevance: product.rank
+      }));
+
+      return { 
+        success: true, 
+        products: transformedProducts,
+        searchQuery: query || '',
+        category: category || 'All',
+        sortBy: sortBy,
+        totalCount: count,
+        currentPage: page,
+        totalPages: Math.ceil(count / limit),
+        nextCursor: cursorPage.nextCursor,
+        hasMore: cursorPage.hasMore,
+        pagination: {
+          currentPage: page,
+          totalPages: Math.ceil(count / limit),
+          totalCount: count,
+          limit: limit,
+          nextCursor: cursorPage.nextCursor,
+          hasMore: cursorPage.hasMore
+        }
+      };
+    } catch (error) {
+      console.error('❌ Search products failed:', error.message);
+      return { success: false, error: error.message };
+    }
+  },
+
+  // Search products with ilike filters (used until migration-product-search.sql is applied)
+  searchProductsFallback: async (query, options = {}) => {
     try {
       const client = getSupabaseClient();
       const { 
@@ -894,12 +1211,7 @@ const productService = {
 
       // Apply category filter
       if (category && category !== 'All') {
-        // First get category ID
-        const { data: categoryData } = await client
-          .from('categories')
-          .select('id')
-          .ilike('name', category)
-          .single();
+        const categoryData = await categoryService.getCategoryByName(category);
           
         if (categoryData) {
           supabaseQuery = supabaseQuery.eq('category_id', categoryData.id);
@@ -983,6 +1295,12 @@ const productService = {
 // ==============================================
 // 🛒 CART MANAGEMENT SERVICES  
 // ==============================================
+// Whether carts.total_amount is maintained by the maintain_cart_total trigger.
+// migration-add-to-cart-rpc.sql requires migration-cart-totals.sql, so a working
+// add_to_cart RPC proves the trigger is installed; until then (null) or when the
+// RPC is missing (false) the service recomputes totals itself.
+let cartTotalTriggerInstalled = null;
+
 const cartService = {
   // Ensure user exists in users table (ENHANCED AUTO-SYNC VERSION)
   ensureUserExists: async (userId) => {
@@ -1062,8 +1380,36 @@ const cartService = {
     }
   },
 
-  // Add item to cart
+  // Add item to cart (single round-trip through the add_to_cart RPC)
   addToCart: async (userId, productId, quantity) => {
+    try {
+      const client = getSupabaseClient();
+
+      const { data: cartItem, error } = await client.rpc('add_to_cart', {
+        p_user_id: userId,
+        p_product_id: productId,
+        p_quantity: quantity
+      });
+
+      if (error) {
+        if (isMissingFunctionError(error)) {
+          cartTotalTriggerInstalled = false;
+          console.warn('⚠️  add_to_cart RPC not installed, using fallback:', error.message);
+          return await cartService.addToCartFallback(userId, productId, quantity);
+        }
+        throw new Error(error.message);
+      }
+
+      cartTotalTriggerInstalled = true;
+      return { success: true, cartItem: cartItem };
+    } catch (error) {
+      console.error('❌ Add to cart failed:', error.message);
+      return { success: false, error: error.message };
+    }
+  },
+
+  // Add item to cart with individual queries (used until migration-add-to-cart-rpc.sql is applied)
+  addToCartFallback: async (userId, productId, quantity) => {
     try {
       const client = getSupabaseClient();
       
@@ -1186,7 +1532,7 @@ const cartService = {
         cartItem = newItem;
       }
 
-      // Recalculate cart total
+      // Without the migrations there is no maintain_cart_total trigger either
       await cartService.updateCartTotal(cart.id);
 
       return { success: true, cartItem: cartItem };
@@ -1236,8 +1582,8 @@ const cartService = {
 
       if (updateError) throw updateError;
 
-      // Recalculate cart total
-      await cartService.updateCartTotal(cartItem.cart_id);
+      // Kept in sync by the maintain_cart_total trigger once it is known to be installed
+      await cartService.syncCartTotal(cartItem.cart_id);
 
       return { success: true, cartItem: updatedItem };
     } catch (error) {
@@ -1274,8 +1620,8 @@ const cartService = {
 
       if (deleteError) throw deleteError;
 
-      // Recalculate cart total
-      await cartService.updateCartTotal(cartItem.cart_id);
+      // Kept in sync by the maintain_cart_total trigger once it is known to be installed
+      await cartService.syncCartTotal(cartItem.cart_id);
 
       return { success: true, message: 'Item removed from cart' };
     } catch (error) {
@@ -1301,7 +1647,7 @@ const cartService = {
         return { success: true, message: 'Cart is already empty' };
       }
 
-      // Delete all cart items
+      // Delete all cart items (the cart_items trigger brings the total back to 0)
       const { error: deleteError } = await client
         .from('cart_items')
         .delete()
@@ -1309,13 +1655,7 @@ const cartService = {
 
       if (deleteError) throw deleteError;
 
-      // Update cart total to 0
-      const { error: updateError } = await client
-        .from('carts')
-        .update({ total_amount: 0 })
-        .eq('id', cart.id);
-
-      if (updateError) throw updateError;
+      await cartService.syncCartTotal(cart.id);
 
       return { success: true, message: 'Cart cleared successfully' };
     } catch (error) {
@@ -1324,11 +1664,19 @@ const cartService = {
     }
   },
 
-  // Helper function to update cart total
+  // Recompute the total unless the maintain_cart_total trigger already did
+  syncCartTotal: async (cartId) => {
+    if (cartTotalTriggerInstalled === true) {
+      return null;
+    }
+    return cartService.updateCartTotal(cartId);
+  },
+
+  // Legacy full re-sum of a cart's items (used until migration-cart-totals.sql is applied)
   updateCartTotal: async (cartId) => {
     try {
       const client = getSupabaseClient();
-      
+
       // Calculate total from cart items
       const { data: items, error: itemsError } = await client
         .from('cart_items')
@@ -1352,6 +1700,94 @@ const cartService = {
       console.error('❌ Update cart total failed:', error.message);
       throw error;
     }
+  },
+
+  // Find (and optionally repair) carts whose total_amount drifted from their items
+  verifyCartTotals: async (repair = false) => {
+    try {
+      const client = getAdminSupabaseClient();
+
+      const { data: mismatches, error } = await client.rpc('verify_cart_totals', {
+        p_repair: repair
+      });
+
+      if (error) throw error;
+
+      return { success: true, mismatches: mismatches || [], repaired: repair };
+    } catch (error) {
+      console.error('❌ Verify cart totals failed:', error.message);
+      return { success: false, error: error.message };
+    }
+  }
+};
+
+// ==============================================
+// 🗂️ CATEGORY INDEX
+// ==============================================
+// Process-wide slug / lowercase-name lookup so category pages and filtered
+// searches resolve a category without a round-trip. Loaded at boot and
+// reloaded after every category mutation; misses fall back to the database.
+const categoryIndex = {
+  bySlug: new Map(),
+  byName: new Map(),
+  loadedAt: null,
+  loading: null
+};
+
+const loadCategoryIndex = () => {
+  if (categoryIndex.loading) {
+    return categoryIndex.loading;
+  }
+
+  categoryIndex.loading = (async () => {
+    try {
+      const result = await categoryService.getAllCategories();
+      if (!result.success) {
+        throw new Error(result.error);
+      }
+
+      const bySlug = new Map();
+      const byName = new Map();
+      result.categories.forEach((category) => {
+        const entry = {
+          id: category.id,
+          slug: category.slug,
+          name: category.name,
+          parent_id: category.parent_id,
+          sort_order: category.sort_order
+        };
+        bySlug.set(category.slug, entry);
+        byName.set(category.name.toLowerCase(), entry);
+      });
+
+      categoryIndex.bySlug = bySlug;
+      categoryIndex.byName = byName;
+      categoryIndex.loadedAt = Date.now();
+      console.log(`🗂️ Category index loaded (${bySlug.size} categories)`);
+      return { success: true, count: bySlug.size };
+    } catch (error) {
+      console.error('❌ Load category index failed:', error.message);
+      return { success: false, error: error.message };
+    } finally {
+      categoryIndex.loading = null;
+    }
+  })();
+
+  return categoryIndex.loading;
+};
+
+// Start a load that is guaranteed to begin after any in-flight one,
+// so a load that started before a write can't be the last word
+const reloadCategoryIndex = async () => {
+  if (categoryIndex.loading) {
+    await categoryIndex.loading;
+  }
+  return loadCategoryIndex();
+};
+
+const ensureCategoryIndex = async () => {
+  if (!categoryIndex.loadedAt) {
+    await loadCategoryIndex();
   }
 };
 
@@ -1359,6 +1795,43 @@ const cartService = {
 // 📋 CATEGORY SERVICES
 // ==============================================
 const categoryService = {
+  // Reload the in-memory category index
+  refreshCategoryIndex: () => reloadCategoryIndex(),
+
+  // Resolve a category by slug (index first, database on miss)
+  getCategoryBySlug: async (slug) => {
+    await ensureCategoryIndex();
+    const indexed = categoryIndex.bySlug.get(slug);
+    if (indexed) {
+      return indexed;
+    }
+
+    const client = getSupabaseClient();
+    const { data } = await client
+      .from('categories')
+      .select('id, slug, name, parent_id, sort_order')
+      .eq('slug', slug)
+      .maybeSingle();
+    return data || null;
+  },
+
+  // Resolve a category by name, case-insensitive (index first, database on miss)
+  getCategoryByName: async (name) => {
+    await ensureCategoryIndex();
+    const indexed = categoryIndex.byName.get(String(name).toLowerCase());
+    if (indexed) {
+      return indexed;
+    }
+
+    const client = getSupabaseClient();
+    const { data } = await client
+      .from('categories')
+      .select('id, slug, name, parent_id, sort_order')
+      .ilike('name', name)
+      .maybeSingle();
+    return data || null;
+  },
+
   // Get all categories
   getAllCategories: async () => {
     try {
@@ -1400,6 +1873,9 @@ const categoryService = {
         return { success: false, error: error.message };
       }
 
+      invalidateResponseCache('categories', 'products');
+      await reloadCategoryIndex();
+
       return {
         success: true,
         category: data
@@ -1434,6 +1910,9 @@ const categoryService = {
         return { success: false, error: error.message };
       }
 
+      invalidateResponseCache('categories', 'products');
+      await reloadCategoryIndex();
+
       return {
         success: true,
         category: data
@@ -1475,6 +1954,9 @@ const categoryService = {
         return { success: false, error: error.message };
       }
 
+      invalidateResponseCache('categories', 'products');
+      await reloadCategoryIndex();
+
       return { success: true };
     } catch (error) {
       console.error('❌ Delete category service error:', error);
@@ -1487,8 +1969,48 @@ const categoryService = {
 // 📦 ORDER MANAGEMENT SERVICES
 // ==============================================
 const orderService = {
-  // Create new order from cart
+  // Create new order from cart (stock check, order, items, stock decrement and
+  // cart conversion happen atomically inside the place_order RPC)
   createOrder: async (userId, orderData) => {
+    try {
+      const client = getSupabaseClient();
+
+      const { data: order, error } = await client.rpc('place_order', {
+        p_user_id: userId,
+        p_billing_address: orderData.billingAddress,
+        p_shipping_address: orderData.shippingAddress,
+        p_payment_method: orderData.paymentMethod || 'card',
+        p_notes: orderData.notes || null,
+        p_discount_amount: orderData.discountAmount || 0
+      });
+
+      if (error) {
+        if (isMissingFunctionError(error)) {
+          console.warn('⚠️  place_order RPC not installed, using fallback:', error.message);
+          return await orderService.createOrderFallback(userId, orderData);
+        }
+
+        // Oversell / unavailable products come back as a per-item list in the error detail
+        let itemErrors;
+        try {
+          itemErrors = error.details ? JSON.parse(error.details) : undefined;
+        } catch (parseError) {
+          itemErrors = undefined;
+        }
+
+        console.error('❌ Create order failed:', error.message);
+        return { success: false, error: error.message, itemErrors };
+      }
+
+      return { success: true, order: order };
+    } catch (error) {
+      console.error('❌ Create order failed:', error.message);
+      return { success: false, error: error.message };
+    }
+  },
+
+  // Create order with individual queries (used until migration-place-order-rpc.sql is applied)
+  createOrderFallback: async (userId, orderData) => {
     try {
       const client = getSupabaseClient();
       
@@ -1605,12 +2127,11 @@ const orderService = {
   },
 
   // Get user's orders
-  getUserOrders: async (userId, page = 1, limit = 10) => {
+  getUserOrders: async (userId, page = 1, limit = 10, cursor = null) => {
     try {
       const client = getSupabaseClient();
-      const offset = (page - 1) * limit;
       
-      const { data, error, count } = await client
+      const query = client
         .from('orders')
         .select(`
           *,
@@ -1621,19 +2142,22 @@ const orderService = {
               images
             )
           )
-        `, { count: 'exact' })
-        .eq('user_id', userId)
-        .range(offset, offset + limit - 1)
-        .order('created_at', { ascending: false });
+        `, { count: cursor ? undefined : 'exact' })
+        .eq('user_id', userId);
+
+      const { data, error, count } = await applyPagination(query, { page, limit, cursor });
 
       if (error) throw error;
 
+      const pageInfo = buildPage(data, { page, limit, cursor, count });
       return { 
         success: true, 
-        orders: data,
-        totalCount: count,
-        currentPage: page,
-        totalPages: Math.ceil(count / limit)
+        orders: pageInfo.items,
+        totalCount: pageInfo.totalCount,
+        currentPage: pageInfo.currentPage,
+        totalPages: pageInfo.totalPages,
+        nextCursor: pageInfo.nextCursor,
+        hasMore: pageInfo.hasMore
       };
     } catch (error) {
       console.error('❌ Get user orders failed:', error.message);
@@ -1802,6 +2326,8 @@ const bannerService = {
         return { success: false, error: error.message };
       }
 
+      invalidateResponseCache('banners');
+
       return {
         success: true,
         banner: data
@@ -1828,6 +2354,8 @@ const bannerService = {
         return { success: false, error: error.message };
       }
 
+      invalidateResponseCache('banners');
+
       return {
         success: true,
         banner: data
@@ -1852,6 +2380,8 @@ const bannerService = {
         return { success: false, error: error.message };
       }
 
+      invalidateResponseCache('banners');
+
       return { success: true };
     } catch (error) {
       console.error('❌ Delete banner service error:', error);
@@ -1936,6 +2466,8 @@ const dealsService = {
         return { success: false, error: error.message };
       }
 
+      invalidateResponseCache('deals');
+
       return {
         success: true,
         deal: data
@@ -1962,6 +2494,8 @@ const dealsService = {
         return { success: false, error: error.message };
       }
 
+      invalidateResponseCache('deals');
+
       return {
         success: true,
         deal: data
@@ -1986,6 +2520,8 @@ const dealsService = {
         return { success: false, error: error.message };
       }
 
+      invalidateResponseCache('deals');
+
       return { success: true };
     } catch (error) {
       console.error('❌ Delete deal service error:', error);
@@ -1997,15 +2533,31 @@ const dealsService = {
 // ==============================================
 // 📝 USER REVIEWS MANAGEMENT SERVICES
 // ==============================================
+// Shape a product_review_stats row (or null) into the API stats object
+const buildReviewStats = (row) => {
+  const totalReviews = row ? row.review_count : 0;
+
+  return {
+    totalReviews,
+    averageRating: totalReviews > 0 ? Math.round((row.rating_sum / totalReviews) * 10) / 10 : 0,
+    ratingDistribution: {
+      1: row ? row.rating_1 : 0,
+      2: row ? row.rating_2 : 0,
+      3: row ? row.rating_3 : 0,
+      4: row ? row.rating_4 : 0,
+      5: row ? row.rating_5 : 0
+    }
+  };
+};
+
 const userReviewService = {
   // Get reviews for a specific product
-  getReviewsByProduct: async (productId, page = 1, limit = 10) => {
+  getReviewsByProduct: async (productId, page = 1, limit = 10, cursor = null) => {
     try {
       const client = getAdminSupabaseClient();
-      const offset = (page - 1) * limit;
       
       // Get reviews with user information
-      const { data: reviews, error, count } = await client
+      const reviewsQuery = client
         .from('user_reviews')
         .select(`
           id,
@@ -2019,36 +2571,21 @@ const userReviewService = {
             full_name,
             email
           )
-        `, { count: 'exact' })
-        .eq('product_id', productId)
-        .eq('is_approved', true)
-        .range(offset, offset + limit - 1)
-        .order('created_at', { ascending: false });
-
-      if (error) throw error;
-
-      // Get review statistics
-      const { data: stats } = await client
-        .from('user_reviews')
-        .select('rating')
+        `, { count: cursor ? 'planned' : 'estimated' })
         .eq('product_id', productId)
         .eq('is_approved', true);
 
-      // Calculate statistics
-      const reviewStats = {
-        totalReviews: stats?.length || 0,
-        averageRating: 0,
-        ratingDistribution: { 1: 0, 2: 0, 3: 0, 4: 0, 5: 0 }
-      };
+      // Review page and maintained statistics in parallel
+      const [{ data: rows, error, count }, statsResult] = await Promise.all([
+        applyPagination(reviewsQuery, { page, limit, cursor }),
+        userReviewService.getReviewStats(productId)
+      ]);
 
-      if (stats && stats.length > 0) {
-        const totalRating = stats.reduce((sum, review) => sum + review.rating, 0);
-        reviewStats.averageRating = Math.round((totalRating / stats.length) * 10) / 10;
-        
-        stats.forEach(review => {
-          reviewStats.ratingDistribution[review.rating]++;
-        });
-      }
+      if (error) throw error;
+
+      const pageInfo = buildPage(rows, { page, limit, cursor, count });
+      const reviews = pageInfo.items;
+      const reviewStats = statsResult.success ? statsResult.stats : buildReviewStats(null);
 
       // Transform reviews data
       const transformedReviews = reviews?.map(review => ({
@@ -2069,9 +2606,11 @@ const userReviewService = {
         success: true, 
         reviews: transformedReviews,
         stats: reviewStats,
-        totalCount: count,
-        currentPage: page,
-        totalPages: Math.ceil(count / limit)
+        totalCount: pageInfo.totalCount,
+        currentPage: pageInfo.currentPage,
+        totalPages: pageInfo.totalPages,
+        nextCursor: pageInfo.nextCursor,
+        hasMore: pageInfo.hasMore
       };
     } catch (error) {
       console.error('❌ Get reviews by product failed:', error.message);
@@ -2333,8 +2872,34 @@ const userReviewService = {
     }
   },
 
-  // Get review statistics for a product
+  // Get review statistics for a product (maintained by triggers in product_review_stats)
   getReviewStats: async (productId) => {
+    try {
+      const client = getAdminSupabaseClient();
+
+      const { data, error } = await client
+        .from('product_review_stats')
+        .select('review_count, rating_sum, rating_1, rating_2, rating_3, rating_4, rating_5')
+        .eq('product_id', productId)
+        .maybeSingle();
+
+      if (error) {
+        if (isMissingRelationError(error)) {
+          console.warn('⚠️  product_review_stats table not installed, using fallback:', error.message);
+          return await userReviewService.getReviewStatsFallback(productId);
+        }
+        throw error;
+      }
+
+      return { success: true, stats: buildReviewStats(data) };
+    } catch (error) {
+      console.error('❌ Get review stats failed:', error.message);
+      return { success: false, error: error.message };
+    }
+  },
+
+  // Legacy stats computed from every approved rating (used until migration-review-stats.sql is applied)
+  getReviewStatsFallback: async (productId) => {
     try {
       const client = getAdminSupabaseClient();
       
@@ -2346,22 +2911,14 @@ const userReviewService = {
 
       if (error) throw error;
 
-      const stats = {
-        totalReviews: reviews?.length || 0,
-        averageRating: 0,
-        ratingDistribution: { 1: 0, 2: 0, 3: 0, 4: 0, 5: 0 }
-      };
-
-      if (reviews && reviews.length > 0) {
-        const totalRating = reviews.reduce((sum, review) => sum + review.rating, 0);
-        stats.averageRating = Math.round((totalRating / reviews.length) * 10) / 10;
-        
-        reviews.forEach(review => {
-          stats.ratingDistribution[review.rating]++;
-        });
-      }
+      const row = { review_count: 0, rating_sum: 0, rating_1: 0, rating_2: 0, rating_3: 0, rating_4: 0, rating_5: 0 };
+      (reviews || []).forEach(review => {
+        row.review_count++;
+        row.rating_sum += review.rating;
+        row[`rating_${review.rating}`]++;
+      });
 
-      return { success: true, stats };
+      return { success: true, stats: buildReviewStats(row) };
     } catch (error) {
       console.error('❌ Get review stats failed:', error.message);
       return { success: false, error: error.message };
@@ -2373,6 +2930,8 @@ module.exports = {
   initializeSupabase,
   getSupabaseClient,
   getAdminSupabaseClient,
+  isMissingFunctionError,
+  isMissingRelationError,
   testConnection,
   userService,
   productService,
@@ -0,0 +1,97 @@
+// RitZone Bounded Runner Tests
+// ==============================================
+
+const { runBounded } = require('../utils/bounded-runner');
+
+const delay = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+// Worker that records how many jobs (and how much cost) are in flight
+const trackInFlight = (cost = () => 0) => {
+  const stats = { active: 0, maxActive: 0, activeCost: 0, maxActiveCost: 0, soloCosts: [] };
+
+  const worker = async (item) => {
+    stats.active++;
+    stats.activeCost += cost(item);
+    stats.maxActive = Math.max(stats.maxActive, stats.active);
+    stats.maxActiveCost = Math.max(stats.maxActiveCost, stats.activeCost);
+    if (stats.active === 1) {
+      stats.soloCosts.push(cost(item));
+    }
+
+    await delay(5);
+
+    stats.active--;
+    stats.activeCost -= cost(item);
+    return item;
+  };
+
+  return { stats, worker };
+};
+
+describe('runBounded', () => {
+  test('never runs more than `concurrency` jobs at once', async () => {
+    const { stats, worker } = trackInFlight();
+
+    await runBounded([1, 2, 3, 4, 5, 6], { concurrency: 2 }, worker);
+
+    expect(stats.maxActive).toBe(2);
+  });
+
+  test('keeps the summed cost of in-flight jobs within maxCost', async () => {
+    const cost = item => item;
+    const { stats, worker } = trackInFlight(cost);
+
+    await runBounded([4, 4, 4, 4], { concurrency: 4, maxCost: 10, cost }, worker);
+
+    expect(stats.maxActiveCost).toBeLessThanOrEqual(10);
+    expect(stats.maxActive).toBe(2);
+  });
+
+  test('runs an item over budget on its own', async () => {
+    const cost = item => item;
+    const { stats, worker } = trackInFlight(cost);
+
+    const results = await runBounded([3, 25, 3], { concurrency: 3, maxCost: 10, cost }, worker);
+
+    expect(results.map(result => result.status)).toEqual(['fulfilled', 'fulfilled', 'fulfilled']);
+    expect(stats.soloCosts).toContain(25);
+    expect(stats.maxActiveCost).toBe(25);
+  });
+
+  test('returns results in input order regardless of completion order', async () => {
+    const results = await runBounded([30, 10, 20], { concurrency: 3 }, async (ms) => {
+      await delay(ms);
+      return `done ${ms}`;
+    });
+
+    expect(results).toEqual([
+      { status: 'fulfilled', value: 'done 30' },
+      { status: 'fulfilled', value: 'done 10' },
+      { status: 'fulfilled', value: 'done 20' }
+    ]);
+  });
+
+  test('fires onSettled once per item, including items whose worker throws', async () => {
+    const onSettled = jest.fn();
+
+    const results = await runBounded(['a', 'b', 'c'], { concurrency: 2, onSettled }, async (item) => {
+      if (item === 'b') {
+        throw new Error('boom');
+      }
+      return item;
+    });
+
+    expect(onSettled).toHaveBeenCalledTimes(3);
+    expect(onSettled.mock.calls.map(([, index]) => index).sort()).toEqual([0, 1, 2]);
+    expect(results[1].status).toBe('rejected');
+    expect(results[1].reason.message).toBe('boom');
+    expect(onSettled).toHaveBeenCalledWith(results[1], 1);
+  });
+
+  test('resolves immediately for an empty list', async () => {
+    const worker = jest.fn();
+
+    expect(await runBounded([], { concurrency: 2 }, worker)).toEqual([]);
+    expect(worker).not.toHaveBeenCalled();
+  });
+});
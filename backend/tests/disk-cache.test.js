@@ -0,0 +1,72 @@
+// RitZone Disk Cache Tests
+// ==============================================
+
+const fs = require('fs').promises;
+const os = require('os');
+const path = require('path');
+const DiskCache = require('../utils/disk-cache');
+
+describe('DiskCache', () => {
+  let dir;
+
+  beforeEach(async () => {
+    dir = await fs.mkdtemp(path.join(os.tmpdir(), 'ritzone-disk-cache-'));
+  });
+
+  afterEach(async () => {
+    await fs.rm(dir, { recursive: true, force: true });
+  });
+
+  const exists = filePath => fs.access(filePath).then(() => true, () => false);
+
+  test('evicts the least recently used entry first', async () => {
+    const cache = new DiskCache({ dir, maxBytes: 10 });
+
+    await cache.write('a', 'aaaa');
+    await cache.write('b', 'bbbb');
+    // Touch a, so b becomes the least recently used entry
+    expect(await cache.get('a')).toBe(path.join(dir, 'a'));
+
+    await cache.write('c', 'cccc');
+
+    expect(await cache.get('b')).toBeNull();
+    expect(await exists(path.join(dir, 'b'))).toBe(false);
+    expect((await cache.read('a')).toString()).toBe('aaaa');
+    expect((await cache.read('c')).toString()).toBe('cccc');
+    expect(cache.stats().totalBytes).toBe(8);
+  });
+
+  test('commit replaces an existing key and its size', async () => {
+    const cache = new DiskCache({ dir, maxBytes: 100 });
+
+    await cache.write('key', 'first value');
+    await cache.write('key', 'second');
+
+    expect((await cache.read('key')).toString()).toBe('second');
+    expect(cache.stats()).toMatchObject({ entries: 1, totalBytes: 6 });
+  });
+
+  test('loadIndex removes stale temp files and indexes existing entries', async () => {
+    await fs.writeFile(path.join(dir, '.key.0123456789ab.tmp'), 'partial');
+    await fs.writeFile(path.join(dir, 'kept'), 'kept value');
+
+    const cache = new DiskCache({ dir, maxBytes: 100 });
+    await cache.init();
+
+    expect(await fs.readdir(dir)).toEqual(['kept']);
+    expect(cache.stats()).toMatchObject({ entries: 1, totalBytes: 10 });
+    expect((await cache.read('kept')).toString()).toBe('kept value');
+  });
+
+  test('evict never removes the entry just written, even over budget', async () => {
+    const cache = new DiskCache({ dir, maxBytes: 5 });
+
+    await cache.write('small', 'abc');
+    const bigPath = await cache.write('big', 'larger than the budget');
+
+    expect(await exists(bigPath)).toBe(true);
+    expect(await cache.get('big')).toBe(bigPath);
+    expect(await cache.get('small')).toBeNull();
+    expect(cache.stats().entries).toBe(1);
+  });
+});
@@ -0,0 +1,75 @@
+// RitZone Bounded Runner
+// ==============================================
+// Runs an async worker over a list with a cap on concurrent jobs and on the
+// summed "cost" (e.g. buffer bytes) of the jobs in flight
+
+// Resolves to one { status, value | reason } per item, in input order.
+// onSettled(result, index) fires as each item finishes, so callers can report
+// progress before the whole batch is done. Items start in order; an item that
+// alone exceeds maxCost still runs, but only when nothing else is in flight.
+const runBounded = (items, options, worker) => {
+  const {
+    concurrency = 1,
+    maxCost = Infinity,
+    cost = () => 0,
+    onSettled = () => {}
+  } = options;
+
+  const results = new Array(items.length);
+  let nextIndex = 0;
+  let active = 0;
+  let activeCost = 0;
+  let settled = 0;
+
+  return new Promise((resolve) => {
+    if (items.length === 0) {
+      resolve(results);
+      return;
+    }
+
+    const launch = () => {
+      while (nextIndex < items.length && active < Math.max(1, concurrency)) {
+        const itemCost = cost(items[nextIndex]);
+
+        if (active > 0 && activeCost + itemCost > maxCost) {
+          break;
+        }
+
+        const index = nextIndex++;
+        active++;
+        activeCost += itemCost;
+
+        Promise.resolve()
+          .then(() => worker(items[index], index))
+          .then(
+            value => ({ status: 'fulfilled', value }),
+            reason => ({ status: 'rejected', reason })
+          )
+          .then((result) => {
+            active--;
+            activeCost -= itemCost;
+            results[index] = result;
+
+            try {
+              onSettled(result, index);
+            } catch (error) {
+              console.error('❌ Bounded runner onSettled callback failed:', error.message);
+            }
+
+            settled++;
+            if (settled === items.length) {
+              resolve(results);
+            } else {
+              launch();
+            }
+          });
+      }
+    };
+
+    launch();
+  });
+};
+
+module.exports = {
+  runBounded
+};
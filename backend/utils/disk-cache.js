@@ -0,0 +1,162 @@
+// RitZone Disk Cache
+// ==============================================
+// Size-bounded, least-recently-used file cache in a single directory.
+// Entries are written to a temp file first and renamed into place, so readers
+// never see a partial file; the LRU index is rebuilt from the directory on
+// first use, so the cache survives restarts.
+
+const fs = require('fs').promises;
+const path = require('path');
+const crypto = require('crypto');
+
+const TEMP_SUFFIX = '.tmp';
+
+class DiskCache {
+  constructor({ dir, maxBytes }) {
+    this.dir = dir;
+    this.maxBytes = maxBytes;
+    // key -> size in bytes; Map order is least- to most-recently used
+    this.entries = new Map();
+    this.totalBytes = 0;
+    this.ready = null;
+  }
+
+  // Load the index once (concurrent callers share the scan)
+  init() {
+    if (!this.ready) {
+      this.ready = this.loadIndex().catch((error) => {
+        this.ready = null;
+        throw error;
+      });
+    }
+    return this.ready;
+  }
+
+  async loadIndex() {
+    await fs.mkdir(this.dir, { recursive: true });
+    const names = await fs.readdir(this.dir);
+
+    const stats = await Promise.all(names.map(async (name) => {
+      const filePath = path.join(this.dir, name);
+      if (name.endsWith(TEMP_SUFFIX)) {
+        // Left behind by a crash mid-write
+        await fs.unlink(filePath).catch(() => {});
+        return null;
+      }
+      const stat = await fs.stat(filePath).catch(() => null);
+      return stat && stat.isFile() ? { name, size: stat.size, usedAt: stat.mtimeMs } : null;
+    }));
+
+    stats
+      .filter(Boolean)
+      .sort((a, b) => a.usedAt - b.usedAt)
+      .forEach(({ name, size }) => {
+        this.entries.set(name, size);
+        this.totalBytes += size;
+      });
+
+    await this.evict();
+  }
+
+  pathFor(key) {
+    return path.join(this.dir, key);
+  }
+
+  // Unique temp path to write an entry to before commit()
+  tempPath(key) {
+    return path.join(this.dir, `.${key}.${crypto.randomBytes(6).toString('hex')}${TEMP_SUFFIX}`);
+  }
+
+  // Path of a cached entry (marking it recently used), or null
+  async get(key) {
+    await this.init();
+
+    if (!this.entries.has(key)) {
+      return null;
+    }
+
+    const size = this.entries.get(key);
+    this.entries.delete(key);
+    this.entries.set(key, size);
+
+    // mtime doubles as the "last used" time the index is rebuilt from
+    const now = new Date();
+    await fs.utimes(this.pathFor(key), now, now).catch(() => {
+      this.forget(key);
+    });
+
+    return this.entries.has(key) ? this.pathFor(key) : null;
+  }
+
+  // Move a fully written temp file into the cache and evict down to maxBytes
+  async commit(key, tempFilePath) {
+    await this.init();
+
+    const { size } = await fs.stat(tempFilePath);
+    await fs.rename(tempFilePath, this.pathFor(key));
+
+    this.forget(key);
+    this.entries.set(key, size);
+    this.totalBytes += size;
+
+    await this.evict(key);
+    return this.pathFor(key);
+  }
+
+  async write(key, data) {
+    await this.init();
+    const tempFilePath = this.tempPath(key);
+    await fs.writeFile(tempFilePath, data);
+    return this.commit(key, tempFilePath);
+  }
+
+  async read(key) {
+    const filePath = await this.get(key);
+    if (!filePath) {
+      return null;
+    }
+    return fs.readFile(filePath).catch(() => null);
+  }
+
+  async delete(key) {
+    await this.init();
+    this.forget(key);
+    await fs.unlink(this.pathFor(key)).catch(() => {});
+  }
+
+  forget(key) {
+    if (this.entries.has(key)) {
+      this.totalBytes -= this.entries.get(key);
+      this.entries.delete(key);
+    }
+  }
+
+  // Drop least-recently-used entries (never `keep`, the entry just written)
+  async evict(keep = null) {
+    const victims = [];
+    for (const [key, size] of this.entries) {
+      if (this.totalBytes <= this.maxBytes) {
+        break;
+      }
+      if (key === keep) {
+        continue;
+      }
+      victims.push(key);
+      this.totalBytes -= size;
+    }
+
+    victims.forEach(key => this.entries.delete(key));
+    await Promise.all(victims.map(key => fs.unlink(this.pathFor(key)).catch(() => {})));
+  }
+
+  stats() {
+    return {
+      dir: this.dir,
+      entries: this.entries.size,
+      totalBytes: this.totalBytes,
+      maxBytes: this.maxBytes
+    };
+  }
+}
+
+module.exports = DiskCache;
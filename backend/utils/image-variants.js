@@ -0,0 +1,135 @@
+// RitZone Image Variant Helpers
+// ==============================================
+// Naming scheme for the responsive variants written by ImageUploadService.
+// Each upload is stored as uploads/variants/<id>/<width>x<height>.<ext>, where
+// <id> is the sha256 content hash of the source (see VARIANT_SCHEME_VERSION); the
+// JPEG at the requested dimensions ("detail") is the URL saved on products
+// and banners, and every other variant is derived from that URL, so the
+// APIs can return a srcset map without a storage or database lookup.
+// Sources too small for the upscaled presets get a detail JPEG named
+// <width>x<height>-<largest preset>.jpg, which tells readers where the set stops.
+
+// Sizes relative to the requested (detail) dimensions
+const VARIANT_PRESETS = [
+  { name: 'thumbnail', scale: 0.25 },
+  { name: 'card', scale: 0.5 },
+  { name: 'detail', scale: 1 },
+  { name: 'zoom', scale: 2 }
+];
+
+// In order of preference for <picture> sources; jpeg is the universal fallback
+const VARIANT_FORMATS = {
+  avif: { extension: 'avif', contentType: 'image/avif', options: { quality: 50, effort: 4 } },
+  webp: { extension: 'webp', contentType: 'image/webp', options: { quality: 80 } },
+  jpeg: { extension: 'jpg', contentType: 'image/jpeg', options: { quality: 85 } }
+};
+
+// Part of the content hash: bump when presets, formats or encoder options
+// change so re-uploads produce a new variant set instead of reusing the old one
+const VARIANT_SCHEME_VERSION = 2;
+
+const VARIANT_FOLDER = 'uploads/variants';
+const MANIFEST_FILE_NAME = 'manifest.json';
+
+// <base>/uploads/variants/<id>/<width>x<height>[-<largest preset>].jpg
+const VARIANT_URL_PATTERN = /^(.*\/uploads\/variants\/[^/]+\/)((\d+)x(\d+)(?:-([a-z]+))?\.jpg)$/;
+
+// Preset sizes for the given detail dimensions, up to and including `largest`
+const getVariantDimensions = ({ width, height }, largest = VARIANT_PRESETS[VARIANT_PRESETS.length - 1].name) => {
+  const lastIndex = VARIANT_PRESETS.findIndex(preset => preset.name === largest);
+  const presets = lastIndex === -1 ? VARIANT_PRESETS : VARIANT_PRESETS.slice(0, lastIndex + 1);
+
+  return presets.map(preset => ({
+    name: preset.name,
+    width: Math.max(1, Math.round(width * preset.scale)),
+    height: Math.max(1, Math.round(height * preset.scale))
+  }));
+};
+
+const getVariantFileName = (width, height, format) => {
+  return `${width}x${height}.${VARIANT_FORMATS[format].extension}`;
+};
+
+// File name of the detail JPEG (the saved image URL); the suffix is only
+// added when the set stops short of the last preset
+const getPrimaryFileName = ({ width, height }, largest) => {
+  const isComplete = largest === VARIANT_PRESETS[VARIANT_PRESETS.length - 1].name;
+  return isComplete ? getVariantFileName(width, height, 'jpeg') : `${width}x${height}-${largest}.jpg`;
+};
+
+// Content hash of a stored variant set, or null for legacy (uuid) and external URLs
+const getImageHash = (imageUrl) => {
+  const match = typeof imageUrl === 'string' ? imageUrl.match(/\/uploads\/variants\/([0-9a-f]{64})\/[^/]+$/) : null;
+  return match ? match[1] : null;
+};
+
+// srcset-ready map for an uploaded image URL, or null for images stored before
+// variants existed (and for external URLs)
+const getImageVariants = (imageUrl) => {
+  const match = typeof imageUrl === 'string' ? imageUrl.match(VARIANT_URL_PATTERN) : null;
+  if (!match) {
+    return null;
+  }
+
+  const [, baseUrl, primaryFileName, width, height, largest] = match;
+  if (largest && !VARIANT_PRESETS.some(preset => preset.name === largest)) {
+    return null;
+  }
+
+  const sizes = getVariantDimensions({ width: Number(width), height: Number(height) }, largest);
+  const formats = Object.keys(VARIANT_FORMATS);
+
+  const variants = {};
+  sizes.forEach((size) => {
+    variants[size.name] = { width: size.width, height: size.height };
+    formats.forEach((format) => {
+      variants[size.name][format] = size.name === 'detail' && format === 'jpeg'
+        ? `${baseUrl}${primaryFileName}`
+        : `${baseUrl}${getVariantFileName(size.width, size.height, format)}`;
+    });
+  });
+
+  const srcset = {};
+  formats.forEach((format) => {
+    srcset[format] = sizes
+      .map(size => `${variants[size.name][format]} ${size.width}w`)
+      .join(', ');
+  });
+
+  return {
+    variants,
+    srcset,
+    manifest: `${baseUrl}${MANIFEST_FILE_NAME}`
+  };
+};
+
+// Adds `image_variants`, parallel to `images`, to a product row
+const withProductImageVariants = (product) => {
+  if (!product || !Array.isArray(product.images)) {
+    return product;
+  }
+  return { ...product, image_variants: product.images.map(getImageVariants) };
+};
+
+// Adds `image_variants` for `image_url` to a banner row
+const withBannerImageVariants = (banner) => {
+  if (!banner) {
+    return banner;
+  }
+  return { ...banner, image_variants: getImageVariants(banner.image_url) };
+};
+
+module.exports = {
+  VARIANT_SCHEME_VERSION,
+  VARIANT_PRESETS,
+  VARIANT_FORMATS,
+  VARIANT_FOLDER,
+  MANIFEST_FILE_NAME,
+  getVariantDimensions,
+  getVariantFileName,
+  getPrimaryFileName,
+  getImageHash,
+  getImageVariants,
+  withProductImageVariants,
+  withBannerImageVariants
+};
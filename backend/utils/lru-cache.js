@@ -0,0 +1,69 @@
+// RitZone LRU Cache
+// ==============================================
+// Small bounded in-process cache with per-entry TTL
+
+class LRUCache {
+  constructor({ maxSize = 1000, ttl = 0 } = {}) {
+    this.maxSize = maxSize;
+    this.ttl = ttl; // Default TTL in milliseconds (0 = no expiry)
+    this.entries = new Map();
+  }
+
+  // Get a value and mark it as most recently used
+  get(key) {
+    const entry = this.entries.get(key);
+    if (!entry) {
+      return undefined;
+    }
+
+    if (entry.expiresAt && entry.expiresAt <= Date.now()) {
+      this.entries.delete(key);
+      return undefined;
+    }
+
+    // Re-insert so Map iteration order reflects recency
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    return entry.value;
+  }
+
+  // Store a value, evicting the least recently used entry when full
+  set(key, value, ttl = this.ttl) {
+    if (ttl !== 0 && ttl <= 0) {
+      // Already expired - make sure no stale copy survives
+      this.entries.delete(key);
+      return this;
+    }
+
+    this.entries.delete(key);
+    this.entries.set(key, {
+      value,
+      expiresAt: ttl > 0 ? Date.now() + ttl : null
+    });
+
+    while (this.entries.size > this.maxSize) {
+      const oldestKey = this.entries.keys().next().value;
+      this.entries.delete(oldestKey);
+    }
+
+    return this;
+  }
+
+  has(key) {
+    return this.get(key) !== undefined;
+  }
+
+  delete(key) {
+    return this.entries.delete(key);
+  }
+
+  clear() {
+    this.entries.clear();
+  }
+
+  get size() {
+    return this.entries.size;
+  }
+}
+
+module.exports = LRUCache;
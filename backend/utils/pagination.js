@@ -0,0 +1,99 @@
+// RitZone Pagination Helpers
+// ==============================================
+// Keyset (cursor) pagination on (created_at, id) for PostgREST queries
+
+const UUID_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+const TIMESTAMP_PATTERN = /^[0-9T:.+\- Z]+$/;
+
+// Opaque cursor pointing just after the given row
+const encodeCursor = (row) => {
+  return Buffer.from(JSON.stringify([row.created_at, row.id])).toString('base64url');
+};
+
+// Returns { createdAt, id } or null when the cursor is malformed
+const decodeCursor = (cursor) => {
+  try {
+    const [createdAt, id] = JSON.parse(Buffer.from(String(cursor), 'base64url').toString('utf8'));
+    if (typeof createdAt !== 'string' || !TIMESTAMP_PATTERN.test(createdAt) || isNaN(Date.parse(createdAt))) {
+      return null;
+    }
+    if (typeof id !== 'string' || !UUID_PATTERN.test(id)) {
+      return null;
+    }
+    return { createdAt, id };
+  } catch (error) {
+    return null;
+  }
+};
+
+// Restrict a query to rows after the cursor, ordered by (created_at, id).
+// One extra row is fetched so buildCursorPage can tell whether another page exists.
+const applyCursor = (query, cursor, limit, ascending = false) => {
+  const position = decodeCursor(cursor);
+  if (!position) {
+    throw new Error('Invalid pagination cursor');
+  }
+
+  const op = ascending ? 'gt' : 'lt';
+  return query
+    .or(`created_at.${op}."${position.createdAt}",and(created_at.eq."${position.createdAt}",id.${op}.${position.id})`)
+    .order('created_at', { ascending })
+    .order('id', { ascending })
+    .limit(limit + 1);
+};
+
+// Split the over-fetched rows from applyCursor into a page + next cursor
+const buildCursorPage = (rows, limit) => {
+  const list = rows || [];
+  const hasMore = list.length > limit;
+  const items = hasMore ? list.slice(0, limit) : list;
+
+  return {
+    items,
+    hasMore,
+    nextCursor: hasMore ? encodeCursor(items[items.length - 1]) : null
+  };
+};
+
+// Apply cursor pagination when a cursor is given, otherwise the classic page/limit range.
+// Both modes order by (created_at, id) so a page/limit client can switch to cursors at any point.
+const applyPagination = (query, { page = 1, limit, cursor = null, ascending = false }) => {
+  if (cursor) {
+    return applyCursor(query, cursor, limit, ascending);
+  }
+
+  const offset = (page - 1) * limit;
+  return query
+    .order('created_at', { ascending })
+    .order('id', { ascending })
+    .range(offset, offset + limit - 1);
+};
+
+// Page metadata for either mode; totals are null when no count was requested
+const buildPage = (rows, { page = 1, limit, cursor = null, count = null }) => {
+  const { items, hasMore, nextCursor } = cursor
+    ? buildCursorPage(rows, limit)
+    : {
+        items: rows || [],
+        hasMore: (rows || []).length === limit,
+        nextCursor: (rows || []).length === limit ? encodeCursor(rows[rows.length - 1]) : null
+      };
+
+  return {
+    items,
+    hasMore,
+    nextCursor,
+    totalCount: count,
+    currentPage: page,
+    totalPages: count === null || count === undefined ? null : Math.ceil(count / limit)
+  };
+};
+
+module.exports = {
+  encodeCursor,
+  decodeCursor,
+  applyCursor,
+  buildCursorPage,
+  applyPagination,
+  buildPage
+};
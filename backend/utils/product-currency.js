@@ -0,0 +1,86 @@
+// RitZone Product Currency Helpers
+// ==============================================
+// Converts product prices from the INR base into the requested display currency
+
+const { getCurrencyRates, convertMany, getCurrencySymbol, formatPrice } = require('../services/currency-service');
+
+// ==============================================
+// 💰 HELPER FUNCTION: CONVERT PRODUCT PRICES
+// ==============================================
+// Synchronous: `rates` is the INR-based table from getCurrencyRates, resolved once per request
+function applyProductCurrency(product, targetCurrency, rates) {
+  if (!product) {
+    return product;
+  }
+  
+  // Handle INR currency (base currency) - add metadata without conversion
+  if (targetCurrency === 'INR') {
+    return {
+      ...product,
+      currency: 'INR',
+      currency_symbol: getCurrencySymbol('INR'),
+      formatted_price: formatPrice(product.price, 'INR'),
+      base_currency: 'INR',
+      base_price: product.price
+    };
+  }
+  
+  try {
+    const [price, originalPrice] = convertMany(
+      [product.price, product.original_price],
+      'INR',
+      targetCurrency,
+      rates
+    );
+    
+    return {
+      ...product,
+      price,
+      original_price: originalPrice,
+      // Add currency metadata
+      currency: targetCurrency,
+      currency_symbol: getCurrencySymbol(targetCurrency),
+      formatted_price: formatPrice(price, targetCurrency),
+      base_currency: 'INR',
+      base_price: product.price
+    };
+  } catch (error) {
+    console.error('❌ Error converting product prices:', error);
+    // Return original product with error note if conversion fails
+    return {
+      ...product,
+      currency_conversion_error: 'Unable to convert to requested currency',
+      currency: 'INR'
+    };
+  }
+}
+
+async function convertProductPrices(product, targetCurrency = 'INR') {
+  const rates = targetCurrency === 'INR' ? null : await getCurrencyRates('INR');
+  return applyProductCurrency(product, targetCurrency, rates);
+}
+
+// ==============================================
+// 💰 HELPER FUNCTION: CONVERT MULTIPLE PRODUCTS
+// ==============================================
+async function convertProductsPrices(products, targetCurrency = 'INR') {
+  if (!products || !Array.isArray(products)) {
+    return products;
+  }
+  
+  try {
+    // One rate lookup for the whole listing, then plain arithmetic per product
+    const rates = targetCurrency === 'INR' ? null : await getCurrencyRates('INR');
+    
+    return products.map(product => applyProductCurrency(product, targetCurrency, rates));
+  } catch (error) {
+    console.error('❌ Error converting multiple products prices:', error);
+    return products; // Return original products if conversion fails
+  }
+}
+
+module.exports = {
+  applyProductCurrency,
+  convertProductPrices,
+  convertProductsPrices
+};
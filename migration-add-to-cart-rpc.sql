@@ -0,0 +1,102 @@
+-- =====================================================
+-- RitZone: Single Round-Trip Add To Cart
+-- =====================================================
+-- Execute this in your Supabase SQL Editor after database-schema.sql and migration-cart-totals.sql
+-- Replaces the multi-request add-to-cart flow (product lookup, user sync,
+-- cart lookup/insert, item lookup/upsert, total recompute) with one RPC call
+
+-- =====================================================
+-- ADD_TO_CART FUNCTION
+-- =====================================================
+CREATE OR REPLACE FUNCTION public.add_to_cart(
+    p_user_id UUID,
+    p_product_id UUID,
+    p_quantity INTEGER DEFAULT 1
+)
+RETURNS public.cart_items
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+DECLARE
+    product_record RECORD;
+    cart_id_value UUID;
+    item_record public.cart_items%ROWTYPE;
+    new_quantity INTEGER;
+BEGIN
+    IF p_quantity IS NULL OR p_quantity <= 0 THEN
+        RAISE EXCEPTION 'Quantity must be greater than 0';
+    END IF;
+
+    SELECT price, stock_quantity, is_active INTO product_record
+    FROM public.products
+    WHERE id = p_product_id;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Product not found: %', p_product_id;
+    END IF;
+
+    IF NOT product_record.is_active THEN
+        RAISE EXCEPTION 'Product is not available';
+    END IF;
+
+    -- Serialize cart mutations per user so concurrent adds cannot create two active carts
+    PERFORM pg_advisory_xact_lock(hashtext('cart:' || p_user_id::text));
+
+    -- Make sure the cart owner exists in public.users (foreign key target)
+    IF NOT EXISTS (SELECT 1 FROM public.users WHERE id = p_user_id) THEN
+        PERFORM public.force_sync_user(p_user_id);
+    END IF;
+
+    -- Get or create the active cart
+    SELECT id INTO cart_id_value
+    FROM public.carts
+    WHERE user_id = p_user_id AND status = 'active'
+    ORDER BY created_at DESC
+    LIMIT 1;
+
+    IF cart_id_value IS NULL THEN
+        INSERT INTO public.carts (user_id, status, total_amount, currency)
+        VALUES (p_user_id, 'active', 0, 'INR')
+        RETURNING id INTO cart_id_value;
+    END IF;
+
+    -- Upsert the cart item, checking stock against the resulting quantity
+    SELECT * INTO item_record
+    FROM public.cart_items
+    WHERE cart_id = cart_id_value AND product_id = p_product_id
+    LIMIT 1;
+
+    new_quantity := COALESCE(item_record.quantity, 0) + p_quantity;
+
+    IF product_record.stock_quantity < new_quantity THEN
+        RAISE EXCEPTION 'Insufficient stock';
+    END IF;
+
+    IF item_record.id IS NOT NULL THEN
+        UPDATE public.cart_items
+        SET quantity = new_quantity,
+            total_price = new_quantity * product_record.price
+        WHERE id = item_record.id
+        RETURNING * INTO item_record;
+    ELSE
+        INSERT INTO public.cart_items (cart_id, product_id, quantity, unit_price, total_price)
+        VALUES (cart_id_value, p_product_id, new_quantity, product_record.price, new_quantity * product_record.price)
+        RETURNING * INTO item_record;
+    END IF;
+
+    -- carts.total_amount is adjusted by the maintain_cart_total trigger (migration-cart-totals.sql)
+
+    RETURN item_record;
+END;
+$$;
+
+-- Supports the (cart_id, product_id) item lookup above
+CREATE INDEX IF NOT EXISTS idx_cart_items_cart_product ON public.cart_items(cart_id, product_id);
+
+GRANT EXECUTE ON FUNCTION public.add_to_cart(UUID, UUID, INTEGER) TO anon, authenticated, service_role;
+
+-- Refresh PostgREST schema cache so the RPC is callable immediately
+NOTIFY pgrst, 'reload schema';
+
+-- Completion message
+SELECT 'add_to_cart RPC installed successfully!' as final_status;
@@ -0,0 +1,53 @@
+-- =====================================================
+-- RitZone: Admin User List Aggregates
+-- =====================================================
+-- Execute this in your Supabase SQL Editor after database-schema.sql
+-- Order counts per user are grouped in the database (one row per user
+-- instead of one row per order), and trigram indexes keep the admin
+-- email / name / phone ILIKE search fast as the users table grows
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- =====================================================
+-- INDEXES
+-- =====================================================
+CREATE INDEX IF NOT EXISTS idx_users_email_trgm ON public.users USING GIN (email gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_full_name_trgm ON public.users USING GIN (full_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_phone_trgm ON public.users USING GIN (phone gin_trgm_ops);
+
+-- Lets the grouped counts below be answered from the index alone
+CREATE INDEX IF NOT EXISTS idx_orders_user_status ON public.orders(user_id, status);
+
+-- =====================================================
+-- ADMIN_USER_ORDER_COUNTS FUNCTION
+-- =====================================================
+CREATE OR REPLACE FUNCTION public.admin_user_order_counts(p_user_ids UUID[])
+RETURNS TABLE (
+    user_id UUID,
+    total BIGINT,
+    pending BIGINT,
+    completed BIGINT
+)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    SELECT
+        o.user_id,
+        COUNT(*) AS total,
+        COUNT(*) FILTER (WHERE o.status = 'pending') AS pending,
+        COUNT(*) FILTER (WHERE o.status = 'delivered') AS completed
+    FROM public.orders o
+    WHERE o.user_id = ANY(p_user_ids)
+    GROUP BY o.user_id;
+$$;
+
+-- Admin-only data: keep it off the public API roles
+REVOKE EXECUTE ON FUNCTION public.admin_user_order_counts(UUID[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.admin_user_order_counts(UUID[]) TO service_role;
+
+-- Refresh PostgREST schema cache so the RPC is callable immediately
+NOTIFY pgrst, 'reload schema';
+
+-- Completion message
+SELECT 'admin_user_order_counts RPC and user search indexes installed successfully!' as final_status;
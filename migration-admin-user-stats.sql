@@ -0,0 +1,41 @@
+-- =====================================================
+-- RitZone: Admin User Stats Aggregate
+-- =====================================================
+-- Execute this in your Supabase SQL Editor after database-schema.sql
+-- Returns the admin user-management stat cards (total / active / verified /
+-- new this month / customers with orders) from one query instead of five
+-- count requests plus a download of every orders.user_id
+
+-- =====================================================
+-- ADMIN_USER_STATS FUNCTION
+-- =====================================================
+CREATE OR REPLACE FUNCTION public.admin_user_stats()
+RETURNS TABLE (
+    total_users BIGINT,
+    active_users BIGINT,
+    verified_users BIGINT,
+    new_users_this_month BIGINT,
+    unique_customers BIGINT
+)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    SELECT
+        COUNT(*),
+        COUNT(*) FILTER (WHERE u.is_active = true),
+        COUNT(*) FILTER (WHERE u.email_verified = true),
+        COUNT(*) FILTER (WHERE u.created_at >= date_trunc('month', NOW())),
+        (SELECT COUNT(DISTINCT o.user_id) FROM public.orders o WHERE o.user_id IS NOT NULL)
+    FROM public.users u;
+$$;
+
+-- Admin-only data: keep it off the public API roles
+REVOKE EXECUTE ON FUNCTION public.admin_user_stats() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.admin_user_stats() TO service_role;
+
+-- Refresh PostgREST schema cache so the RPC is callable immediately
+NOTIFY pgrst, 'reload schema';
+
+-- Completion message
+SELECT 'admin_user_stats RPC installed successfully!' as final_status;
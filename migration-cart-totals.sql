@@ -0,0 +1,100 @@
+-- =====================================================
+-- RitZone: Incrementally Maintained Cart Totals
+-- =====================================================
+-- Execute this in your Supabase SQL Editor after database-schema.sql
+-- carts.total_amount is adjusted by the delta of each cart_items change,
+-- so item mutations no longer re-read and re-sum the whole cart
+
+-- =====================================================
+-- CART_ITEMS DELTA TRIGGER
+-- =====================================================
+CREATE OR REPLACE FUNCTION public.apply_cart_item_total_delta()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE public.carts
+        SET total_amount = COALESCE(total_amount, 0) + NEW.total_price
+        WHERE id = NEW.cart_id;
+        RETURN NEW;
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        UPDATE public.carts
+        SET total_amount = COALESCE(total_amount, 0) - OLD.total_price
+        WHERE id = OLD.cart_id;
+        RETURN OLD;
+    END IF;
+
+    -- UPDATE: item may have moved between carts
+    IF NEW.cart_id = OLD.cart_id THEN
+        IF NEW.total_price IS DISTINCT FROM OLD.total_price THEN
+            UPDATE public.carts
+            SET total_amount = COALESCE(total_amount, 0) + (NEW.total_price - OLD.total_price)
+            WHERE id = NEW.cart_id;
+        END IF;
+    ELSE
+        UPDATE public.carts
+        SET total_amount = COALESCE(total_amount, 0) - OLD.total_price
+        WHERE id = OLD.cart_id;
+
+        UPDATE public.carts
+        SET total_amount = COALESCE(total_amount, 0) + NEW.total_price
+        WHERE id = NEW.cart_id;
+    END IF;
+
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS maintain_cart_total ON public.cart_items;
+CREATE TRIGGER maintain_cart_total
+AFTER INSERT OR UPDATE OF cart_id, total_price OR DELETE ON public.cart_items
+FOR EACH ROW EXECUTE FUNCTION public.apply_cart_item_total_delta();
+
+-- =====================================================
+-- CONSISTENCY CHECK / REPAIR
+-- =====================================================
+-- Returns every cart whose stored total differs from the sum of its items.
+-- With p_repair = true the mismatched totals are corrected in the same statement.
+CREATE OR REPLACE FUNCTION public.verify_cart_totals(p_repair BOOLEAN DEFAULT false)
+RETURNS TABLE (
+    cart_id UUID,
+    stored_total DECIMAL(10,2),
+    computed_total DECIMAL(10,2)
+)
+LANGUAGE sql
+SET search_path = public
+AS $$
+    WITH mismatches AS (
+        SELECT c.id AS cart_id, c.total_amount AS stored_total, COALESCE(s.items_total, 0.00) AS computed_total
+        FROM public.carts c
+        LEFT JOIN (
+            SELECT ci.cart_id, SUM(ci.total_price) AS items_total
+            FROM public.cart_items ci
+            GROUP BY ci.cart_id
+        ) s ON s.cart_id = c.id
+        WHERE c.total_amount IS DISTINCT FROM COALESCE(s.items_total, 0.00)
+    ),
+    repaired AS (
+        UPDATE public.carts c
+        SET total_amount = m.computed_total
+        FROM mismatches m
+        WHERE p_repair AND c.id = m.cart_id
+        RETURNING c.id
+    )
+    SELECT m.cart_id, m.stored_total, m.computed_total FROM mismatches m;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.verify_cart_totals(BOOLEAN) TO service_role;
+
+-- Bring existing carts in line before the trigger takes over
+SELECT COUNT(*) AS repaired_carts FROM public.verify_cart_totals(true);
+
+-- Refresh PostgREST schema cache so the RPC is callable immediately
+NOTIFY pgrst, 'reload schema';
+
+-- Completion message
+SELECT 'Cart total trigger installed successfully!' as final_status;
@@ -0,0 +1,171 @@
+-- =====================================================
+-- RitZone: Daily Sales Rollup
+-- =====================================================
+-- Execute this in your Supabase SQL Editor after database-schema.sql and backend/database-admin-schema.sql
+-- Maintains one row per (UTC) day with order count, revenue and cancelled
+-- count, updated by a trigger on orders, so the admin sales chart reads at
+-- most a few dozen rows instead of every order in the window
+
+-- =====================================================
+-- DAILY_SALES TABLE
+-- =====================================================
+-- order_count / revenue cover non-cancelled orders; cancelled orders are
+-- counted separately in cancelled_count
+CREATE TABLE IF NOT EXISTS public.daily_sales (
+    sales_date DATE PRIMARY KEY,
+    order_count INTEGER DEFAULT 0 NOT NULL,
+    revenue DECIMAL(12,2) DEFAULT 0.00 NOT NULL,
+    cancelled_count INTEGER DEFAULT 0 NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc'::text, NOW()) NOT NULL
+);
+
+ALTER TABLE public.daily_sales ENABLE ROW LEVEL SECURITY;
+
+-- =====================================================
+-- DELTA HELPER
+-- =====================================================
+-- Adds (p_sign = 1) or removes (p_sign = -1) one order's contribution
+CREATE OR REPLACE FUNCTION public.apply_daily_sales_delta(
+    p_created_at TIMESTAMP WITH TIME ZONE,
+    p_status TEXT,
+    p_total_amount DECIMAL,
+    p_sign INTEGER
+)
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    is_cancelled BOOLEAN := p_status = 'cancelled';
+BEGIN
+    INSERT INTO public.daily_sales AS d (sales_date, order_count, revenue, cancelled_count)
+    VALUES (
+        (p_created_at AT TIME ZONE 'UTC')::DATE,
+        CASE WHEN is_cancelled THEN 0 ELSE p_sign END,
+        CASE WHEN is_cancelled THEN 0 ELSE p_sign * COALESCE(p_total_amount, 0) END,
+        CASE WHEN is_cancelled THEN p_sign ELSE 0 END
+    )
+    ON CONFLICT (sales_date) DO UPDATE SET
+        order_count = d.order_count + EXCLUDED.order_count,
+        revenue = d.revenue + EXCLUDED.revenue,
+        cancelled_count = d.cancelled_count + EXCLUDED.cancelled_count,
+        updated_at = NOW();
+END;
+$$;
+
+-- =====================================================
+-- ORDERS TRIGGER
+-- =====================================================
+CREATE OR REPLACE FUNCTION public.maintain_daily_sales()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND OLD.status IS NOT DISTINCT FROM NEW.status
+       AND OLD.total_amount IS NOT DISTINCT FROM NEW.total_amount
+       AND OLD.created_at = NEW.created_at THEN
+        RETURN NEW;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM public.apply_daily_sales_delta(OLD.created_at, OLD.status, OLD.total_amount, -1);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM public.apply_daily_sales_delta(NEW.created_at, NEW.status, NEW.total_amount, 1);
+    END IF;
+
+    RETURN COALESCE(NEW, OLD);
+END;
+$$;
+
+DROP TRIGGER IF EXISTS maintain_daily_sales ON public.orders;
+CREATE TRIGGER maintain_daily_sales
+AFTER INSERT OR UPDATE OF status, total_amount, created_at OR DELETE ON public.orders
+FOR EACH ROW EXECUTE FUNCTION public.maintain_daily_sales();
+
+-- =====================================================
+-- REBUILD (BACKFILL / REPAIR)
+-- =====================================================
+CREATE OR REPLACE FUNCTION public.rebuild_daily_sales()
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    rebuilt INTEGER;
+BEGIN
+    -- Serialize with the trigger so no order is counted twice or missed
+    LOCK TABLE public.orders IN SHARE MODE;
+
+    DELETE FROM public.daily_sales;
+
+    INSERT INTO public.daily_sales (sales_date, order_count, revenue, cancelled_count)
+    SELECT
+        (created_at AT TIME ZONE 'UTC')::DATE,
+        COUNT(*) FILTER (WHERE status IS DISTINCT FROM 'cancelled'),
+        COALESCE(SUM(total_amount) FILTER (WHERE status IS DISTINCT FROM 'cancelled'), 0),
+        COUNT(*) FILTER (WHERE status = 'cancelled')
+    FROM public.orders
+    GROUP BY 1;
+
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+    RETURN rebuilt;
+END;
+$$;
+
+-- =====================================================
+-- GET_SALES_CHART FUNCTION
+-- =====================================================
+-- One row per day for the last p_days days (today included), zero-filled
+CREATE OR REPLACE FUNCTION public.get_sales_chart(p_days INTEGER DEFAULT 30)
+RETURNS TABLE (
+    sales_date DATE,
+    sales DECIMAL(12,2),
+    order_count INTEGER,
+    cancelled_count INTEGER
+)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    SELECT
+        day::DATE,
+        COALESCE(d.revenue, 0.00),
+        COALESCE(d.order_count, 0),
+        COALESCE(d.cancelled_count, 0)
+    FROM generate_series(
+        (NOW() AT TIME ZONE 'UTC')::DATE - (GREATEST(p_days, 1) - 1),
+        (NOW() AT TIME ZONE 'UTC')::DATE,
+        INTERVAL '1 day'
+    ) AS day
+    LEFT JOIN public.daily_sales d ON d.sales_date = day::DATE
+    ORDER BY day;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.apply_daily_sales_delta(TIMESTAMP WITH TIME ZONE, TEXT, DECIMAL, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.rebuild_daily_sales() FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.get_sales_chart(INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.rebuild_daily_sales() TO service_role;
+GRANT EXECUTE ON FUNCTION public.get_sales_chart(INTEGER) TO service_role;
+
+-- Backfill from existing orders
+SELECT public.rebuild_daily_sales();
+
+-- =====================================================
+-- SCHEDULED DASHBOARD METRICS (OPTIONAL)
+-- =====================================================
+-- The backend refreshes dashboard_analytics on a timer (DASHBOARD_METRICS_REFRESH_INTERVAL).
+-- With pg_cron enabled you can schedule it in the database instead:
+-- SELECT cron.schedule('refresh-dashboard-metrics', '*/5 * * * *', 'SELECT refresh_dashboard_metrics()');
+
+-- Refresh PostgREST schema cache so the RPCs are callable immediately
+NOTIFY pgrst, 'reload schema';
+
+-- Completion message
+SELECT 'daily_sales rollup and get_sales_chart RPC installed successfully!' as final_status;
@@ -0,0 +1,348 @@
+-- =====================================================
+-- RitZone: Content-Addressed Image Store
+-- =====================================================
+-- Execute this in your Supabase SQL Editor after database-schema.sql, backend/database-migration-dynamic.sql and user_reviews_schema_corrected.sql
+-- Uploaded images live under uploads/variants/<content hash>/ in Storage.
+-- image_objects registers each stored set, image_references ties it to the
+-- products / banners / categories / reviews whose image URLs point at it
+-- (maintained by triggers), and ref_count lets the GC job
+-- (npm run gc-images) delete sets nothing references any more.
+
+-- =====================================================
+-- TABLES
+-- =====================================================
+CREATE TABLE IF NOT EXISTS public.image_objects (
+    hash TEXT PRIMARY KEY,
+    bucket TEXT DEFAULT 'images' NOT NULL,
+    storage_prefix TEXT NOT NULL,
+    public_url TEXT NOT NULL,
+    bytes BIGINT DEFAULT 0 NOT NULL,
+    ref_count INTEGER DEFAULT 0 NOT NULL,
+    -- Set while ref_count = 0; new uploads start unreferenced until a row saves their URL
+    orphaned_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc'::text, NOW()),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc'::text, NOW()) NOT NULL
+);
+
+-- Set by claim_orphaned_images while the GC deletes the set's files; a claimed
+-- set is never handed out again (register_image_object leaves it alone)
+ALTER TABLE public.image_objects ADD COLUMN IF NOT EXISTS gc_started_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS idx_image_objects_orphaned ON public.image_objects(orphaned_at) WHERE ref_count = 0;
+
+CREATE TABLE IF NOT EXISTS public.image_references (
+    image_hash TEXT NOT NULL,
+    entity_type TEXT NOT NULL,
+    entity_id UUID NOT NULL,
+    PRIMARY KEY (image_hash, entity_type, entity_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_image_references_entity ON public.image_references(entity_type, entity_id);
+
+ALTER TABLE public.image_objects ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.image_references ENABLE ROW LEVEL SECURITY;
+
+-- =====================================================
+-- URL HELPERS
+-- =====================================================
+-- .../uploads/variants/<hash>/<w>x<h>.<ext> -> <hash>; NULL for any other URL
+CREATE OR REPLACE FUNCTION public.image_hash_from_url(p_url TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT substring(p_url FROM '/uploads/variants/([^/]+)/[^/]+$');
+$$;
+
+-- Image URLs held in a column value: TEXT, TEXT[] or a JSONB array of strings / {url} objects
+CREATE OR REPLACE FUNCTION public.image_urls_from_jsonb(p_value JSONB)
+RETURNS TEXT[]
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT CASE jsonb_typeof(p_value)
+        WHEN 'string' THEN ARRAY[p_value #>> '{}']
+        WHEN 'array' THEN ARRAY(
+            SELECT CASE jsonb_typeof(element)
+                       WHEN 'string' THEN element #>> '{}'
+                       WHEN 'object' THEN element ->> 'url'
+                   END
+            FROM jsonb_array_elements(p_value) AS element
+        )
+        ELSE ARRAY[]::TEXT[]
+    END;
+$$;
+
+-- =====================================================
+-- REFERENCE SYNC
+-- =====================================================
+-- Makes the references of one entity match p_urls and adjusts ref_count
+CREATE OR REPLACE FUNCTION public.sync_image_references(
+    p_entity_type TEXT,
+    p_entity_id UUID,
+    p_urls TEXT[]
+)
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    new_hashes TEXT[];
+BEGIN
+    SELECT COALESCE(array_agg(DISTINCT hash), ARRAY[]::TEXT[]) INTO new_hashes
+    FROM (
+        SELECT public.image_hash_from_url(url) AS hash
+        FROM unnest(COALESCE(p_urls, ARRAY[]::TEXT[])) AS url
+    ) hashes
+    WHERE hash IS NOT NULL;
+
+    WITH removed AS (
+        DELETE FROM public.image_references r
+        WHERE r.entity_type = p_entity_type
+          AND r.entity_id = p_entity_id
+          AND NOT (r.image_hash = ANY(new_hashes))
+        RETURNING r.image_hash
+    )
+    UPDATE public.image_objects o
+    SET ref_count = GREATEST(o.ref_count - 1, 0),
+        orphaned_at = CASE WHEN o.ref_count - 1 <= 0 THEN NOW() ELSE NULL END
+    FROM removed
+    WHERE o.hash = removed.image_hash;
+
+    WITH added AS (
+        INSERT INTO public.image_references (image_hash, entity_type, entity_id)
+        SELECT hash, p_entity_type, p_entity_id FROM unnest(new_hashes) AS hash
+        ON CONFLICT DO NOTHING
+        RETURNING image_hash
+    )
+    UPDATE public.image_objects o
+    SET ref_count = o.ref_count + 1,
+        orphaned_at = NULL
+    FROM added
+    WHERE o.hash = added.image_hash;
+END;
+$$;
+
+-- Trigger arguments: entity type, image column
+CREATE OR REPLACE FUNCTION public.maintain_image_references()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    column_name TEXT := TG_ARGV[1];
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM public.sync_image_references(TG_ARGV[0], OLD.id, NULL);
+        RETURN OLD;
+    END IF;
+
+    PERFORM public.sync_image_references(
+        TG_ARGV[0],
+        NEW.id,
+        public.image_urls_from_jsonb(to_jsonb(NEW) -> column_name)
+    );
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS maintain_image_references ON public.products;
+CREATE TRIGGER maintain_image_references
+AFTER INSERT OR UPDATE OF images OR DELETE ON public.products
+FOR EACH ROW EXECUTE FUNCTION public.maintain_image_references('product', 'images');
+
+DROP TRIGGER IF EXISTS maintain_image_references ON public.hero_banners;
+CREATE TRIGGER maintain_image_references
+AFTER INSERT OR UPDATE OF image_url OR DELETE ON public.hero_banners
+FOR EACH ROW EXECUTE FUNCTION public.maintain_image_references('banner', 'image_url');
+
+DROP TRIGGER IF EXISTS maintain_image_references ON public.categories;
+CREATE TRIGGER maintain_image_references
+AFTER INSERT OR UPDATE OF image_url OR DELETE ON public.categories
+FOR EACH ROW EXECUTE FUNCTION public.maintain_image_references('category', 'image_url');
+
+DROP TRIGGER IF EXISTS maintain_image_references ON public.user_reviews;
+CREATE TRIGGER maintain_image_references
+AFTER INSERT OR UPDATE OF images OR DELETE ON public.user_reviews
+FOR EACH ROW EXECUTE FUNCTION public.maintain_image_references('review', 'images');
+
+-- =====================================================
+-- REGISTRATION (DEDUP ON UPLOAD)
+-- =====================================================
+-- Registers a freshly uploaded set; counts references saved before registration.
+-- Re-registering a deduplicated upload restarts the grace period of an
+-- unreferenced set so the GC does not delete it before the new row is saved.
+-- A set the GC has already claimed is returned unchanged (gc_started_at set),
+-- which tells the caller not to reuse it.
+CREATE OR REPLACE FUNCTION public.register_image_object(
+    p_hash TEXT,
+    p_bucket TEXT,
+    p_storage_prefix TEXT,
+    p_public_url TEXT,
+    p_bytes BIGINT
+)
+RETURNS SETOF public.image_objects
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    existing_refs INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO existing_refs FROM public.image_references WHERE image_hash = p_hash;
+
+    INSERT INTO public.image_objects (hash, bucket, storage_prefix, public_url, bytes, ref_count, orphaned_at)
+    VALUES (
+        p_hash, p_bucket, p_storage_prefix, p_public_url, p_bytes, existing_refs,
+        CASE WHEN existing_refs = 0 THEN NOW() ELSE NULL END
+    )
+    ON CONFLICT (hash) DO UPDATE
+    SET orphaned_at = CASE WHEN public.image_objects.ref_count = 0 THEN NOW() ELSE NULL END
+    WHERE public.image_objects.gc_started_at IS NULL;
+
+    RETURN QUERY SELECT * FROM public.image_objects WHERE hash = p_hash;
+END;
+$$;
+
+-- =====================================================
+-- GARBAGE COLLECTION
+-- =====================================================
+-- Claims up to p_limit sets unreferenced for longer than p_grace_hours and
+-- returns them so the caller can delete their Storage objects, then call
+-- finish_image_collection. The grace period covers uploads whose row has not
+-- been saved yet; claims older than an hour (a crashed GC run) are retried.
+DROP FUNCTION IF EXISTS public.claim_orphaned_images(INTEGER, INTEGER);
+
+CREATE OR REPLACE FUNCTION public.claim_orphaned_images(
+    p_grace_hours INTEGER DEFAULT 24,
+    p_limit INTEGER DEFAULT 50
+)
+RETURNS TABLE (
+    hash TEXT,
+    bucket TEXT,
+    storage_prefix TEXT,
+    public_url TEXT
+)
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    UPDATE public.image_objects o
+    SET gc_started_at = NOW()
+    WHERE o.hash IN (
+        SELECT candidate.hash
+        FROM public.image_objects candidate
+        WHERE candidate.ref_count = 0
+          AND candidate.orphaned_at < NOW() - make_interval(hours => p_grace_hours)
+          AND (candidate.gc_started_at IS NULL OR candidate.gc_started_at < NOW() - INTERVAL '1 hour')
+        ORDER BY candidate.orphaned_at
+        LIMIT GREATEST(p_limit, 1)
+        FOR UPDATE SKIP LOCKED
+    )
+    AND o.ref_count = 0
+    RETURNING o.hash, o.bucket, o.storage_prefix, o.public_url;
+$$;
+
+-- Claims one unreferenced set for an explicit delete (DELETE /api/images/delete);
+-- returns nothing when it is still referenced or already claimed
+CREATE OR REPLACE FUNCTION public.claim_stored_image(p_hash TEXT)
+RETURNS SETOF public.image_objects
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    UPDATE public.image_objects
+    SET gc_started_at = NOW()
+    WHERE hash = p_hash
+      AND ref_count = 0
+      AND gc_started_at IS NULL
+    RETURNING *;
+$$;
+
+-- Drops the rows of claimed sets whose files are gone
+CREATE OR REPLACE FUNCTION public.finish_image_collection(p_hashes TEXT[])
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    finished INTEGER;
+BEGIN
+    DELETE FROM public.image_objects
+    WHERE hash = ANY(p_hashes)
+      AND gc_started_at IS NOT NULL
+      AND ref_count = 0;
+
+    GET DIAGNOSTICS finished = ROW_COUNT;
+    RETURN finished;
+END;
+$$;
+
+-- =====================================================
+-- REBUILD (BACKFILL / REPAIR)
+-- =====================================================
+CREATE OR REPLACE FUNCTION public.rebuild_image_references()
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    rebuilt INTEGER;
+BEGIN
+    DELETE FROM public.image_references;
+
+    INSERT INTO public.image_references (image_hash, entity_type, entity_id)
+    SELECT DISTINCT public.image_hash_from_url(url), entity_type, entity_id
+    FROM (
+        SELECT 'product' AS entity_type, p.id AS entity_id, unnest(p.images) AS url FROM public.products p
+        UNION ALL
+        SELECT 'banner', b.id, b.image_url FROM public.hero_banners b
+        UNION ALL
+        SELECT 'category', c.id, c.image_url FROM public.categories c
+        UNION ALL
+        SELECT 'review', r.id, unnest(public.image_urls_from_jsonb(r.images)) FROM public.user_reviews r
+    ) urls
+    WHERE public.image_hash_from_url(url) IS NOT NULL;
+
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+
+    UPDATE public.image_objects o
+    SET ref_count = counts.refs,
+        orphaned_at = CASE WHEN counts.refs = 0 THEN COALESCE(o.orphaned_at, NOW()) ELSE NULL END
+    FROM (
+        SELECT obj.hash, COUNT(r.image_hash)::INTEGER AS refs
+        FROM public.image_objects obj
+        LEFT JOIN public.image_references r ON r.image_hash = obj.hash
+        GROUP BY obj.hash
+    ) counts
+    WHERE counts.hash = o.hash;
+
+    RETURN rebuilt;
+END;
+$$;
+
+-- Admin-only: keep every function but the URL helpers off the public API roles
+REVOKE EXECUTE ON FUNCTION public.sync_image_references(TEXT, UUID, TEXT[]) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.register_image_object(TEXT, TEXT, TEXT, TEXT, BIGINT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.claim_orphaned_images(INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.finish_image_collection(TEXT[]) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.claim_stored_image(TEXT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.rebuild_image_references() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.register_image_object(TEXT, TEXT, TEXT, TEXT, BIGINT) TO service_role;
+GRANT EXECUTE ON FUNCTION public.claim_orphaned_images(INTEGER, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.finish_image_collection(TEXT[]) TO service_role;
+GRANT EXECUTE ON FUNCTION public.claim_stored_image(TEXT) TO service_role;
+GRANT EXECUTE ON FUNCTION public.rebuild_image_references() TO service_role;
+GRANT SELECT ON public.image_objects TO service_role;
+
+-- Backfill from existing rows
+SELECT public.rebuild_image_references();
+
+-- Refresh PostgREST schema cache so the RPCs are callable immediately
+NOTIFY pgrst, 'reload schema';
+
+-- Completion message
+SELECT 'image_objects / image_references and the image GC RPCs installed successfully!' as final_status;
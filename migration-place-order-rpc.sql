@@ -0,0 +1,144 @@
+-- =====================================================
+-- RitZone: Transactional Place Order
+-- =====================================================
+-- Execute this in your Supabase SQL Editor after database-schema.sql
+-- Validates stock, creates the order and its items, decrements stock and
+-- converts the cart in a single transaction so concurrent checkouts cannot oversell
+
+-- =====================================================
+-- PLACE_ORDER FUNCTION
+-- =====================================================
+CREATE OR REPLACE FUNCTION public.place_order(
+    p_user_id UUID,
+    p_billing_address JSONB,
+    p_shipping_address JSONB,
+    p_payment_method TEXT DEFAULT 'card',
+    p_notes TEXT DEFAULT NULL,
+    p_discount_amount DECIMAL(10,2) DEFAULT 0
+)
+RETURNS public.orders
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+DECLARE
+    cart_id_value UUID;
+    wanted_count INTEGER;
+    decremented_ids UUID[];
+    failed_items JSONB;
+    subtotal DECIMAL(10,2);
+    tax DECIMAL(10,2);
+    shipping DECIMAL(10,2);
+    discount DECIMAL(10,2) := COALESCE(p_discount_amount, 0);
+    order_record public.orders%ROWTYPE;
+BEGIN
+    -- Lock the active cart so the same cart cannot be checked out twice
+    SELECT id INTO cart_id_value
+    FROM public.carts
+    WHERE user_id = p_user_id AND status = 'active'
+    ORDER BY created_at DESC
+    LIMIT 1
+    FOR UPDATE;
+
+    IF cart_id_value IS NULL THEN
+        RAISE EXCEPTION 'Cart is empty or not found';
+    END IF;
+
+    SELECT COUNT(DISTINCT product_id), COALESCE(SUM(total_price), 0.00)
+    INTO wanted_count, subtotal
+    FROM public.cart_items
+    WHERE cart_id = cart_id_value;
+
+    IF wanted_count = 0 THEN
+        RAISE EXCEPTION 'Cart is empty or not found';
+    END IF;
+
+    -- Lock product rows in a stable order to avoid deadlocks between checkouts
+    PERFORM 1
+    FROM public.products
+    WHERE id IN (SELECT product_id FROM public.cart_items WHERE cart_id = cart_id_value)
+    ORDER BY id
+    FOR UPDATE;
+
+    -- Decrement stock only where enough is left, in one statement
+    WITH wanted AS (
+        SELECT product_id, SUM(quantity) AS quantity
+        FROM public.cart_items
+        WHERE cart_id = cart_id_value
+        GROUP BY product_id
+    ),
+    decremented AS (
+        UPDATE public.products p
+        SET stock_quantity = p.stock_quantity - w.quantity
+        FROM wanted w
+        WHERE p.id = w.product_id
+          AND p.is_active = true
+          AND p.stock_quantity >= w.quantity
+        RETURNING p.id
+    )
+    SELECT COALESCE(array_agg(id), '{}') INTO decremented_ids FROM decremented;
+
+    IF COALESCE(array_length(decremented_ids, 1), 0) < wanted_count THEN
+        SELECT jsonb_agg(jsonb_build_object(
+            'product_id', w.product_id,
+            'product_name', p.name,
+            'requested', w.quantity,
+            'available', COALESCE(p.stock_quantity, 0),
+            'reason', CASE WHEN p.id IS NULL OR p.is_active IS NOT TRUE THEN 'unavailable' ELSE 'insufficient_stock' END
+        ))
+        INTO failed_items
+        FROM (
+            SELECT product_id, SUM(quantity) AS quantity
+            FROM public.cart_items
+            WHERE cart_id = cart_id_value
+            GROUP BY product_id
+        ) w
+        LEFT JOIN public.products p ON p.id = w.product_id
+        WHERE w.product_id <> ALL (decremented_ids);
+
+        -- Raising rolls back the stock already decremented above
+        RAISE EXCEPTION '%', CASE
+            WHEN failed_items->0->>'reason' = 'unavailable'
+                THEN format('Product %s is no longer available', failed_items->0->>'product_name')
+            ELSE format('Insufficient stock for %s', failed_items->0->>'product_name')
+        END
+        USING DETAIL = failed_items::text;
+    END IF;
+
+    -- Same pricing rules as the storefront checkout
+    tax := subtotal * 0.08;
+    shipping := CASE WHEN subtotal > 50 THEN 0 ELSE 9.99 END;
+
+    INSERT INTO public.orders (
+        order_number, user_id, status, total_amount, subtotal_amount, tax_amount,
+        shipping_amount, discount_amount, currency, payment_method,
+        billing_address, shipping_address, notes
+    )
+    VALUES (
+        'RZ-' || (EXTRACT(EPOCH FROM clock_timestamp()) * 1000)::BIGINT || '-' || UPPER(SUBSTR(MD5(random()::TEXT), 1, 9)),
+        p_user_id, 'pending', subtotal + tax + shipping - discount, subtotal, tax,
+        shipping, discount, 'INR', COALESCE(p_payment_method, 'card'),
+        p_billing_address, p_shipping_address, p_notes
+    )
+    RETURNING * INTO order_record;
+
+    INSERT INTO public.order_items (order_id, product_id, product_name, product_sku, quantity, unit_price, total_price)
+    SELECT order_record.id, ci.product_id, p.name, p.sku, ci.quantity, ci.unit_price, ci.total_price
+    FROM public.cart_items ci
+    JOIN public.products p ON p.id = ci.product_id
+    WHERE ci.cart_id = cart_id_value;
+
+    UPDATE public.carts
+    SET status = 'converted'
+    WHERE id = cart_id_value;
+
+    RETURN order_record;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.place_order(UUID, JSONB, JSONB, TEXT, TEXT, DECIMAL) TO anon, authenticated, service_role;
+
+-- Refresh PostgREST schema cache so the RPC is callable immediately
+NOTIFY pgrst, 'reload schema';
+
+-- Completion message
+SELECT 'place_order RPC installed successfully!' as final_status;
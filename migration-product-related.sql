@@ -0,0 +1,317 @@
+-- =====================================================
+-- RitZone: Precomputed Related Products
+-- =====================================================
+-- Execute this in your Supabase SQL Editor after database-schema.sql
+-- Stores scored neighbours per product (category, brand, price band and
+-- co-purchase) so GET /api/products/:id/related is a single indexed lookup.
+-- Populate with: SELECT public.refresh_product_related();
+-- Then schedule: SELECT public.refresh_product_related_queue();  (e.g. every 5 minutes via pg_cron)
+
+-- =====================================================
+-- TABLES
+-- =====================================================
+CREATE TABLE IF NOT EXISTS public.product_related (
+    product_id UUID REFERENCES public.products(id) ON DELETE CASCADE NOT NULL,
+    related_product_id UUID REFERENCES public.products(id) ON DELETE CASCADE NOT NULL,
+    score REAL NOT NULL,
+    computed_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc'::text, NOW()) NOT NULL,
+    PRIMARY KEY (product_id, related_product_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_product_related_score ON public.product_related(product_id, score DESC);
+CREATE INDEX IF NOT EXISTS idx_product_related_related ON public.product_related(related_product_id);
+
+-- Products whose neighbour lists need recomputing
+CREATE TABLE IF NOT EXISTS public.product_related_queue (
+    product_id UUID PRIMARY KEY,
+    queued_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc'::text, NOW()) NOT NULL
+);
+
+-- Supports the co-purchase self-join below
+CREATE INDEX IF NOT EXISTS idx_order_items_product_order ON public.order_items(product_id, order_id);
+
+ALTER TABLE public.product_related ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Anyone can view related products" ON public.product_related;
+CREATE POLICY "Anyone can view related products" ON public.product_related FOR SELECT USING (true);
+
+-- =====================================================
+-- REFRESH_PRODUCT_RELATED FUNCTION
+-- =====================================================
+-- Recomputes the neighbour lists for p_product_ids (all active products when NULL).
+-- Score = same category 3 + same brand 2 + price closeness 0..1
+--       + 2 * ln(1 + orders bought together) + rating 0..0.5
+-- The best-rated products are always candidates so every list can be filled.
+CREATE OR REPLACE FUNCTION public.refresh_product_related(
+    p_product_ids UUID[] DEFAULT NULL,
+    p_limit INTEGER DEFAULT 20
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    written INTEGER;
+BEGIN
+    DELETE FROM public.product_related
+    WHERE p_product_ids IS NULL OR product_id = ANY(p_product_ids);
+
+    WITH sources AS (
+        SELECT id, category_id, LOWER(brand) AS brand, price
+        FROM public.products
+        WHERE is_active = true
+          AND (p_product_ids IS NULL OR id = ANY(p_product_ids))
+    ),
+    top_rated AS (
+        SELECT id
+        FROM public.products
+        WHERE is_active = true
+        ORDER BY rating_average DESC NULLS LAST, total_reviews DESC
+        LIMIT p_limit + 1
+    ),
+    co_purchases AS (
+        SELECT a.product_id, b.product_id AS related_product_id, COUNT(DISTINCT a.order_id) AS orders
+        FROM public.order_items a
+        JOIN public.order_items b ON b.order_id = a.order_id AND b.product_id <> a.product_id
+        WHERE p_product_ids IS NULL OR a.product_id = ANY(p_product_ids)
+        GROUP BY a.product_id, b.product_id
+    ),
+    candidates AS (
+        SELECT s.id AS product_id, c.id AS related_product_id
+        FROM sources s
+        JOIN public.products c
+          ON c.is_active = true
+         AND c.id <> s.id
+         AND (c.category_id = s.category_id OR (s.brand IS NOT NULL AND LOWER(c.brand) = s.brand))
+        UNION
+        SELECT s.id, t.id FROM sources s CROSS JOIN top_rated t WHERE t.id <> s.id
+        UNION
+        SELECT cp.product_id, cp.related_product_id FROM co_purchases cp JOIN sources s ON s.id = cp.product_id
+    ),
+    scored AS (
+        SELECT
+            cand.product_id,
+            cand.related_product_id,
+            (CASE WHEN c.category_id = s.category_id THEN 3 ELSE 0 END
+             + CASE WHEN s.brand IS NOT NULL AND LOWER(c.brand) = s.brand THEN 2 ELSE 0 END
+             + GREATEST(0, 1 - ABS(c.price - s.price) / GREATEST(s.price, 1))
+             + 2 * LN(1 + COALESCE(cp.orders, 0))
+             + COALESCE(c.rating_average, 0) / 10)::REAL AS score
+        FROM candidates cand
+        JOIN sources s ON s.id = cand.product_id
+        JOIN public.products c ON c.id = cand.related_product_id AND c.is_active = true
+        LEFT JOIN co_purchases cp
+          ON cp.product_id = cand.product_id AND cp.related_product_id = cand.related_product_id
+    ),
+    ranked AS (
+        SELECT *, ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY score DESC, related_product_id) AS position
+        FROM scored
+    )
+    INSERT INTO public.product_related (product_id, related_product_id, score)
+    SELECT product_id, related_product_id, score
+    FROM ranked
+    WHERE position <= p_limit;
+
+    GET DIAGNOSTICS written = ROW_COUNT;
+    RETURN written;
+END;
+$$;
+
+-- =====================================================
+-- INCREMENTAL REFRESH
+-- =====================================================
+-- Queue products whose ranking inputs changed
+CREATE OR REPLACE FUNCTION public.queue_product_related_refresh()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    INSERT INTO public.product_related_queue (product_id)
+    VALUES (NEW.id)
+    ON CONFLICT (product_id) DO UPDATE SET queued_at = EXCLUDED.queued_at;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS queue_product_related_refresh ON public.products;
+CREATE TRIGGER queue_product_related_refresh
+    AFTER INSERT OR UPDATE OF category_id, brand, price, is_active ON public.products
+    FOR EACH ROW EXECUTE FUNCTION public.queue_product_related_refresh();
+
+-- Scores p_product_ids as candidates for the existing lists of their category /
+-- brand neighbours and merges them in where they beat the list's current
+-- minimum (or the list is short), then trims those lists back to p_limit.
+-- Returns the number of rows written.
+-- O(neighbours) per product, instead of recomputing every neighbour's list.
+CREATE OR REPLACE FUNCTION public.merge_into_related_lists(
+    p_product_ids UUID[],
+    p_limit INTEGER DEFAULT 20
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    owners UUID[];
+    merged INTEGER;
+BEGIN
+    WITH changed AS (
+        SELECT id, category_id, LOWER(brand) AS brand, price, rating_average
+        FROM public.products
+        WHERE is_active = true AND id = ANY(p_product_ids)
+    ),
+    co_purchases AS (
+        SELECT a.product_id, b.product_id AS related_product_id, COUNT(DISTINCT a.order_id) AS orders
+        FROM public.order_items a
+        JOIN public.order_items b ON b.order_id = a.order_id AND b.product_id <> a.product_id
+        WHERE b.product_id = ANY(p_product_ids)
+        GROUP BY a.product_id, b.product_id
+    ),
+    -- Same score as refresh_product_related, with the neighbour as list owner (s)
+    scored AS (
+        SELECT
+            s.id AS product_id,
+            c.id AS related_product_id,
+            (CASE WHEN c.category_id = s.category_id THEN 3 ELSE 0 END
+             + CASE WHEN s.brand IS NOT NULL AND LOWER(s.brand) = c.brand THEN 2 ELSE 0 END
+             + GREATEST(0, 1 - ABS(c.price - s.price) / GREATEST(s.price, 1))
+             + 2 * LN(1 + COALESCE(cp.orders, 0))
+             + COALESCE(c.rating_average, 0) / 10)::REAL AS score
+        FROM changed c
+        JOIN public.products s
+          ON s.is_active = true
+         AND s.id <> c.id
+         AND NOT (s.id = ANY(p_product_ids))
+         AND (s.category_id = c.category_id OR (c.brand IS NOT NULL AND LOWER(s.brand) = c.brand))
+        LEFT JOIN co_purchases cp ON cp.product_id = s.id AND cp.related_product_id = c.id
+    ),
+    lists AS (
+        SELECT product_id, COUNT(*) AS entries, MIN(score) AS min_score
+        FROM public.product_related
+        WHERE product_id IN (SELECT product_id FROM scored)
+        GROUP BY product_id
+    ),
+    inserted AS (
+        INSERT INTO public.product_related (product_id, related_product_id, score)
+        SELECT sc.product_id, sc.related_product_id, sc.score
+        FROM scored sc
+        LEFT JOIN lists l ON l.product_id = sc.product_id
+        WHERE COALESCE(l.entries, 0) < p_limit OR sc.score > l.min_score
+        ON CONFLICT (product_id, related_product_id) DO UPDATE
+        SET score = EXCLUDED.score, computed_at = EXCLUDED.computed_at
+        RETURNING product_id
+    )
+    SELECT array_agg(DISTINCT product_id), COUNT(*) INTO owners, merged FROM inserted;
+
+    IF owners IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    DELETE FROM public.product_related r
+    USING (
+        SELECT product_id, related_product_id,
+               ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY score DESC, related_product_id) AS position
+        FROM public.product_related
+        WHERE product_id = ANY(owners)
+    ) ranked
+    WHERE r.product_id = ranked.product_id
+      AND r.related_product_id = ranked.related_product_id
+      AND ranked.position > p_limit;
+
+    RETURN merged;
+END;
+$$;
+
+-- Recompute queued products and every list that currently contains them (which
+-- drops moved or deactivated products from their old neighbours' lists), then
+-- merge the queued products into their current neighbours' lists
+CREATE OR REPLACE FUNCTION public.refresh_product_related_queue(
+    p_limit INTEGER DEFAULT 20
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    queued UUID[];
+    affected UUID[];
+    written INTEGER;
+BEGIN
+    WITH drained AS (
+        DELETE FROM public.product_related_queue RETURNING product_id
+    )
+    SELECT array_agg(product_id) INTO queued FROM drained;
+
+    IF queued IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    SELECT array_agg(DISTINCT id) INTO affected
+    FROM (
+        SELECT unnest(queued) AS id
+        UNION
+        SELECT product_id FROM public.product_related WHERE related_product_id = ANY(queued)
+    ) ids;
+
+    written := public.refresh_product_related(affected, p_limit);
+
+    RETURN written + public.merge_into_related_lists(queued, p_limit);
+END;
+$$;
+
+-- =====================================================
+-- GET_RELATED_PRODUCTS FUNCTION
+-- =====================================================
+-- Slim card fields only (first image, no description text)
+CREATE OR REPLACE FUNCTION public.get_related_products(
+    p_product_id UUID,
+    p_limit INTEGER DEFAULT 10
+)
+RETURNS TABLE (
+    id UUID,
+    name TEXT,
+    slug TEXT,
+    price DECIMAL(10,2),
+    original_price DECIMAL(10,2),
+    images TEXT[],
+    brand TEXT,
+    category_name TEXT,
+    stock_quantity INTEGER,
+    rating_average DECIMAL(3,2),
+    total_reviews INTEGER,
+    score REAL
+)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    SELECT
+        p.id, p.name, p.slug, p.price, p.original_price, p.images[1:1], p.brand,
+        c.name, p.stock_quantity, p.rating_average, p.total_reviews, r.score
+    FROM public.product_related r
+    JOIN public.products p ON p.id = r.related_product_id AND p.is_active = true
+    LEFT JOIN public.categories c ON c.id = p.category_id
+    WHERE r.product_id = p_product_id
+    ORDER BY r.score DESC, r.related_product_id
+    LIMIT GREATEST(p_limit, 1);
+$$;
+
+GRANT SELECT ON public.product_related TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.get_related_products(UUID, INTEGER) TO anon, authenticated, service_role;
+-- Refresh functions are SECURITY DEFINER: keep them off the public API
+REVOKE EXECUTE ON FUNCTION public.refresh_product_related(UUID[], INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.refresh_product_related_queue(INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.merge_into_related_lists(UUID[], INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.refresh_product_related(UUID[], INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.refresh_product_related_queue(INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.merge_into_related_lists(UUID[], INTEGER) TO service_role;
+
+-- Refresh PostgREST schema cache so the RPCs are callable immediately
+NOTIFY pgrst, 'reload schema';
+
+-- Completion message
+SELECT 'product_related table and RPCs installed successfully! Run SELECT public.refresh_product_related(); to populate it.' as final_status;
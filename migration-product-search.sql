@@ -0,0 +1,129 @@
+-- =====================================================
+-- RitZone: Full-Text Product Search
+-- =====================================================
+-- Execute this in your Supabase SQL Editor after database-schema.sql
+-- Adds a weighted tsvector (name > brand > description) with a GIN index,
+-- trigram indexes for typo/substring matching, and a relevance-ranked
+-- search_products RPC used by GET /api/products/search/:query
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- =====================================================
+-- SEARCH VECTOR COLUMN
+-- =====================================================
+ALTER TABLE public.products
+ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+GENERATED ALWAYS AS (
+    setweight(to_tsvector('english'::regconfig, COALESCE(name, '')), 'A') ||
+    setweight(to_tsvector('english'::regconfig, COALESCE(brand, '')), 'B') ||
+    setweight(to_tsvector('english'::regconfig, COALESCE(description, '')), 'C')
+) STORED;
+
+-- =====================================================
+-- INDEXES
+-- =====================================================
+CREATE INDEX IF NOT EXISTS idx_products_search_vector ON public.products USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON public.products USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_products_brand_trgm ON public.products USING GIN (brand gin_trgm_ops);
+
+-- =====================================================
+-- SEARCH_PRODUCTS FUNCTION
+-- =====================================================
+-- Earlier versions took no keyset cursor; drop that overload so PostgREST
+-- calls are not ambiguous on databases that already ran this file
+DROP FUNCTION IF EXISTS public.search_products(TEXT, TEXT, TEXT, INTEGER, INTEGER);
+
+CREATE OR REPLACE FUNCTION public.search_products(
+    p_query TEXT,
+    p_category TEXT DEFAULT NULL,
+    p_sort TEXT DEFAULT 'relevance',
+    p_limit INTEGER DEFAULT 20,
+    p_offset INTEGER DEFAULT 0,
+    p_after_created_at TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+    p_after_id UUID DEFAULT NULL
+)
+RETURNS TABLE (
+    id UUID,
+    name TEXT,
+    description TEXT,
+    slug TEXT,
+    price DECIMAL(10,2),
+    original_price DECIMAL(10,2),
+    images TEXT[],
+    brand TEXT,
+    stock_quantity INTEGER,
+    rating_average DECIMAL(3,2),
+    total_reviews INTEGER,
+    is_active BOOLEAN,
+    is_featured BOOLEAN,
+    created_at TIMESTAMP WITH TIME ZONE,
+    category_name TEXT,
+    category_slug TEXT,
+    rank REAL,
+    total_count BIGINT
+)
+LANGUAGE sql
+STABLE
+SET search_path = public, extensions
+AS $$
+    WITH params AS (
+        SELECT
+            NULLIF(TRIM(p_query), '') AS term,
+            websearch_to_tsquery('english'::regconfig, COALESCE(TRIM(p_query), '')) AS tsq,
+            '%' || REPLACE(REPLACE(REPLACE(COALESCE(TRIM(p_query), ''), '\', '\\'), '%', '\%'), '_', '\_') || '%' AS pattern
+    ),
+    matches AS (
+        SELECT
+            p.*,
+            c.name AS c_name,
+            c.slug AS c_slug,
+            (CASE WHEN params.term IS NULL THEN 0
+                  ELSE ts_rank(p.search_vector, params.tsq) + similarity(p.name, params.term) * 0.5
+             END)::REAL AS score
+        FROM public.products p
+        CROSS JOIN params
+        LEFT JOIN public.categories c ON c.id = p.category_id
+        WHERE p.is_active = true
+          AND (
+              params.term IS NULL
+              OR p.search_vector @@ params.tsq
+              OR p.name % params.term
+              OR p.name ILIKE params.pattern
+              OR p.brand ILIKE params.pattern
+          )
+          AND (
+              p_category IS NULL OR p_category = '' OR p_category = 'All'
+              OR LOWER(c.name) = LOWER(p_category)
+              OR c.slug = LOWER(p_category)
+          )
+    ),
+    counted AS (
+        SELECT m.*, COUNT(*) OVER () AS match_count
+        FROM matches m
+    )
+    SELECT
+        m.id, m.name, m.description, m.slug, m.price, m.original_price, m.images, m.brand,
+        m.stock_quantity, m.rating_average, m.total_reviews, m.is_active, m.is_featured,
+        m.created_at, m.c_name, m.c_slug, m.score, m.match_count
+    FROM counted m
+    -- Keyset cursor (newest-first only): rows strictly after (created_at, id)
+    WHERE p_after_id IS NULL
+       OR (m.created_at, m.id) < (p_after_created_at, p_after_id)
+    ORDER BY
+        CASE WHEN p_sort = 'price-low' THEN m.price END ASC,
+        CASE WHEN p_sort = 'price-high' THEN m.price END DESC,
+        CASE WHEN p_sort = 'rating' THEN m.rating_average END DESC,
+        CASE WHEN p_sort = 'newest' THEN NULL ELSE m.score END DESC,
+        m.created_at DESC,
+        m.id DESC
+    LIMIT GREATEST(p_limit, 1)
+    OFFSET GREATEST(p_offset, 0);
+$$;
+
+GRANT EXECUTE ON FUNCTION public.search_products(TEXT, TEXT, TEXT, INTEGER, INTEGER, TIMESTAMP WITH TIME ZONE, UUID) TO anon, authenticated, service_role;
+
+-- Refresh PostgREST schema cache so the RPC is callable immediately
+NOTIFY pgrst, 'reload schema';
+
+-- Completion message
+SELECT 'Product search index and search_products RPC installed successfully!' as final_status;
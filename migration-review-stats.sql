@@ -0,0 +1,195 @@
+-- =====================================================
+-- RitZone: Maintained Product Review Statistics
+-- =====================================================
+-- Execute this in your Supabase SQL Editor after user_reviews_schema_corrected.sql
+-- Keeps a per-product row (count, rating sum, 1-5 histogram) in step with
+-- approved user_reviews via triggers, and mirrors it onto
+-- products.rating_average / rating_count / total_reviews, so review stats
+-- are a primary-key lookup instead of a scan of every rating
+
+-- =====================================================
+-- PRODUCT_REVIEW_STATS TABLE
+-- =====================================================
+CREATE TABLE IF NOT EXISTS public.product_review_stats (
+    product_id UUID PRIMARY KEY REFERENCES public.products(id) ON DELETE CASCADE,
+    review_count INTEGER DEFAULT 0 NOT NULL,
+    rating_sum INTEGER DEFAULT 0 NOT NULL,
+    rating_1 INTEGER DEFAULT 0 NOT NULL,
+    rating_2 INTEGER DEFAULT 0 NOT NULL,
+    rating_3 INTEGER DEFAULT 0 NOT NULL,
+    rating_4 INTEGER DEFAULT 0 NOT NULL,
+    rating_5 INTEGER DEFAULT 0 NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc'::text, NOW()) NOT NULL
+);
+
+ALTER TABLE public.product_review_stats ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Review stats are publicly readable" ON public.product_review_stats;
+CREATE POLICY "Review stats are publicly readable" ON public.product_review_stats FOR SELECT USING (true);
+GRANT SELECT ON public.product_review_stats TO anon, authenticated;
+
+-- Supports the approved-reviews listing and the rebuild below
+CREATE INDEX IF NOT EXISTS idx_user_reviews_product_approved ON public.user_reviews(product_id, created_at DESC) WHERE is_approved = true;
+
+-- =====================================================
+-- DELTA HELPER
+-- =====================================================
+-- Adds (p_delta = 1) or removes (p_delta = -1) one rating and copies the
+-- resulting average/count onto the product row
+CREATE OR REPLACE FUNCTION public.apply_review_stats_delta(p_product_id UUID, p_rating INTEGER, p_delta INTEGER)
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    stats_record public.product_review_stats%ROWTYPE;
+BEGIN
+    -- Reviews removed by a product hard-delete cascade: nothing left to maintain
+    IF NOT EXISTS (SELECT 1 FROM public.products WHERE id = p_product_id) THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO public.product_review_stats AS s (
+        product_id, review_count, rating_sum, rating_1, rating_2, rating_3, rating_4, rating_5
+    )
+    VALUES (
+        p_product_id, p_delta, p_rating * p_delta,
+        CASE WHEN p_rating = 1 THEN p_delta ELSE 0 END,
+        CASE WHEN p_rating = 2 THEN p_delta ELSE 0 END,
+        CASE WHEN p_rating = 3 THEN p_delta ELSE 0 END,
+        CASE WHEN p_rating = 4 THEN p_delta ELSE 0 END,
+        CASE WHEN p_rating = 5 THEN p_delta ELSE 0 END
+    )
+    ON CONFLICT (product_id) DO UPDATE SET
+        review_count = s.review_count + EXCLUDED.review_count,
+        rating_sum = s.rating_sum + EXCLUDED.rating_sum,
+        rating_1 = s.rating_1 + EXCLUDED.rating_1,
+        rating_2 = s.rating_2 + EXCLUDED.rating_2,
+        rating_3 = s.rating_3 + EXCLUDED.rating_3,
+        rating_4 = s.rating_4 + EXCLUDED.rating_4,
+        rating_5 = s.rating_5 + EXCLUDED.rating_5,
+        updated_at = NOW()
+    RETURNING * INTO stats_record;
+
+    UPDATE public.products
+    SET
+        rating_average = CASE WHEN stats_record.review_count > 0
+                              THEN ROUND(stats_record.rating_sum::NUMERIC / stats_record.review_count, 2)
+                              ELSE 0.0 END,
+        rating_count = stats_record.review_count,
+        total_reviews = stats_record.review_count,
+        updated_at = NOW()
+    WHERE id = p_product_id;
+END;
+$$;
+
+-- =====================================================
+-- USER_REVIEWS TRIGGER
+-- =====================================================
+CREATE OR REPLACE FUNCTION public.maintain_product_review_stats()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND OLD.product_id = NEW.product_id
+       AND OLD.rating = NEW.rating
+       AND OLD.is_approved IS NOT DISTINCT FROM NEW.is_approved THEN
+        RETURN NEW;
+    END IF;
+
+    -- Only approved reviews count, matching what the API lists
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.is_approved IS TRUE THEN
+        PERFORM public.apply_review_stats_delta(OLD.product_id, OLD.rating, -1);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.is_approved IS TRUE THEN
+        PERFORM public.apply_review_stats_delta(NEW.product_id, NEW.rating, 1);
+    END IF;
+
+    RETURN COALESCE(NEW, OLD);
+END;
+$$;
+
+DROP TRIGGER IF EXISTS maintain_product_review_stats ON public.user_reviews;
+CREATE TRIGGER maintain_product_review_stats
+AFTER INSERT OR UPDATE OF product_id, rating, is_approved OR DELETE ON public.user_reviews
+FOR EACH ROW EXECUTE FUNCTION public.maintain_product_review_stats();
+
+-- =====================================================
+-- REBUILD (BACKFILL / REPAIR)
+-- =====================================================
+-- Recomputes every stats row from user_reviews and re-syncs the products.
+-- Products without user reviews keep their existing catalogue rating.
+CREATE OR REPLACE FUNCTION public.rebuild_product_review_stats()
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    rebuilt INTEGER;
+BEGIN
+    WITH computed AS (
+        SELECT
+            r.product_id,
+            COUNT(*) FILTER (WHERE r.is_approved IS TRUE) AS review_count,
+            COALESCE(SUM(r.rating) FILTER (WHERE r.is_approved IS TRUE), 0) AS rating_sum,
+            COUNT(*) FILTER (WHERE r.is_approved IS TRUE AND r.rating = 1) AS rating_1,
+            COUNT(*) FILTER (WHERE r.is_approved IS TRUE AND r.rating = 2) AS rating_2,
+            COUNT(*) FILTER (WHERE r.is_approved IS TRUE AND r.rating = 3) AS rating_3,
+            COUNT(*) FILTER (WHERE r.is_approved IS TRUE AND r.rating = 4) AS rating_4,
+            COUNT(*) FILTER (WHERE r.is_approved IS TRUE AND r.rating = 5) AS rating_5
+        FROM public.user_reviews r
+        GROUP BY r.product_id
+    )
+    INSERT INTO public.product_review_stats AS s (
+        product_id, review_count, rating_sum, rating_1, rating_2, rating_3, rating_4, rating_5
+    )
+    SELECT product_id, review_count, rating_sum, rating_1, rating_2, rating_3, rating_4, rating_5
+    FROM computed
+    ON CONFLICT (product_id) DO UPDATE SET
+        review_count = EXCLUDED.review_count,
+        rating_sum = EXCLUDED.rating_sum,
+        rating_1 = EXCLUDED.rating_1,
+        rating_2 = EXCLUDED.rating_2,
+        rating_3 = EXCLUDED.rating_3,
+        rating_4 = EXCLUDED.rating_4,
+        rating_5 = EXCLUDED.rating_5,
+        updated_at = NOW();
+
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+
+    UPDATE public.products p
+    SET
+        rating_average = CASE WHEN s.review_count > 0
+                              THEN ROUND(s.rating_sum::NUMERIC / s.review_count, 2)
+                              ELSE 0.0 END,
+        rating_count = s.review_count,
+        total_reviews = s.review_count,
+        updated_at = NOW()
+    FROM public.product_review_stats s
+    WHERE s.product_id = p.id
+      AND (p.total_reviews IS DISTINCT FROM s.review_count
+           OR p.rating_average IS DISTINCT FROM CASE WHEN s.review_count > 0
+                                                     THEN ROUND(s.rating_sum::NUMERIC / s.review_count, 2)
+                                                     ELSE 0.0 END);
+
+    RETURN rebuilt;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.apply_review_stats_delta(UUID, INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.rebuild_product_review_stats() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.rebuild_product_review_stats() TO service_role;
+
+-- Backfill from existing reviews
+SELECT public.rebuild_product_review_stats();
+
+-- Refresh PostgREST schema cache so the table is visible immediately
+NOTIFY pgrst, 'reload schema';
+
+-- Completion message
+SELECT 'product_review_stats table and triggers installed successfully!' as final_status;
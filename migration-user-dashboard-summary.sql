@@ -0,0 +1,81 @@
+-- =====================================================
+-- RitZone: Profile Dashboard Summary
+-- =====================================================
+-- Execute this in your Supabase SQL Editor after database-schema.sql and profile-enhancement-schema.sql
+-- Returns everything GET /api/profile/dashboard needs (user info, order
+-- counts, total spent, cart/wishlist counts, five recent orders) in one call,
+-- aggregated in the database instead of shipping every order row to the API
+
+-- Serves both the per-user aggregates and the recent-orders lookup
+CREATE INDEX IF NOT EXISTS idx_orders_user_created ON public.orders(user_id, created_at DESC);
+
+-- =====================================================
+-- USER_DASHBOARD_SUMMARY FUNCTION
+-- =====================================================
+CREATE OR REPLACE FUNCTION public.user_dashboard_summary(p_user_id UUID)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    SELECT jsonb_build_object(
+        'user', (
+            SELECT jsonb_build_object('full_name', u.full_name, 'created_at', u.created_at)
+            FROM public.users u
+            WHERE u.id = p_user_id
+        ),
+        'stats', (
+            SELECT jsonb_build_object(
+                'total_orders', COUNT(*),
+                'active_deliveries', COUNT(*) FILTER (WHERE o.status IN ('processing', 'shipped')),
+                'completed_orders', COUNT(*) FILTER (WHERE o.status = 'delivered'),
+                'total_spent', ROUND(COALESCE(SUM(o.total_amount), 0), 2),
+                'cart_items', (
+                    SELECT COUNT(*)
+                    FROM public.cart_items ci
+                    JOIN public.carts c ON c.id = ci.cart_id
+                    WHERE c.user_id = p_user_id AND c.status = 'active'
+                ),
+                'wishlist_items', (
+                    SELECT COUNT(*) FROM public.user_wishlist w WHERE w.user_id = p_user_id
+                )
+            )
+            FROM public.orders o
+            WHERE o.user_id = p_user_id
+        ),
+        'recent_orders', COALESCE((
+            SELECT jsonb_agg(recent ORDER BY recent.created_at DESC)
+            FROM (
+                SELECT
+                    o.id,
+                    o.order_number,
+                    o.status,
+                    o.total_amount,
+                    o.created_at,
+                    (
+                        SELECT jsonb_agg(jsonb_build_object(
+                            'product_name', oi.product_name,
+                            'quantity', oi.quantity,
+                            'unit_price', oi.unit_price
+                        ))
+                        FROM public.order_items oi
+                        WHERE oi.order_id = o.id
+                    ) AS order_items
+                FROM public.orders o
+                WHERE o.user_id = p_user_id
+                ORDER BY o.created_at DESC
+                LIMIT 5
+            ) recent
+        ), '[]'::jsonb)
+    );
+$$;
+
+-- Takes any user id, so only the backend (service role) may call it
+REVOKE EXECUTE ON FUNCTION public.user_dashboard_summary(UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.user_dashboard_summary(UUID) TO service_role;
+
+-- Refresh PostgREST schema cache so the RPC is callable immediately
+NOTIFY pgrst, 'reload schema';
+
+-- Completion message
+SELECT 'user_dashboard_summary RPC installed successfully!' as final_status;
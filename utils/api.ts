@@ -211,6 +211,15 @@ class ApiClient {
     return this.makeRequest('/deals');
   }
 
+  // Homepage bundle: banners, categories, featured and electronics products in one request
+  async getHomepage(currency?: string) {
+    const searchParams = new URLSearchParams();
+    this.addCurrencyToParams(searchParams, currency);
+
+    const query = searchParams.toString();
+    return this.makeRequest(`/homepage${query ? `?${query}` : ''}`);
+  }
+
   // NEW: Currency API
   async getCurrencies() {
     return this.makeRequest('/currency/currencies');